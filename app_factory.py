@@ -0,0 +1,201 @@
+"""
+Application factory
+create_app(settings) - FastAPI app, middleware, routers aur background jobs
+
+Startup does as little as possible before the app can serve: schema migrations
+and static asset preparation run in worker threads (see Settings.db_init), and
+Jinja2 templates, the digest renderer and job bodies are imported on first use.
+"""
+
+import asyncio
+import importlib
+import os
+import traceback
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from audit_archive import audit_archive
+from compression import CompressionMiddleware, precompress_static_assets
+from core import ensure_db_initialized, templates
+from json_response import FastJSONResponse
+from metrics import request_metrics
+from profiling import ProfileStore, ProfilingMiddleware
+from query_log import query_log
+from request_timing import RequestTimingMiddleware
+from routers import admin, audit, auth, leads, pages, permissions, reports, targets, users
+from scheduler import BackgroundScheduler
+from settings import Settings
+from static_assets import AssetManifest, FingerprintedStaticFiles
+
+# Included in this order - earlier routes win when paths overlap
+ROUTERS = (audit, reports, pages, auth, leads, users, targets, admin, permissions)
+
+
+def _lazy_job(module: str, attr: str):
+    """Job body imported on its first run - keeps digest / facts code off the import path"""
+    def run(conn):
+        return getattr(importlib.import_module(module), attr)(conn)
+    run.__name__ = attr
+    return run
+
+
+# Both jobs rebuild lead_daily_facts days (recompute refreshes them first) - one GET_LOCK name
+# so no two workers rewrite the same fact days at once
+LEAD_FACTS_LOCK = "crm_job:lead_daily_facts"
+
+
+def build_scheduler(settings: Settings) -> BackgroundScheduler:
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        "target_progress",
+        _lazy_job("target_progress", "recompute_active_targets"),
+        interval=settings.target_recompute_interval,
+        jitter=settings.target_recompute_jitter,
+        initial_delay=30,
+        lock_name=LEAD_FACTS_LOCK,
+    )
+    scheduler.add_job(
+        "lead_daily_facts",
+        _lazy_job("lead_facts", "refresh_job"),
+        interval=settings.lead_facts_refresh_interval,
+        jitter=settings.target_recompute_jitter,
+        initial_delay=10,
+        lock_name=LEAD_FACTS_LOCK,
+    )
+    # Daily digest (dailyDigest + emailNotifications preferences) - sends once a day
+    scheduler.add_job("daily_digest", _lazy_job("digest", "digest_job"),
+                      interval=settings.digest_check_interval, jitter=60, initial_delay=60)
+    # audit_logs partitions: create next months, archive + drop expired ones
+    scheduler.add_job("audit_retention", _lazy_job("audit_archive", "retention_job"),
+                      interval=settings.audit_retention_interval, jitter=600, initial_delay=300)
+    return scheduler
+
+
+def _prepare_static_assets(settings: Settings, manifest: AssetManifest):
+    try:
+        written = precompress_static_assets(settings.static_dir, minimum_size=settings.compression_min_size)
+        if written:
+            print(f"✅ Pre-compressed {written} static asset variants")
+        hashed = manifest.build()
+        print(f"✅ Fingerprinted {hashed} static assets")
+    except Exception as e:
+        print(f"⚠️ Static asset preparation failed: {e}")
+
+
+def _init_database():
+    try:
+        ensure_db_initialized()
+    except Exception as e:
+        print(f"⚠️ Database initialization failed: {type(e).__name__}: {str(e)}")
+        print("⚠️ Full error traceback:")
+        traceback.print_exc()
+        print("⚠️ Application may not work correctly")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings: Settings = app.state.settings
+    background = []
+
+    if settings.prepare_static_assets:
+        background.append(asyncio.create_task(
+            asyncio.to_thread(_prepare_static_assets, settings, app.state.asset_manifest)))
+
+    if settings.db_init == "blocking":
+        await asyncio.to_thread(_init_database)
+    elif settings.db_init == "background":
+        background.append(asyncio.create_task(asyncio.to_thread(_init_database)))
+
+    if settings.scheduler_enabled:
+        app.state.scheduler.start()
+        print(f"✅ Background scheduler started ({len(app.state.scheduler.jobs)} jobs)")
+
+    app.state.startup_tasks = background
+    print("✅ Application started successfully!")
+    yield
+
+    await app.state.scheduler.stop()
+    await asyncio.gather(*background, return_exceptions=True)
+
+
+async def http_exception_handler(request: Request, exc: HTTPException):
+    # Only redirect for API calls that require auth
+    if exc.status_code == 401 and "api" in request.url.path:
+        return JSONResponse(
+            status_code=401,
+            content={"detail": exc.detail}
+        )
+    elif exc.status_code == 403:
+        # Return forbidden as JSON for API, otherwise let it raise
+        if "api" in request.url.path:
+            return JSONResponse(
+                status_code=403,
+                content={"detail": exc.detail}
+            )
+
+    # Re-raise for HTML pages to handle normally
+    raise exc
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    settings = settings or Settings()
+    app = FastAPI(title=settings.title, default_response_class=FastJSONResponse, lifespan=lifespan)
+    app.state.settings = settings
+    app.state.scheduler = build_scheduler(settings)
+    query_log.configure(enabled=settings.query_log_enabled, slow_ms=settings.slow_query_ms,
+                        explain=settings.explain_slow_queries)
+    audit_archive.configure(settings.audit_archive_dir, settings.audit_retention_days)
+
+    app.add_exception_handler(HTTPException, http_exception_handler)
+
+    # Enable CORS for all origins
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+    app.state.profile_store = ProfileStore(settings.profile_dir, settings.profile_max_files)
+    if settings.profiling_enabled:
+        app.add_middleware(ProfilingMiddleware, store=app.state.profile_store,
+                           sample_rate=settings.profile_sample_rate)
+    # Outermost, so wall time and bytes cover compression too
+    app.add_middleware(
+        RequestTimingMiddleware,
+        log_threshold_ms=settings.request_log_threshold_ms,
+        server_timing_header=settings.server_timing_header,
+        metrics=request_metrics if settings.metrics_enabled else None,
+    )
+
+    os.makedirs(settings.templates_dir, exist_ok=True)
+    os.makedirs(settings.static_dir, exist_ok=True)
+
+    # Content-hashed asset URLs ({{ static_url('js/common.js') }}) - hashed paths are cached for a year.
+    # Also serves pre-compressed .br/.gz variants written at startup
+    asset_manifest = AssetManifest(settings.static_dir)
+    app.state.asset_manifest = asset_manifest
+    app.mount("/static", FingerprintedStaticFiles(directory=settings.static_dir, manifest=asset_manifest),
+              name="static")
+    templates.configure(settings.templates_dir, static_url=asset_manifest.url)
+
+    if settings.include_tool_routers:
+        from tools.security_audit_table_api import router as security_audit_table_router
+        from tools.audit_system_info_api import router as audit_system_info_router
+        app.include_router(security_audit_table_router)
+        app.include_router(audit_system_info_router)
+
+    for module in ROUTERS:
+        app.include_router(module.router)
+
+    return app
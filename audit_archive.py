@@ -0,0 +1,480 @@
+"""
+Audit log retention and archive
+audit_logs ki purani monthly partitions NDJSON.gz mein export karke drop karta hai
+
+audit_logs is RANGE-partitioned by month on UNIX_TIMESTAMP(created_at)
+(migration 0004): one partition per month named pYYYYMM, plus pmax for
+anything past the last one. The retention job (scheduler, daily):
+
+  1. back-dated rows for months that are already archived (the first RANGE
+     partition has no lower bound, so they land there) are written to a new
+     archive file of their month and deleted - those months never get a
+     partition again
+  2. splits pmax so partitions exist PARTITIONS_AHEAD months ahead, and splits
+     the first partition when back-dated rows of not-yet-archived months
+     landed in it
+  3. swaps every partition that ended before the retention cutoff out into a
+     staging table (EXCHANGE PARTITION), streams that to
+     <archive dir>/audit_logs_YYYY-MM.ndjson.gz (newest row first), checks the
+     row count and only then drops the (now empty) partition
+
+Dropping a partition is a metadata operation - no million-row DELETE, no
+table-wide lock. Archive files are immutable once written: a month that is
+exported again gets audit_logs_YYYY-MM_partN.ndjson.gz next to the first
+file, and the job fails rather than replace an existing file.
+
+Reads: MySQL keeps the retention window; AuditArchive.query() streams the
+archive files for older ranges in the same (created_at DESC, id DESC) order,
+so /api/audit/logs can continue from the live rows into the archive.
+
+Partition bounds are UNIX_TIMESTAMP() literals evaluated in the session time
+zone when the partition is created - keep the server time zone fixed.
+
+Usage:
+    python audit_archive.py status      partitions + archive files
+    python audit_archive.py run         add future partitions, archive expired ones
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pymysql.cursors
+
+AUDIT_TABLE = "audit_logs"
+MAX_PARTITION = "pmax"
+PARTITIONS_AHEAD = 3            # months of empty partitions kept ready
+EXPORT_FETCH_SIZE = 5000        # rows per fetchmany while streaming a partition out
+ARCHIVE_COUNT_CACHE_SIZE = 256  # (month files, filters) -> matching rows; files never change
+
+_PARTITION_NAME = re.compile(r"^p(\d{4})(\d{2})$")
+_ARCHIVE_FILE = re.compile(r"^audit_logs_(\d{4})-(\d{2})(?:_part(\d+))?\.ndjson\.gz$")
+
+
+def month_start(value) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"p{month:%Y%m}"
+
+
+def partition_clause(month: datetime) -> str:
+    """PARTITION pYYYYMM VALUES LESS THAN (start of the next month)"""
+    return (f"PARTITION {partition_name(month)} VALUES LESS THAN "
+            f"(UNIX_TIMESTAMP('{add_months(month, 1):%Y-%m-%d %H:%M:%S}'))")
+
+
+def partition_clauses(first_month: datetime, last_month: datetime, with_max: bool = True) -> List[str]:
+    """Monthly partitions first..last, then (with_max) the catch-all pmax"""
+    clauses = []
+    month = month_start(first_month)
+    while month <= last_month:
+        clauses.append(partition_clause(month))
+        month = add_months(month, 1)
+    if with_max:
+        clauses.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN MAXVALUE")
+    return clauses
+
+
+def list_partitions(cursor) -> List[dict]:
+    """[{name, month (None for pmax), rows (InnoDB estimate)}] oldest first; [] when not partitioned"""
+    cursor.execute('''
+        SELECT partition_name as name, table_rows as `rows`
+        FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+    ''', (AUDIT_TABLE,))
+    partitions = []
+    for row in cursor.fetchall() or []:
+        match = _PARTITION_NAME.match(row['name'])
+        partitions.append({
+            "name": row['name'],
+            "month": datetime(int(match.group(1)), int(match.group(2)), 1) if match else None,
+            "rows": int(row['rows'] or 0),
+        })
+    return partitions
+
+
+def ensure_future_partitions(cursor, today: Optional[date] = None, ahead: int = PARTITIONS_AHEAD) -> List[str]:
+    """Split pmax so monthly partitions exist through today + ahead months. Returns the new names."""
+    partitions = list_partitions(cursor)
+    months = [p["month"] for p in partitions if p["month"] is not None]
+    if not months or not any(p["name"] == MAX_PARTITION for p in partitions):
+        return []
+    last_needed = add_months(month_start(today or date.today()), ahead)
+    new_months = []
+    month = add_months(max(months), 1)
+    while month <= last_needed:
+        new_months.append(month)
+        month = add_months(month, 1)
+    if not new_months:
+        return []
+    cursor.execute(
+        f"ALTER TABLE {AUDIT_TABLE} REORGANIZE PARTITION {MAX_PARTITION} INTO ("
+        + ", ".join(partition_clauses(new_months[0], new_months[-1])) + ")"
+    )
+    return [partition_name(m) for m in new_months]
+
+
+def ensure_past_partitions(cursor, not_before: Optional[datetime] = None) -> List[str]:
+    """Split the first partition when it holds rows from earlier months (back-dated inserts,
+    imports) so every row sits in - and is later archived with - its own month. Returns the new names.
+    not_before: no partitions for earlier months (already archived - see archive_late_rows)"""
+    partitions = [p for p in list_partitions(cursor) if p["month"] is not None]
+    if not partitions:
+        return []
+    first = partitions[0]
+    cursor.execute(f"SELECT MIN(created_at) as oldest FROM {AUDIT_TABLE} PARTITION ({first['name']})")
+    oldest = (cursor.fetchone() or {}).get('oldest')
+    if oldest is None:
+        return []
+    start = max(month_start(oldest), not_before) if not_before else month_start(oldest)
+    if start >= first["month"]:
+        return []
+    earlier = add_months(first["month"], -1)
+    clauses = partition_clauses(start, earlier, with_max=False) + [partition_clause(first["month"])]
+    cursor.execute(f"ALTER TABLE {AUDIT_TABLE} REORGANIZE PARTITION {first['name']} INTO ({', '.join(clauses)})")
+    return [clause.split()[1] for clause in clauses[:-1]]
+
+
+def _to_json_row(row: dict) -> str:
+    return json.dumps({key: value.isoformat(sep=" ") if isinstance(value, datetime) else value
+                       for key, value in row.items()}, default=str, separators=(",", ":"))
+
+
+def _from_json_row(line: str) -> dict:
+    row = json.loads(line)
+    if row.get("created_at"):
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+
+def _row_key(row: dict) -> tuple:
+    return row["created_at"], row["id"]
+
+
+def _read_file(path: str) -> Iterator[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield _from_json_row(line)
+
+
+def _matches(row: dict, user_id: Optional[int], action: Optional[str], resource_type: Optional[str],
+             start: Optional[datetime], end: Optional[datetime]) -> bool:
+    if user_id is not None and row.get("user_id") != user_id:
+        return False
+    if action and row.get("action") != action:
+        return False
+    if resource_type and row.get("resource_type") != resource_type:
+        return False
+    created = row.get("created_at")
+    if start is not None and (created is None or created < start):
+        return False
+    if end is not None and (created is None or created >= end):
+        return False
+    return True
+
+
+class AuditArchive:
+    """audit_logs_YYYY-MM[_partN].ndjson.gz files - one per export of a month"""
+
+    def __init__(self, directory: str = "archive/audit_logs", retention_days: Optional[int] = 365):
+        self.directory = directory
+        self.retention_days = retention_days
+        self._counts: Dict[tuple, int] = {}
+
+    def configure(self, directory: str, retention_days: Optional[int]):
+        """retention_days: partitions that ended this long ago are archived (None: keep everything live)"""
+        self.directory = directory
+        self.retention_days = retention_days
+        self._counts.clear()
+
+    def path(self, month: datetime, part: int = 1) -> str:
+        suffix = f"_part{part}" if part > 1 else ""
+        return os.path.join(self.directory, f"audit_logs_{month:%Y-%m}{suffix}.ndjson.gz")
+
+    def _files(self) -> Dict[datetime, List[Tuple[int, str]]]:
+        """month -> [(part, path)] in part order"""
+        files: Dict[datetime, List[Tuple[int, str]]] = {}
+        if not os.path.isdir(self.directory):
+            return files
+        for name in os.listdir(self.directory):
+            match = _ARCHIVE_FILE.match(name)
+            if match:
+                month = datetime(int(match.group(1)), int(match.group(2)), 1)
+                files.setdefault(month, []).append((int(match.group(3) or 1), os.path.join(self.directory, name)))
+        for parts in files.values():
+            parts.sort()
+        return files
+
+    def months(self) -> List[datetime]:
+        """Archived months, newest first"""
+        return sorted(self._files(), reverse=True)
+
+    def paths(self, month: datetime) -> List[str]:
+        """Every file of one month, first export first"""
+        return [path for _, path in self._files().get(month, [])]
+
+    def _next_path(self, month: datetime) -> str:
+        parts = self._files().get(month)
+        return self.path(month, parts[-1][0] + 1 if parts else 1)
+
+    def export(self, conn, sql: str, params=()) -> List[dict]:
+        """Stream a SELECT ordered by created_at DESC, id DESC into a new .tmp file per month.
+        Returns [{month, path, tmp, rows}]; readers see nothing until publish()"""
+        os.makedirs(self.directory, exist_ok=True)
+        written: List[dict] = []
+        f = None
+        try:
+            # Unbuffered cursor - a month of audit rows is never held in memory at once
+            with conn.cursor(pymysql.cursors.SSDictCursor) as cursor:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        month = month_start(row["created_at"])
+                        if not written or written[-1]["month"] != month:
+                            if f:
+                                f.close()
+                            path = self._next_path(month)
+                            written.append({"month": month, "path": path, "tmp": path + ".tmp", "rows": 0})
+                            f = gzip.open(path + ".tmp", "wt", encoding="utf-8")
+                        f.write(_to_json_row(row) + "\n")
+                        written[-1]["rows"] += 1
+        except BaseException:
+            if f:
+                f.close()
+            self.discard(written)
+            raise
+        if f:
+            f.close()
+        return written
+
+    def publish(self, written: List[dict]):
+        """Move exported .tmp files into place. Never replaces an archive file - raises instead."""
+        for item in written:
+            try:
+                # link() fails when the target exists, unlike rename()/replace()
+                os.link(item["tmp"], item["path"])
+            except FileExistsError:
+                raise RuntimeError(f"archive file {item['path']} already exists - refusing to overwrite it")
+            os.remove(item["tmp"])
+
+    def discard(self, written: List[dict]):
+        for item in written:
+            if os.path.exists(item["tmp"]):
+                os.remove(item["tmp"])
+
+    def read(self, month: datetime) -> Iterator[dict]:
+        """Rows of one archived month (all its files), newest first"""
+        files = [_read_file(path) for path in self.paths(month)]
+        if len(files) == 1:
+            return files[0]
+        return heapq.merge(*files, key=_row_key, reverse=True)
+
+    def _months_in_range(self, start: Optional[datetime], end: Optional[datetime]) -> List[datetime]:
+        return [month for month in self.months()
+                if (start is None or add_months(month, 1) > start) and (end is None or month < end)]
+
+    def query(self, user_id: Optional[int] = None, action: Optional[str] = None,
+              resource_type: Optional[str] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None, before: Optional[Tuple[datetime, int]] = None) -> Iterator[dict]:
+        """Matching archived rows, newest first; [start, end) on created_at.
+        before: keyset position - only rows sorting after (created_at, id), same as the MySQL page query"""
+        months_end = end
+        if before is not None:
+            # Months newer than the position hold nothing to return
+            just_after = before[0] + timedelta(microseconds=1)
+            months_end = min(end, just_after) if end else just_after
+        for month in self._months_in_range(start, months_end):
+            for row in self.read(month):
+                if before is not None and (row["created_at"], row["id"]) >= before:
+                    continue
+                if _matches(row, user_id, action, resource_type, start, end):
+                    yield row
+
+    def count(self, user_id: Optional[int] = None, action: Optional[str] = None,
+              resource_type: Optional[str] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> int:
+        total = 0
+        for month in self._months_in_range(start, end):
+            files = tuple((path, os.path.getmtime(path)) for path in self.paths(month))
+            key = (files, user_id, action, resource_type, start, end)
+            count = self._counts.get(key)
+            if count is None:
+                count = sum(1 for row in self.read(month)
+                            if _matches(row, user_id, action, resource_type, start, end))
+                if len(self._counts) >= ARCHIVE_COUNT_CACHE_SIZE:
+                    self._counts.clear()
+                self._counts[key] = count
+            total += count
+        return total
+
+
+def live_from(cursor) -> Optional[datetime]:
+    """Start of the oldest month still in MySQL (None when the table isn't partitioned)"""
+    months = [p["month"] for p in list_partitions(cursor) if p["month"] is not None]
+    return min(months) if months else None
+
+
+def archive_late_rows(conn, archive: "AuditArchive") -> Dict[str, int]:
+    """Rows back-dated into months that are already archived: export them to new files of those
+    months and delete them. Re-creating the dropped partitions would archive the months twice."""
+    cursor = conn.cursor()
+    months = archive.months()
+    partitions = [p for p in list_partitions(cursor) if p["month"] is not None]
+    if not months or not partitions:
+        return {}
+    # Only the first partition (no lower bound) can hold rows older than the newest archived month
+    source = f"FROM {AUDIT_TABLE} PARTITION ({partitions[0]['name']}) WHERE created_at < %s"
+    boundary = add_months(months[0], 1)
+    cursor.execute(f"SELECT COUNT(*) as count {source}", (boundary,))
+    late = (cursor.fetchone() or {}).get('count', 0)
+    if not late:
+        return {}
+
+    written = archive.export(conn, f"SELECT * {source} ORDER BY created_at DESC, id DESC", (boundary,))
+    try:
+        exported = sum(item["rows"] for item in written)
+        if exported != late:
+            raise RuntimeError(f"late audit rows: exported {exported} but counted {late}")
+        cursor.execute(f"DELETE {source}", (boundary,))
+        if cursor.rowcount != exported:
+            raise RuntimeError(f"late audit rows: exported {exported} but deleting {cursor.rowcount}")
+        # Files first: a failed commit leaves the rows in both places, never in neither
+        archive.publish(written)
+    except Exception:
+        conn.rollback()
+        archive.discard(written)
+        raise
+    conn.commit()
+    for item in written:
+        print(f"🗄️ Archived {item['rows']} back-dated rows -> {item['path']}")
+    return {f"{item['month']:%Y-%m}": item["rows"] for item in written}
+
+
+def _table_exists(cursor, table: str) -> bool:
+    cursor.execute('''
+        SELECT 1 FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s
+    ''', (table,))
+    return cursor.fetchone() is not None
+
+
+def archive_partition(conn, archive: "AuditArchive", name: str) -> int:
+    """Archive one partition and drop it. Returns rows archived.
+
+    The rows are first swapped out with EXCHANGE PARTITION (atomic) into a staging table nobody
+    writes to, so the export and its count check see a fixed set. A run that fails before
+    publishing resumes from the staging table. Rows inserted into the partition after the swap
+    (back-dated imports) keep it alive - checked under a table lock right before the DROP - and
+    are archived by the next run."""
+    cursor = conn.cursor()
+    staging = f"{AUDIT_TABLE}_{name}_staging"
+    if not _table_exists(cursor, staging):
+        cursor.execute(f"CREATE TABLE {staging} LIKE {AUDIT_TABLE}")
+        cursor.execute(f"ALTER TABLE {staging} REMOVE PARTITIONING")
+        cursor.execute(f"ALTER TABLE {AUDIT_TABLE} EXCHANGE PARTITION {name} WITH TABLE {staging}")
+
+    written = archive.export(conn, f"SELECT * FROM {staging} ORDER BY created_at DESC, id DESC")
+    try:
+        exported = sum(item["rows"] for item in written)
+        cursor.execute(f"SELECT COUNT(*) as count FROM {staging}")
+        staged = (cursor.fetchone() or {}).get('count', 0)
+        if staged != exported:
+            raise RuntimeError(f"{name}: exported {exported} rows but staging has {staged}")
+        archive.publish(written)
+    except Exception:
+        archive.discard(written)
+        raise
+    cursor.execute(f"DROP TABLE {staging}")
+    if written:
+        print(f"🗄️ Archived {name} ({exported} rows) -> {', '.join(item['path'] for item in written)}")
+
+    cursor.execute(f"LOCK TABLES {AUDIT_TABLE} WRITE")
+    try:
+        cursor.execute(f"SELECT COUNT(*) as count FROM {AUDIT_TABLE} PARTITION ({name})")
+        arrived = (cursor.fetchone() or {}).get('count', 0)
+        if arrived:
+            print(f"⚠️ {name}: {arrived} rows arrived during archiving - partition kept for the next run")
+        else:
+            cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DROP PARTITION {name}")
+    finally:
+        cursor.execute("UNLOCK TABLES")
+    return exported
+
+
+def apply_retention(conn, archive: "AuditArchive", today: Optional[date] = None) -> dict:
+    """Archive back-dated rows of archived months, add missing partitions, archive + drop the expired ones"""
+    cursor = conn.cursor()
+    today = today or date.today()
+    if not list_partitions(cursor):
+        return {"partitioned": False}
+
+    late = archive_late_rows(conn, archive)
+    archived_months = archive.months()
+    not_before = add_months(archived_months[0], 1) if archived_months else None
+    added = ensure_past_partitions(cursor, not_before) + ensure_future_partitions(cursor, today)
+    archived: Dict[str, int] = {}
+    if archive.retention_days is not None:
+        cutoff = datetime(today.year, today.month, today.day) - timedelta(days=archive.retention_days)
+        partitions = [p for p in list_partitions(cursor) if p["month"] is not None]
+        # Never drop the current/newest month even with a tiny retention
+        for partition in partitions[:-1]:
+            if add_months(partition["month"], 1) > cutoff:
+                break
+            archived[partition["name"]] = archive_partition(conn, archive, partition["name"])
+    return {"partitioned": True, "late": late, "added": added, "archived": archived}
+
+
+audit_archive = AuditArchive()
+
+
+def retention_job(conn) -> dict:
+    """Scheduler job body"""
+    return apply_retention(conn, audit_archive)
+
+
+def status(conn, archive: "AuditArchive") -> Tuple[List[dict], List[dict]]:
+    partitions = list_partitions(conn.cursor())
+    files = [{"month": f"{month:%Y-%m}", "path": path, "bytes": os.path.getsize(path)}
+             for month in archive.months() for path in archive.paths(month)]
+    return partitions, files
+
+
+if __name__ == "__main__":
+    from database import get_db
+    from settings import Settings
+
+    parser = argparse.ArgumentParser(description="audit_logs partitions, retention and archive")
+    parser.add_argument("command", choices=["status", "run"])
+    parser.add_argument("--retention-days", type=int, help="override Settings.audit_retention_days")
+    args = parser.parse_args()
+
+    settings = Settings()
+    audit_archive.configure(settings.audit_archive_dir,
+                            args.retention_days if args.retention_days is not None else settings.audit_retention_days)
+    with get_db() as conn:
+        if args.command == "status":
+            partitions, files = status(conn, audit_archive)
+            if not partitions:
+                print("⚠️ audit_logs is not partitioned (run migrations)")
+            for p in partitions:
+                print(f"  {p['name']:<8} ~{p['rows']} rows")
+            for f in files:
+                print(f"  📦 {f['month']}  {f['bytes']} bytes  {f['path']}")
+        else:
+            print(f"✅ {apply_retention(conn, audit_archive)}")
@@ -0,0 +1,156 @@
+"""
+Benchmark: /api/audit/logs query plans on a large audit_logs (10M rows)
+Old path (DATE() filters, COUNT over a derived table, OFFSET pages) vs half-open ranges + keyset
+
+Needs MySQL with load-test audit rows (database.py settings, scratch database):
+    python migrate.py
+    python -m benchmarks.loadtest seed --leads 2000 --history 0 --audit 10000000
+
+For each filter combination it times the count, the first page, and a page
+DEEP_OFFSET rows in (OFFSET for the old path, the cursor at that row for the
+new one), and records InnoDB handler reads - rows the server touched - which
+don't depend on cache state or machine speed.
+
+Run:
+    python benchmarks/bench_audit_logs.py
+    python benchmarks/bench_audit_logs.py --rounds 3 --deep-offset 200000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import get_db
+from routers.audit import AUDIT_KEYSET_CONDITION, _audit_filters, _where_sql
+
+PAGE_SIZE = 50
+DEEP_OFFSET = 100_000
+ROUNDS = 5
+HANDLER_READS = ("Handler_read_first", "Handler_read_key", "Handler_read_last", "Handler_read_next",
+                 "Handler_read_prev", "Handler_read_rnd", "Handler_read_rnd_next")
+
+
+def legacy_where(user_id=None, action=None, resource_type=None, date_from=None, date_to=None):
+    """WHERE clause exactly as get_audit_logs built it before"""
+    where, params = [], []
+    if user_id is not None:
+        where.append('user_id = %s')
+        params.append(user_id)
+    if action:
+        where.append('action = %s')
+        params.append(action)
+    if resource_type:
+        where.append('resource_type = %s')
+        params.append(resource_type)
+    if date_from:
+        where.append("DATE(created_at) >= DATE(%s)")
+        params.append(date_from)
+    if date_to:
+        where.append("DATE(created_at) <= DATE(%s)")
+        params.append(date_to)
+    return (' WHERE ' + ' AND '.join(where) if where else ''), params
+
+
+def handler_reads(cursor) -> int:
+    cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+    return sum(int(row['Value']) for row in cursor.fetchall() if row['Variable_name'] in HANDLER_READS)
+
+
+def status_overhead(cursor) -> int:
+    """Handler reads of the SHOW STATUS query itself (some versions count their temp table)"""
+    first = handler_reads(cursor)
+    return handler_reads(cursor) - first
+
+
+def timed(cursor, sql, params, rounds, overhead=0):
+    """(median ms, rows touched by one run)"""
+    times = []
+    touched = 0
+    for i in range(rounds):
+        before = handler_reads(cursor)
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        times.append((time.perf_counter() - started) * 1000)
+        if i == 0:
+            touched = handler_reads(cursor) - before - overhead
+    return statistics.median(times), touched
+
+
+def scenarios(cursor):
+    cursor.execute("SELECT id FROM users WHERE username = 'lt_admin_0000'")
+    row = cursor.fetchone()
+    heavy_user = row['id'] if row else 1
+    today = datetime.now().date()
+    week_ago = (today - timedelta(days=7)).isoformat()
+    return (
+        ("no filter", {}),
+        ("user_id", {"user_id": heavy_user}),
+        ("action", {"action": "update"}),
+        ("resource_type", {"resource_type": "auth"}),
+        ("action + resource_type", {"action": "delete", "resource_type": "lead"}),
+        ("last 7 days", {"date_from": week_ago, "date_to": today.isoformat()}),
+        ("user_id + last 7 days", {"user_id": heavy_user, "date_from": week_ago, "date_to": today.isoformat()}),
+    )
+
+
+def new_filters(filters):
+    start = datetime.fromisoformat(filters["date_from"]) if filters.get("date_from") else None
+    end = datetime.fromisoformat(filters["date_to"]) + timedelta(days=1) if filters.get("date_to") else None
+    return _audit_filters(filters.get("user_id"), filters.get("action"), filters.get("resource_type"), start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/api/audit/logs query benchmark")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--deep-offset", type=int, default=DEEP_OFFSET)
+    args = parser.parse_args()
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) as count FROM audit_logs")
+        print(f"🧾 audit_logs: {cursor.fetchone()['count']:,} rows, page size {PAGE_SIZE}, deep page at {args.deep_offset:,}")
+        overhead = status_overhead(cursor)
+        print(f"   {'filter':<24}{'query':<12}{'old ms':>10}{'old rows':>12}{'new ms':>10}{'new rows':>12}")
+
+        for name, filters in scenarios(cursor):
+            old_where, old_params = legacy_where(**filters)
+            where, params = new_filters(filters)
+            new_where = _where_sql(where)
+
+            # The old count selected from an unaliased derived table (a MySQL error) - alias added so it runs
+            old_count = ('SELECT COUNT(*) as count FROM (SELECT * FROM audit_logs' + old_where + ') t', old_params)
+            new_count = ('SELECT COUNT(*) as count FROM audit_logs' + new_where, params)
+            old_first = ('SELECT * FROM audit_logs' + old_where + ' ORDER BY created_at DESC LIMIT %s OFFSET %s',
+                         old_params + [PAGE_SIZE, 0])
+            new_first = ('SELECT * FROM audit_logs' + new_where + ' ORDER BY created_at DESC, id DESC LIMIT %s',
+                         params + [PAGE_SIZE + 1])
+            old_deep = (old_first[0], old_params + [PAGE_SIZE, args.deep_offset])
+
+            # Cursor for the same depth (setup, not timed)
+            cursor.execute('SELECT created_at, id FROM audit_logs' + new_where
+                           + ' ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET %s', params + [args.deep_offset - 1])
+            anchor = cursor.fetchone()
+            new_deep = None
+            if anchor:
+                deep_where = _where_sql(where + [AUDIT_KEYSET_CONDITION])
+                new_deep = ('SELECT * FROM audit_logs' + deep_where + ' ORDER BY created_at DESC, id DESC LIMIT %s',
+                            params + [anchor['created_at'], anchor['created_at'], anchor['id'], PAGE_SIZE + 1])
+
+            for label, old, new in (("count", old_count, new_count), ("first page", old_first, new_first),
+                                    ("deep page", old_deep, new_deep)):
+                old_ms, old_rows = timed(cursor, *old, args.rounds, overhead)
+                if new is None:
+                    print(f"   {name:<24}{label:<12}{old_ms:>10.1f}{old_rows:>12,}{'(fewer rows than the offset)':>22}")
+                    continue
+                new_ms, new_rows = timed(cursor, *new, args.rounds, overhead)
+                print(f"   {name:<24}{label:<12}{old_ms:>10.1f}{old_rows:>12,}{new_ms:>10.1f}{new_rows:>12,}")
+
+
+if __name__ == "__main__":
+    main()
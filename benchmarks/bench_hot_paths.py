@@ -0,0 +1,293 @@
+"""
+Microbenchmarks: pure-Python per-request hot paths
+Fixed inputs, best-of-N timing, compared against benchmarks/baselines/hot_paths.json
+
+Covers the helpers every request (or every lead update) runs: permission checks,
+default route, target period parsing, the /api/leads row post-processing,
+dict_cursor, the update_lead diff + activity descriptions, and the permission
+tree. Inputs are built once from fixed data (the real permission seed, a
+realistic lead row), so runs are comparable across commits.
+
+Baselines are machine-specific - refresh them with --save on the machine that
+runs the comparison, and commit the JSON together with the change it measures.
+
+Run:
+    python benchmarks/bench_hot_paths.py                   # compare with baselines
+    python benchmarks/bench_hot_paths.py --save            # rewrite baselines
+    python benchmarks/bench_hot_paths.py -k permission     # only matching benchmarks
+    python benchmarks/bench_hot_paths.py --max-regression 0.3
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import platform
+import statistics
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import _has_permission_in_keys, check_user_permission, dict_cursor, resolve_default_route
+from periods import _parse
+from routers.leads import (
+    LEAD_LIST_COLUMNS, activity_description, diff_lead_update, fill_lead_percentages,
+)
+from routers.permissions import build_permission_tree
+from target_progress import parse_target_period
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines" / "hot_paths.json"
+ROUNDS = 7
+MIN_ROUND_SECONDS = 0.05
+DEFAULT_MAX_REGRESSION = 0.5
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a setup function; it builds the inputs and returns the call to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# ====== Fixed inputs ======
+
+class _SeedRecorder:
+    """Collects the rows migrations/0003 would insert into permissions"""
+
+    def __init__(self):
+        self.rows = []
+
+    def execute(self, sql, args=None):
+        if sql.lstrip().startswith("INSERT INTO permissions"):
+            key, name, parent_id, category, level, description = args
+            self.rows.append({"id": len(self.rows) + 1, "permission_key": key, "permission_name": name,
+                              "parent_id": parent_id, "category": category, "level": level,
+                              "description": description})
+
+    @property
+    def lastrowid(self):
+        return len(self.rows)
+
+    def fetchone(self):
+        return {"count": len(self.rows)}
+
+
+def permission_rows() -> list:
+    """The seeded permission table, ordered like the /api/permissions/tree query"""
+    recorder = _SeedRecorder()
+    seed = importlib.import_module("migrations.0003_seed_data")
+    with contextlib.redirect_stdout(io.StringIO()):
+        seed.seed_permissions(recorder)
+    return sorted(recorder.rows, key=lambda p: (p["level"], p["parent_id"] or 0, p["permission_key"]))
+
+
+def sales_user(permission_keys: list) -> dict:
+    """Non-admin session: leads pages and fields, nothing else"""
+    return {
+        "user_id": 7, "username": "sales_rep", "role": "sales", "is_admin": False,
+        "permissions": {"can_view_leads": True, "can_create_leads": True},
+        "permission_keys": [key for key in permission_keys if key.split(".")[0] in ("leads", "add_lead")],
+    }
+
+
+def lead_row(i: int) -> dict:
+    """One SELECT l.* row, shaped like /api/leads returns it"""
+    created = datetime(2026, 1, 1, 9, 30) + timedelta(hours=i)
+    row = {column: f"{column} value {i}" for column in LEAD_LIST_COLUMNS}
+    row.update({
+        "id": i, "lead_id": f"CS{1000000001 + i:010d}", "lead_date": date(2026, 1, 1) + timedelta(days=i % 300),
+        "lead_status": ("New", "Contacted", "Qualified", "Won", "Lost")[i % 5],
+        "next_follow_up_date": date(2026, 6, 1) + timedelta(days=i % 30),
+        "approx_value": Decimal("125000.00"), "closing_amount": None, "lead_closer_date": None,
+        "lead_aging": i % 90, "lead_percentage": (0, 25, 40, 100, 0)[i % 5],
+        "created_by": 1, "assigned_to": 7, "created_at": created, "updated_at": created + timedelta(days=2),
+    })
+    return row
+
+
+STATUS_PERCENTAGES = {"New": 10, "Contacted": 25, "Qualified": 40, "Proposal Sent": 55,
+                      "Negotiation": 70, "Won": 100, "Lost": 0}
+
+PERIODS = ("monthly", "quarterly", "fiscal_yearly", "2026", "2026-Q3", "2026-03", "2026-W09",
+           "2026-03-15", "2026-01-01..2026-03-31", "FY2027", "FY2026-27", "FY2027-Q1")
+
+
+class _RowCursor:
+    """pymysql tuple cursor after execute(): description + rows"""
+
+    def __init__(self, columns, rows):
+        self.description = [(column, None, None, None, None, None, None) for column in columns]
+        self._rows = rows
+
+    def fetchall(self):
+        return self._rows
+
+
+# ====== Benchmarks ======
+
+@benchmark("permission.has_permission_in_keys")
+def bench_has_permission_in_keys():
+    keys = sales_user([p["permission_key"] for p in permission_rows()])["permission_keys"]
+    # exact hit, parent grant, child grant, miss
+    checks = ("leads.action.edit", "leads.field.view.gstin.extra", "add_lead", "control_panel.backup")
+    return lambda: [_has_permission_in_keys(permission, keys) for permission in checks]
+
+
+@benchmark("permission.check_user_permission")
+def bench_check_user_permission():
+    user = sales_user([p["permission_key"] for p in permission_rows()])
+    checks = ("can_view_leads", "can_edit_leads", "can_view_users", "leads.view_table", "users")
+    return lambda: [check_user_permission(user, permission) for permission in checks]
+
+
+@benchmark("permission.resolve_default_route")
+def bench_resolve_default_route():
+    keys = [p["permission_key"] for p in permission_rows()]
+    # Worst realistic case: a user who only has the leads screens walks past dashboard first
+    user = sales_user(keys)
+    user["permission_keys"] = [key for key in user["permission_keys"] if not key.startswith("add_lead")]
+    return lambda: resolve_default_route(user)
+
+
+@benchmark("permission.build_permission_tree")
+def bench_build_permission_tree():
+    rows = permission_rows()
+    return lambda: build_permission_tree(rows)
+
+
+@benchmark("targets.parse_target_period")
+def bench_parse_target_period():
+    return lambda: [parse_target_period(period) for period in PERIODS]
+
+
+@benchmark("targets.parse_period_uncached")
+def bench_parse_period_uncached():
+    today = date(2026, 10, 19)
+    parse = _parse.__wrapped__
+    return lambda: [parse(period, today, 4) for period in PERIODS]
+
+
+@benchmark("leads.fill_lead_percentages_page")
+def bench_fill_lead_percentages():
+    page = [lead_row(i) for i in range(100)]
+    # The loop mutates rows - time it on fresh copies of the 100-row page
+    return lambda: fill_lead_percentages([dict(row) for row in page], STATUS_PERCENTAGES)
+
+
+@benchmark("db.dict_cursor_page")
+def bench_dict_cursor():
+    columns = LEAD_LIST_COLUMNS
+    rows = [tuple(lead_row(i)[column] for column in columns) for i in range(100)]
+    return lambda: dict_cursor(_RowCursor(columns, rows)).fetchall_dict()
+
+
+@benchmark("leads.diff_lead_update")
+def bench_diff_lead_update():
+    current = lead_row(3)
+    # Full edit form: every field sent, a handful actually changed, one cleared
+    updates = {column: current[column] for column in LEAD_LIST_COLUMNS
+               if column not in ("id", "lead_id", "created_by", "created_at", "updated_at", "lead_aging")}
+    updates.update({"lead_status": "Won", "remarks": "Signed the PO", "approx_value": "130000.00",
+                    "next_follow_up_date": None, "lead_closer_date": "2026-10-19"})
+    return lambda: diff_lead_update(current, updates)
+
+
+@benchmark("leads.activity_descriptions")
+def bench_activity_descriptions():
+    details = ["lead_status: 'Qualified' -> 'Won'", "remarks: 'Call back next week' -> 'Signed the PO'",
+               "approx_value: '125000.00' -> '130000.00'", "next_follow_up_date: '2026-06-04' -> (cleared)",
+               "full_address: 'Plot 12, MIDC Area' -> 'Plot 14, MIDC Area'"]
+    return lambda: [activity_description(detail) for detail in details]
+
+
+# ====== Runner ======
+
+def measure(call: Callable[[], object]) -> dict:
+    """Best / median time per call over ROUNDS rounds of auto-sized loops"""
+    timer = timeit.Timer(call)
+    number, elapsed = timer.autorange()
+    if elapsed < MIN_ROUND_SECONDS:
+        number = max(1, int(number * MIN_ROUND_SECONDS / max(elapsed, 1e-9)))
+    per_call = [total / number for total in timer.repeat(repeat=ROUNDS, number=number)]
+    return {
+        "min_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(statistics.median(per_call) * 1e6, 3),
+        "rounds": ROUNDS,
+        "loops": number,
+    }
+
+
+def load_baselines() -> dict:
+    if not BASELINE_FILE.exists():
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f).get("benchmarks", {})
+
+
+def save_baselines(results: dict):
+    BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "meta": {
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}",
+        },
+        "benchmarks": results,
+    }
+    with open(BASELINE_FILE, "w") as f:
+        f.write(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for pure-Python hot paths")
+    parser.add_argument("-k", dest="match", help="only benchmarks whose name contains this")
+    parser.add_argument("--save", action="store_true", help="write results as the new baselines")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="fail when min time grows by more than this fraction (default 0.5)")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    results = {}
+    regressed = []
+    print(f"⏱️  {'benchmark':<38}{'min µs':>10}{'median µs':>11}{'baseline':>10}{'change':>9}")
+    for name, setup in BENCHMARKS.items():
+        if args.match and args.match not in name:
+            continue
+        results[name] = result = measure(setup())
+        base = baselines.get(name)
+        line = f"   {name:<38}{result['min_us']:>10.2f}{result['median_us']:>11.2f}"
+        if base:
+            change = (result["min_us"] - base["min_us"]) / base["min_us"]
+            flag = ""
+            if change > args.max_regression:
+                regressed.append(name)
+                flag = "  ❌"
+            line += f"{base['min_us']:>10.2f}{change:>+9.0%}{flag}"
+        else:
+            line += f"{'-':>10}{'':>9}"
+        print(line)
+
+    if args.save:
+        if args.match:
+            # Keep the baselines of benchmarks that were not run
+            results = {**baselines, **results}
+        save_baselines(results)
+        print(f"✅ Baselines saved to {BASELINE_FILE}")
+    elif regressed:
+        print(f"❌ {len(regressed)} benchmark(s) slower than baseline by more than {args.max_regression:.0%}")
+        sys.exit(1)
+    elif baselines:
+        print("✅ No regressions against baselines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: JSON encoding of a 1,000-lead /api/leads page
+Compares the old path (jsonable_encoder + stdlib json) with FastJSONResponse (orjson)
+
+Run:
+    python benchmarks/bench_json_encoding.py
+"""
+
+import sys
+import time
+import json
+import random
+from pathlib import Path
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from json_response import dumps, orjson
+
+PAGE_SIZE = 1000
+ROUNDS = 20
+
+
+def make_lead(i: int) -> dict:
+    """Synthetic leads row shaped like SELECT l.*, u1.full_name, u2.full_name"""
+    created = datetime(2025, 1, 1, 9, 30) + timedelta(hours=i)
+    return {
+        "id": i, "lead_id": f"CS{1000000001 + i:010d}", "lead_date": date(2025, 1, 1) + timedelta(days=i % 300),
+        "lead_source": random.choice(["Website", "Referral", "Cold Call", "Exhibition"]),
+        "lead_type": "Project", "lead_owner": f"Owner {i % 40}", "staff_location": "Pune",
+        "designation": "Manager", "company_name": f"Company {i} Pvt Ltd", "industry_type": "Manufacturing",
+        "system": "CCTV", "project_amc": "Project", "state": "Maharashtra", "district": "Pune", "city": "Pune",
+        "pin_code": "411001", "full_address": "Plot 12, MIDC Industrial Area, Bhosari " * 3,
+        "company_website": "https://example.com", "company_linkedin_link": None, "sub_industry": None,
+        "gstin": "27ABCDE1234F1Z5", "customer_name": f"Customer {i}", "contact_no": "9876543210",
+        "email_id": f"customer{i}@example.com", "linkedin_profile": None, "designation_customer": "Director",
+        "method_of_communication": "Email", "lead_status": random.choice(["New", "Qualified", "Won", "Lost"]),
+        "purpose_of_meeting": "Demo", "meeting_outcome": "Positive discussion " * 5,
+        "discussion_held": "Discussed pricing and timelines " * 5, "remarks": "Follow up next week " * 3,
+        "next_follow_up_date": date(2025, 6, 1) + timedelta(days=i % 30), "prospect": "Hot",
+        "approx_value": Decimal("125000.00"), "negotiated_value": Decimal("118500.50"),
+        "closing_amount": Decimal("115000.00"), "margin_percent": Decimal("12.50"),
+        "gross_margin_amount": Decimal("14375.00"), "net_margin_amount": Decimal("11000.00"),
+        "received_amount": Decimal("50000.00"), "balance_amount": Decimal("65000.00"),
+        "payment_term": "30 days", "lead_closer_date": None, "expected_lead_closer_month": "2025-07",
+        "lead_aging": i % 90, "lead_percentage": 40, "created_by": 1, "assigned_to": 2,
+        "created_at": created, "updated_at": created + timedelta(days=2),
+        "created_by_name": "Administrator", "assigned_to_name": f"Sales {i % 40}",
+    }
+
+
+def make_page() -> dict:
+    return {
+        "success": True,
+        "data": [make_lead(i) for i in range(PAGE_SIZE)],
+        "pagination": {"page": 1, "limit": PAGE_SIZE, "total": 25000, "pages": 25},
+    }
+
+
+def old_path(payload):
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def new_path(payload):
+    return dumps(payload)
+
+
+def bench(fn, payload) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    random.seed(42)
+    payload = make_page()
+    old_ms = bench(old_path, payload)
+    new_ms = bench(new_path, payload)
+    print(f"📦 {PAGE_SIZE}-lead page, best of {ROUNDS} rounds "
+          f"(encoder: {'orjson' if orjson else 'stdlib json fallback'})")
+    print(f"   jsonable_encoder + json : {old_ms:8.2f} ms  ({len(old_path(payload))} bytes)")
+    print(f"   FastJSONResponse        : {new_ms:8.2f} ms  ({len(new_path(payload))} bytes)")
+    print(f"✅ Speedup: {old_ms / new_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
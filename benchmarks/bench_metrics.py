@@ -0,0 +1,47 @@
+"""
+Benchmark: /metrics overhead - per-request observe() and a full scrape render
+Route table sized like the real app (~80 route templates x a few status codes)
+
+Run:
+    python benchmarks/bench_metrics.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from metrics import RequestMetrics, render_metrics
+
+ROUTES = 80
+OBSERVATIONS = 200_000
+ROUNDS = 20
+
+
+def main():
+    random.seed(42)
+    metrics = RequestMetrics()
+    keys = [("GET" if i % 3 else "POST", f"/api/route_{i}/{{item_id}}") for i in range(ROUTES)]
+    statuses = (200, 200, 200, 200, 401, 404, 500)
+    samples = [(random.choice(keys), random.choice(statuses), random.expovariate(20)) for _ in range(OBSERVATIONS)]
+
+    start = time.perf_counter()
+    for (method, route), status, seconds in samples:
+        metrics.observe(method, route, status, seconds, seconds / 2, 3)
+    observe_us = (time.perf_counter() - start) / OBSERVATIONS * 1e6
+
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        text = render_metrics(metrics=metrics)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"📈 {ROUTES} routes, {OBSERVATIONS} observed requests")
+    print(f"   observe() per request : {observe_us:8.2f} µs")
+    print(f"   scrape render (best)  : {best * 1000:8.2f} ms  ({len(text.splitlines())} lines, {len(text)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
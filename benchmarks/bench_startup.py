@@ -0,0 +1,73 @@
+"""
+Benchmark: cold start - import main, create_app and lifespan startup until the app can serve
+Each round runs in a fresh interpreter; fails (exit 1) when the median total exceeds the budget
+
+Run:
+    python benchmarks/bench_startup.py [--rounds 5] [--budget-ms 1500]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Regression budget for import + startup (median, milliseconds). FastAPI/pydantic imports are
+# most of it; anything blocking on the database or filesystem at startup blows through it.
+STARTUP_BUDGET_MS = 1500
+ROUNDS = 5
+
+CHILD = r"""
+import asyncio, json, os, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def enter_lifespan():
+    # Up to the point the app starts serving - background startup work is not waited for
+    await main.app.router.lifespan_context(main.app).__aenter__()
+    return time.perf_counter()
+
+t2 = asyncio.new_event_loop().run_until_complete(enter_lifespan())
+print("BENCH " + json.dumps({"import_ms": (t1 - t0) * 1000, "startup_ms": (t2 - t1) * 1000}), flush=True)
+os._exit(0)
+"""
+
+
+def run_round() -> dict:
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    # Background startup threads print too, so the marker can land mid-line
+    match = re.search(r"BENCH (\{[^}]*\})", result.stdout)
+    if match:
+        data = json.loads(match.group(1))
+        data["total_ms"] = data["import_ms"] + data["startup_ms"]
+        return data
+    raise RuntimeError(f"Startup round failed:\n{result.stdout}\n{result.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    rounds = [run_round() for _ in range(args.rounds)]
+    medians = {key: statistics.median(r[key] for r in rounds) for key in ("import_ms", "startup_ms", "total_ms")}
+
+    print(f"Cold start over {args.rounds} fresh interpreters (median)")
+    print(f"  import main + create_app : {medians['import_ms']:8.1f} ms")
+    print(f"  lifespan startup         : {medians['startup_ms']:8.1f} ms")
+    print(f"  total                    : {medians['total_ms']:8.1f} ms  (budget {args.budget_ms:.0f} ms)")
+
+    if medians["total_ms"] > args.budget_ms:
+        print("❌ Startup regression: over budget")
+        sys.exit(1)
+    print("✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()
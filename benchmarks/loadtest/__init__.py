@@ -0,0 +1,14 @@
+"""
+Load test harness for the CRM app
+Synthetic MySQL data + concurrent clients against the real FastAPI app, results as JSON
+
+Run:
+    python -m benchmarks.loadtest seed --users 50 --leads 20000 --history 100000 --audit 200000
+    python -m benchmarks.loadtest run --clients 16 --duration 30 --out results.json
+    python -m benchmarks.loadtest compare baseline.json results.json
+
+seed writes into the database configured in database.py (use a scratch
+database - it inserts users, leads, history and audit rows tagged with the
+loadtest prefix, and `seed --reset` deletes them again). run drives the app
+in-process through httpx's ASGI transport, or a running server with --base-url.
+"""
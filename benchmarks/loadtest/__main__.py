@@ -0,0 +1,76 @@
+"""
+python -m benchmarks.loadtest seed | reset | run | compare   (see __init__ for examples)
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from .driver import compare, run_load, write_report  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="CRM load test")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_cmd = commands.add_parser("seed", help="insert synthetic users / leads / history / audit rows")
+    seed_cmd.add_argument("--users", type=int, default=50)
+    seed_cmd.add_argument("--leads", type=int, default=20000)
+    seed_cmd.add_argument("--history", type=int, default=100000, help="lead_history rows")
+    seed_cmd.add_argument("--audit", type=int, default=200000, help="audit_logs rows")
+    seed_cmd.add_argument("--seed", type=int, default=42, help="random seed")
+    seed_cmd.add_argument("--reset", action="store_true", help="delete earlier load-test rows first")
+
+    commands.add_parser("reset", help="delete all load-test rows")
+
+    run_cmd = commands.add_parser("run", help="drive the app with concurrent clients")
+    run_cmd.add_argument("--clients", type=int, default=16)
+    run_cmd.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    run_cmd.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds first")
+    run_cmd.add_argument("--users", type=int, default=50, help="same value the data was seeded with")
+    run_cmd.add_argument("--base-url", help="running server (default: in-process app)")
+    run_cmd.add_argument("--out", help="write the JSON report here")
+
+    compare_cmd = commands.add_parser("compare", help="p95 / throughput deltas between two reports")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 growth (0.2 = 20%%)")
+
+    args = parser.parse_args()
+
+    if args.command in ("seed", "reset"):
+        from database import get_db
+        from .seed import reset, seed
+
+        if args.command == "reset" or args.reset:
+            with get_db() as conn:
+                print(f"🧹 Deleted: {reset(conn)}")
+        if args.command == "seed":
+            inserted = seed(users=args.users, leads=args.leads, history=args.history, audit=args.audit,
+                            seed_value=args.seed)
+            print(f"✅ Inserted: {inserted}")
+
+    elif args.command == "run":
+        report = asyncio.run(run_load(clients=args.clients, duration=args.duration, warmup=args.warmup,
+                                      users=args.users, base_url=args.base_url))
+        print(write_report(report, args.out))
+
+    elif args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        lines, regressed = compare(baseline, current, args.max_regression)
+        print("\n".join(lines))
+        if regressed:
+            print(f"❌ p95 regression over {args.max_regression:.0%}")
+            sys.exit(1)
+        print("✅ No p95 regression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Concurrent clients against the CRM app
+Har virtual client apna session rakhta hai aur weighted scenario mix chalata hai
+
+In-process mode builds the app with create_app() and talks to it through
+httpx's ASGI transport - one event loop, like one uvicorn worker, so the
+numbers include the time requests wait on each other. --base-url points the
+same clients at a running server instead (several workers, real sockets).
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .synthetic import LOADTEST_PASSWORD, SOURCES, STATUS_PERCENTAGES, make_users
+
+PERCENTILES = (50, 90, 95, 99)
+
+# (scenario, weight) - roughly what the browser does while a rep works through leads
+SCENARIO_MIX = (
+    ("lead_list", 30),
+    ("lead_search", 15),
+    ("lead_detail", 25),
+    ("lead_update", 8),
+    ("lead_create", 4),
+    ("dashboard", 12),
+    ("login", 3),
+    ("calculate_all", 1),
+)
+
+
+class VirtualClient:
+    """One logged-in user with its own cookie jar and the lead ids it has seen"""
+
+    def __init__(self, http: httpx.AsyncClient, username: str, role: str, rng: random.Random):
+        self.http = http
+        self.username = username
+        self.role = role
+        self.rng = rng
+        self.lead_ids: List[str] = []
+
+    async def login(self) -> httpx.Response:
+        return await self.http.post("/api/login", json={"username": self.username, "password": LOADTEST_PASSWORD})
+
+    async def lead_list(self) -> httpx.Response:
+        response = await self.http.get("/api/leads", params={"page": self.rng.randint(1, 5), "limit": 20})
+        if response.status_code == 200:
+            rows = response.json().get("data") or []
+            self.lead_ids = [row["lead_id"] for row in rows][:50] or self.lead_ids
+        return response
+
+    async def lead_search(self) -> httpx.Response:
+        term = self.rng.choice(("Infra", "Pharma", "Customer 1", "contact2", "Shree", "LT00000001"))
+        return await self.http.get("/api/leads", params={"search": term, "limit": 20})
+
+    async def lead_detail(self) -> httpx.Response:
+        if not self.lead_ids:
+            return await self.lead_list()
+        return await self.http.get(f"/api/leads/{self.rng.choice(self.lead_ids)}")
+
+    async def lead_update(self) -> httpx.Response:
+        if not self.lead_ids:
+            return await self.lead_list()
+        status = self.rng.choice(tuple(STATUS_PERCENTAGES))
+        return await self.http.put(f"/api/leads/{self.rng.choice(self.lead_ids)}", json={
+            "lead_status": status,
+            "remarks": f"Load test update {self.rng.randrange(10 ** 6)}",
+            "next_follow_up_date": date.today().isoformat(),
+        })
+
+    async def lead_create(self) -> httpx.Response:
+        n = self.rng.randrange(10 ** 6)
+        return await self.http.post("/api/leads", json={
+            "lead_date": date.today().isoformat(),
+            "lead_source": self.rng.choice(SOURCES)[0],
+            "lead_type": "Project",
+            "lead_status": "New",
+            "designation": "Sales Executive",
+            "company_name": f"Loadtest Company {n}",
+            "industry_type": "Manufacturing",
+            "system": "CCTV",
+            "project_amc": "Project",
+            "state": "Maharashtra",
+            "district": "Pune",
+            "city": "Pune",
+            "pin_code": "411001",
+            "full_address": "Plot 1, MIDC Area, Pune",
+            "customer_name": f"Loadtest Customer {n}",
+            "contact_no": "9876543210",
+            "email_id": f"loadtest{n}@example.com",
+        })
+
+    async def dashboard(self) -> httpx.Response:
+        return await self.http.get("/dashboard")
+
+    async def calculate_all(self) -> httpx.Response:
+        return await self.http.post("/api/targets/calculate-all")
+
+    def scenarios(self) -> List[Tuple[str, int]]:
+        # calculate-all is an admin action
+        return [(name, weight) for name, weight in SCENARIO_MIX if name != "calculate_all" or self.role == "admin"]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, scenario: str, seconds: float, status: Optional[int]):
+        self.latencies[scenario].append(seconds)
+        if status is None or status >= 400:
+            self.errors[scenario] += 1
+        self.statuses[scenario][status or 0] += 1
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict:
+    def stats(values: List[float], errors: int, statuses: Optional[Dict[int, int]] = None) -> Dict:
+        ordered = sorted(values)
+        entry = {
+            "count": len(values),
+            "errors": errors,
+            "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+            **{f"p{pct}_ms": round(_percentile(ordered, pct) * 1000, 2) for pct in PERCENTILES},
+            "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        }
+        if statuses is not None:
+            entry["statuses"] = {str(code): count for code, count in sorted(statuses.items())}
+        return entry
+
+    everything = [value for values in recorder.latencies.values() for value in values]
+    return {
+        "overall": stats(everything, sum(recorder.errors.values())),
+        "scenarios": {
+            name: stats(values, recorder.errors[name], recorder.statuses[name])
+            for name, values in sorted(recorder.latencies.items())
+        },
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def _client_loop(client: VirtualClient, recorder: Recorder, deadline: float, measure_from: float):
+    names, weights = zip(*client.scenarios())
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            return
+        scenario = client.rng.choices(names, weights=weights)[0]
+        started = time.perf_counter()
+        status = None
+        try:
+            response = await getattr(client, scenario)()
+            status = response.status_code
+        except httpx.HTTPError:
+            pass
+        if started >= measure_from:
+            recorder.record(scenario, time.perf_counter() - started, status)
+
+
+def _transport(base_url: Optional[str]) -> Tuple[httpx.AsyncBaseTransport, str]:
+    if base_url:
+        return httpx.AsyncHTTPTransport(), base_url
+    from app_factory import create_app
+    from settings import Settings
+
+    app = create_app(Settings(db_init="off", scheduler_enabled=False, prepare_static_assets=False,
+                              request_log_threshold_ms=None))
+    return httpx.ASGITransport(app=app), "http://loadtest"
+
+
+async def run_load(clients: int = 16, duration: float = 30.0, warmup: float = 5.0, users: int = 50,
+                   base_url: Optional[str] = None, seed_value: int = 7,
+                   client_factory: Optional[Callable] = None) -> Dict:
+    """Log every client in, run the mix for warmup + duration seconds, return the JSON report"""
+    transport, url = _transport(base_url)
+    accounts = [user for user in make_users(users, random.Random(0)) if user["role"] != "admin"]
+    admin = next(user for user in make_users(users, random.Random(0)) if user["role"] == "admin")
+    recorder = Recorder()
+
+    async with httpx.AsyncClient(transport=transport, base_url=url) as probe:
+        await probe.get("/api/health")
+
+    http_clients = [httpx.AsyncClient(transport=transport, base_url=url, timeout=60.0) for _ in range(clients)]
+    try:
+        virtual = []
+        for i, http in enumerate(http_clients):
+            # First client is the admin (the only one allowed to run calculate-all)
+            account = admin if i == 0 else accounts[(i - 1) % len(accounts)]
+            client = (client_factory or VirtualClient)(http, account["username"], account["role"],
+                                                        random.Random(seed_value + i))
+            response = await client.login()
+            if response.status_code != 200:
+                raise RuntimeError(f"Login failed for {account['username']}: {response.status_code} {response.text[:200]}")
+            await client.lead_list()
+            virtual.append(client)
+
+        start = time.perf_counter()
+        measure_from = start + warmup
+        deadline = measure_from + duration
+        await asyncio.gather(*(_client_loop(client, recorder, deadline, measure_from) for client in virtual))
+        elapsed = time.perf_counter() - measure_from
+    finally:
+        await asyncio.gather(*(http.aclose() for http in http_clients))
+
+    return {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "mode": "http" if base_url else "in-process",
+            "base_url": base_url,
+            "clients": clients,
+            "duration_s": duration,
+            "warmup_s": warmup,
+            "scenario_mix": dict(SCENARIO_MIX),
+        },
+        **summarize(recorder, elapsed),
+    }
+
+
+def compare(baseline: Dict, current: Dict, max_regression: float = 0.2) -> Tuple[List[str], bool]:
+    """Per-scenario p95 / throughput deltas; regressed when p95 grows by more than max_regression"""
+    lines = [f"{'scenario':<16}{'p95 base':>11}{'p95 now':>11}{'change':>9}{'rps base':>10}{'rps now':>10}"]
+    regressed = False
+    names = sorted(set(baseline.get("scenarios", {})) | set(current.get("scenarios", {})))
+    for name in names + ["overall"]:
+        base = baseline["overall"] if name == "overall" else baseline.get("scenarios", {}).get(name)
+        now = current["overall"] if name == "overall" else current.get("scenarios", {}).get(name)
+        if not base or not now:
+            lines.append(f"{name:<16}  (only in one report)")
+            continue
+        change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        flag = ""
+        if change > max_regression:
+            regressed = True
+            flag = "  ❌"
+        lines.append(f"{name:<16}{base['p95_ms']:>9.1f}ms{now['p95_ms']:>9.1f}ms{change:>+8.0%}"
+                     f"{base['rps']:>10.1f}{now['rps']:>10.1f}{flag}")
+    return lines, regressed
+
+
+def write_report(report: Dict, path: Optional[str]):
+    text = json.dumps(report, indent=2)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    return text
@@ -0,0 +1,166 @@
+"""
+Seed MySQL with synthetic load-test data
+Users / leads / history / audit rows multi-row INSERTs mein, batch by batch commit
+
+All rows are tagged (usernames start with lt_, lead ids with LT) so reset()
+can remove them without touching real data. Run against a scratch database.
+"""
+
+import random
+from datetime import datetime
+from typing import Dict, List, Sequence
+
+from database import get_db
+from core import hash_password, init_database
+from audit_archive import ensure_past_partitions
+from lead_facts import backfill_lead_daily_facts
+
+from .synthetic import (
+    AUDIT_COLUMNS, HISTORY_COLUMNS, LEAD_COLUMNS, LOADTEST_LEAD_PREFIX, LOADTEST_PASSWORD, LOADTEST_PREFIX,
+    STATUS_HISTORY_COLUMNS, make_audit_rows, make_history, make_leads, make_users,
+)
+
+BATCH_SIZE = 2000
+
+TARGET_TEMPLATES = (
+    ("Monthly deals", "deals", 20, "monthly"),
+    ("Quarterly revenue", "revenue", 2500000, "quarterly"),
+    ("Monthly follow-ups", "units", 60, "monthly"),
+    ("Yearly conversion", "conversion", 25, "fiscal_yearly"),
+)
+
+
+def _insert_rows(cursor, table: str, columns: Sequence[str], rows: List[Dict]):
+    if not rows:
+        return
+    column_sql = ", ".join(f"`{column}`" for column in columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    # executemany turns this into multi-row INSERTs
+    cursor.executemany(f"INSERT INTO {table} ({column_sql}) VALUES ({placeholders})",
+                       [tuple(row[column] for column in columns) for row in rows])
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("_", "\\_") + "%"
+
+
+def reset(conn) -> dict:
+    """Delete every load-test row"""
+    cursor = conn.cursor()
+    lead_like = _like_prefix(LOADTEST_LEAD_PREFIX)
+    user_like = _like_prefix(LOADTEST_PREFIX)
+    cursor.execute("SELECT id FROM users WHERE username LIKE %s", (user_like,))
+    user_ids = [row["id"] for row in cursor.fetchall() or []]
+    deleted = {}
+    for table, column in (("lead_history", "lead_id"), ("lead_status_history", "lead_id"),
+                          ("lead_activities", "lead_id"), ("leads", "lead_id")):
+        deleted[table] = cursor.execute(f"DELETE FROM {table} WHERE {column} LIKE %s", (lead_like,))
+    if user_ids:
+        user_in = ", ".join(["%s"] * len(user_ids))
+        # Rows written by the load run itself (leads created through the API get normal ids)
+        for table, column in (("lead_history", "changed_by"), ("lead_status_history", "changed_by"),
+                              ("lead_activities", "performed_by"), ("audit_logs", "user_id"),
+                              ("leads", "created_by"), ("leads", "assigned_to"), ("targets", "assigned_to"),
+                              ("lead_daily_facts", "user_id"), ("user_permissions", "user_id")):
+            deleted[table] = deleted.get(table, 0) + cursor.execute(
+                f"DELETE FROM {table} WHERE {column} IN ({user_in})", user_ids)
+        deleted["users"] = cursor.execute(f"DELETE FROM users WHERE id IN ({user_in})", user_ids)
+    conn.commit()
+    return deleted
+
+
+def _insert_users(cursor, count: int, rng: random.Random) -> List[Dict]:
+    users = make_users(count, rng)
+    password = hash_password(LOADTEST_PASSWORD)
+    for user in users:
+        cursor.execute('''
+            INSERT IGNORE INTO users (username, password, first_name, last_name, full_name, email,
+                                      designation, role, permissions, is_active)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, 1)
+        ''', (user["username"], password, user["first_name"], user["last_name"], user["full_name"],
+              user["email"], user["designation"], user["role"], "{}"))
+    cursor.execute("SELECT id, username, full_name, designation, role FROM users WHERE username LIKE %s ORDER BY id",
+                   (_like_prefix(LOADTEST_PREFIX),))
+    rows = cursor.fetchall() or []
+    # Every load-test user can use every screen; row scoping still follows the role
+    cursor.execute('''
+        INSERT IGNORE INTO user_permissions (user_id, permission_id, granted, granted_by)
+        SELECT u.id, p.id, 1, u.id
+        FROM users u CROSS JOIN permissions p
+        WHERE u.username LIKE %s
+    ''', (_like_prefix(LOADTEST_PREFIX),))
+    return rows
+
+
+def _insert_targets(cursor, users: List[Dict]):
+    rows = []
+    for user in users:
+        if user["role"] == "admin":
+            continue
+        for name, target_type, value, period in TARGET_TEMPLATES:
+            rows.append((f"{name} - {user['full_name']}", target_type, value, user["id"], period, user["id"]))
+    if rows:
+        cursor.executemany('''
+            INSERT INTO targets (name, type, target_value, assigned_to, period, created_by)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        ''', rows)
+
+
+def _next_lead_number(cursor) -> int:
+    cursor.execute("SELECT MAX(lead_id) as last_id FROM leads WHERE lead_id LIKE %s",
+                   (_like_prefix(LOADTEST_LEAD_PREFIX),))
+    row = cursor.fetchone() or {}
+    return int(row["last_id"][len(LOADTEST_LEAD_PREFIX):]) + 1 if row.get("last_id") else 1
+
+
+def seed(users: int = 50, leads: int = 20000, history: int = 100000, audit: int = 200000,
+         seed_value: int = 42, batch_size: int = BATCH_SIZE, refresh_facts: bool = True) -> dict:
+    """Insert the requested volumes (on top of any earlier load-test rows)"""
+    rng = random.Random(seed_value)
+    now = datetime.now().replace(microsecond=0)
+    init_database()
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        user_rows = _insert_users(cursor, users, rng)
+        cursor.execute("SELECT COUNT(*) as count FROM targets WHERE assigned_to = %s", (user_rows[-1]["id"],))
+        if not (cursor.fetchone() or {}).get("count"):
+            _insert_targets(cursor, user_rows)
+        conn.commit()
+        print(f"✅ {len(user_rows)} load-test users (password: {LOADTEST_PASSWORD})")
+
+        start = _next_lead_number(cursor)
+        lead_ids: List[str] = []
+        inserted = {"leads": 0, "lead_history": 0, "lead_status_history": 0, "audit_logs": 0}
+        for offset in range(0, leads, batch_size):
+            batch = list(make_leads(min(batch_size, leads - offset), user_rows, rng, now, start + offset))
+            # Spread the history budget over the lead batches
+            history_budget = history * (offset + len(batch)) // leads - inserted["lead_history"]
+            history_rows, status_rows = make_history(batch, history_budget, rng, now)
+            _insert_rows(cursor, "leads", LEAD_COLUMNS, batch)
+            _insert_rows(cursor, "lead_history", HISTORY_COLUMNS, history_rows)
+            _insert_rows(cursor, "lead_status_history", STATUS_HISTORY_COLUMNS, status_rows)
+            conn.commit()
+            inserted["leads"] += len(batch)
+            inserted["lead_history"] += len(history_rows)
+            inserted["lead_status_history"] += len(status_rows)
+            lead_ids.extend(lead["lead_id"] for lead in batch)
+            print(f"  leads {inserted['leads']}/{leads}, history {inserted['lead_history']}")
+
+        audit_rows = make_audit_rows(audit, user_rows, lead_ids, rng, now)
+        for offset in range(0, audit, batch_size):
+            batch = [next(audit_rows) for _ in range(min(batch_size, audit - offset))]
+            _insert_rows(cursor, "audit_logs", AUDIT_COLUMNS, batch)
+            conn.commit()
+            inserted["audit_logs"] += len(batch)
+        print(f"  audit rows {inserted['audit_logs']}")
+        if inserted["audit_logs"]:
+            # Back-dated audit rows all landed in the first monthly partition - spread them out
+            split = ensure_past_partitions(cursor)
+            if split:
+                print(f"  audit_logs partitions added: {len(split)}")
+
+        if refresh_facts and inserted["lead_history"]:
+            # Target progress reads lead_daily_facts - rebuild it for the new history
+            backfill_lead_daily_facts(conn)
+    return inserted
@@ -0,0 +1,207 @@
+"""
+Synthetic CRM data with realistic shape
+Skewed owners (a few reps carry most leads), a status funnel, weighted sources,
+recent-heavy dates. Everything comes from one seeded Random, so the same
+arguments always produce the same rows.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+LOADTEST_PREFIX = "lt_"          # usernames
+LOADTEST_LEAD_PREFIX = "LT"      # lead_id prefix, never produced by generate_lead_id defaults
+LOADTEST_PASSWORD = "loadtest123"
+
+# Open statuses every lead walks through in order
+STATUS_FUNNEL = ("New", "Contacted", "Qualified", "Proposal Sent", "Negotiation")
+# (current status, share of leads in it)
+FINAL_STATUSES = (
+    ("New", 0.22), ("Contacted", 0.20), ("Qualified", 0.14), ("Proposal Sent", 0.10),
+    ("Negotiation", 0.07), ("Won", 0.12), ("Lost", 0.15),
+)
+SOURCES = (
+    ("Website", 0.30), ("Referral", 0.22), ("Cold Call", 0.15), ("Exhibition", 0.10),
+    ("LinkedIn", 0.10), ("Email Campaign", 0.08), ("Partner", 0.05),
+)
+LEAD_TYPES = (("Project", 0.6), ("AMC", 0.25), ("Service", 0.15))
+SYSTEMS = (("CCTV", 0.35), ("Access Control", 0.2), ("Fire Alarm", 0.2), ("Networking", 0.15), ("Intrusion", 0.1))
+COMMUNICATION = (("Email", 0.4), ("Phone", 0.35), ("Meeting", 0.15), ("WhatsApp", 0.1))
+INDUSTRIES = ("Manufacturing", "Healthcare", "Education", "Retail", "Banking", "Hospitality", "IT", "Logistics")
+CITIES = (
+    ("Pune", "Pune", "Maharashtra", "411001"), ("Mumbai", "Mumbai", "Maharashtra", "400001"),
+    ("Nashik", "Nashik", "Maharashtra", "422001"), ("Bengaluru", "Bengaluru Urban", "Karnataka", "560001"),
+    ("Hyderabad", "Hyderabad", "Telangana", "500001"), ("Ahmedabad", "Ahmedabad", "Gujarat", "380001"),
+    ("Chennai", "Chennai", "Tamil Nadu", "600001"), ("Delhi", "New Delhi", "Delhi", "110001"),
+)
+AUDIT_ACTIONS = (
+    ("view", "lead", 0.55), ("view", "dashboard", 0.12), ("update", "lead", 0.14), ("create", "lead", 0.07),
+    ("login", "auth", 0.06), ("logout", "auth", 0.03), ("delete", "lead", 0.01), ("view", "users", 0.02),
+)
+
+LEAD_COLUMNS = (
+    "lead_id", "lead_date", "lead_source", "lead_type", "lead_owner", "staff_location", "designation",
+    "company_name", "industry_type", "system", "project_amc", "state", "district", "city", "pin_code",
+    "full_address", "customer_name", "contact_no", "email_id", "method_of_communication", "lead_status",
+    "next_follow_up_date", "approx_value", "closing_amount", "lead_percentage", "remarks",
+    "created_by", "assigned_to", "created_at", "updated_at",
+)
+HISTORY_COLUMNS = ("lead_id", "field_name", "old_value", "new_value", "changed_by", "changed_at")
+STATUS_HISTORY_COLUMNS = ("lead_id", "old_status", "new_status", "remarks", "changed_by", "changed_at")
+AUDIT_COLUMNS = (
+    "user_id", "username", "action", "resource_type", "resource_id", "method", "path",
+    "ip_address", "user_agent", "status_code", "success", "details", "session_token", "description", "created_at",
+)
+
+STATUS_PERCENTAGES = {"New": 10, "Contacted": 25, "Qualified": 40, "Proposal Sent": 55,
+                      "Negotiation": 70, "Won": 100, "Lost": 0}
+
+
+def _weighted(rng: random.Random, options: Sequence[Tuple]) -> Tuple:
+    return rng.choices(options, weights=[option[-1] for option in options])[0]
+
+
+def _recent_datetime(rng: random.Random, now: datetime, days: int) -> datetime:
+    # Exponential age - most activity is recent, with a long tail
+    age = min(rng.expovariate(3.0 / days), days)
+    return now - timedelta(days=age, seconds=rng.randrange(86400))
+
+
+def owner_weights(count: int, skew: float = 0.9) -> List[float]:
+    """Zipf-like: rep #1 gets the most leads, the long tail few"""
+    return [1.0 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def make_users(count: int, rng: random.Random) -> List[Dict]:
+    """One admin, a couple of managers, the rest sales reps"""
+    users = []
+    for i in range(count):
+        role = "admin" if i == 0 else ("manager" if i <= max(1, count // 20) else "sales")
+        first = rng.choice(("Amit", "Priya", "Rahul", "Sneha", "Vikram", "Anjali", "Rohan", "Kavya", "Arjun", "Neha"))
+        last = rng.choice(("Patil", "Sharma", "Deshmukh", "Iyer", "Reddy", "Kulkarni", "Shah", "Gupta", "Nair"))
+        users.append({
+            "username": f"{LOADTEST_PREFIX}{role}_{i:04d}",
+            "first_name": first,
+            "last_name": last,
+            "full_name": f"{first} {last}",
+            "email": f"{LOADTEST_PREFIX}{i:04d}@loadtest.local",
+            "designation": {"admin": "Administrator", "manager": "Sales Manager"}.get(role, "Sales Executive"),
+            "role": role,
+        })
+    return users
+
+
+def make_leads(count: int, users: List[Dict], rng: random.Random, now: datetime,
+               start_number: int = 1) -> Iterator[Dict]:
+    """users need 'id' and 'full_name' (rows as inserted)"""
+    reps = [user for user in users if user["role"] != "admin"] or users
+    weights = owner_weights(len(reps))
+    for n in range(start_number, start_number + count):
+        owner = rng.choices(reps, weights=weights)[0]
+        created = _recent_datetime(rng, now, 540)
+        status = _weighted(rng, FINAL_STATUSES)[0]
+        city, district, state, pin = rng.choice(CITIES)
+        approx = round(rng.lognormvariate(12, 0.8), -2)
+        company = f"{rng.choice(('Shree', 'Apex', 'Sai', 'Global', 'Metro', 'Prime', 'Nova'))} " \
+                  f"{rng.choice(('Industries', 'Infra', 'Pharma', 'Logistics', 'Foods', 'Textiles'))} {n}"
+        follow_up = None
+        if status not in ("Won", "Lost"):
+            follow_up = (now + timedelta(days=rng.randint(-20, 30))).date()
+        yield {
+            "lead_id": f"{LOADTEST_LEAD_PREFIX}{n:010d}",
+            "lead_date": created.date(),
+            "lead_source": _weighted(rng, SOURCES)[0],
+            "lead_type": _weighted(rng, LEAD_TYPES)[0],
+            "lead_owner": owner["full_name"],
+            "staff_location": city,
+            "designation": owner.get("designation") or "Sales Executive",
+            "company_name": company,
+            "industry_type": rng.choice(INDUSTRIES),
+            "system": _weighted(rng, SYSTEMS)[0],
+            "project_amc": rng.choice(("Project", "AMC")),
+            "state": state,
+            "district": district,
+            "city": city,
+            "pin_code": pin,
+            "full_address": f"Plot {rng.randint(1, 400)}, MIDC Area, {city}",
+            "customer_name": f"Customer {n}",
+            "contact_no": f"9{rng.randrange(10 ** 9):09d}",
+            "email_id": f"contact{n}@example.com",
+            "method_of_communication": _weighted(rng, COMMUNICATION)[0],
+            "lead_status": status,
+            "next_follow_up_date": follow_up,
+            "approx_value": approx,
+            "closing_amount": round(approx * rng.uniform(0.8, 1.0), 2) if status == "Won" else None,
+            "lead_percentage": STATUS_PERCENTAGES[status],
+            "remarks": rng.choice(("Interested", "Call back next week", "Budget pending", "Sent quotation", "")),
+            "created_by": owner["id"],
+            "assigned_to": owner["id"],
+            "created_at": created,
+            "updated_at": min(now, created + timedelta(days=rng.randint(0, 60))),
+        }
+
+
+def status_path(final_status: str) -> List[str]:
+    """Statuses a lead went through to reach final_status"""
+    if final_status in STATUS_FUNNEL:
+        return list(STATUS_FUNNEL[:STATUS_FUNNEL.index(final_status) + 1])
+    if final_status == "Won":
+        return list(STATUS_FUNNEL) + ["Won"]
+    return list(STATUS_FUNNEL[:3]) + [final_status]
+
+
+def make_history(leads: List[Dict], count: int, rng: random.Random, now: datetime
+                 ) -> Tuple[List[Dict], List[Dict]]:
+    """lead_history + lead_status_history rows consistent with each lead's current status.
+    Funnel steps come first; the rest of `count` is filled with follow-up / remarks edits."""
+    history, status_history = [], []
+    for lead in leads:
+        if len(history) >= count:
+            break
+        when = lead["created_at"]
+        user = lead["assigned_to"]
+        for field in ("lead_source", "method_of_communication"):
+            history.append({"lead_id": lead["lead_id"], "field_name": field, "old_value": None,
+                            "new_value": lead[field], "changed_by": user, "changed_at": when})
+        previous = None
+        for status in status_path(lead["lead_status"]):
+            history.append({"lead_id": lead["lead_id"], "field_name": "lead_status", "old_value": previous,
+                            "new_value": status, "changed_by": user, "changed_at": when})
+            status_history.append({"lead_id": lead["lead_id"], "old_status": previous, "new_status": status,
+                                   "remarks": None, "changed_by": user, "changed_at": when})
+            previous = status
+            when = min(now, when + timedelta(days=rng.randint(1, 14), seconds=rng.randrange(86400)))
+        if lead["closing_amount"] is not None:
+            history.append({"lead_id": lead["lead_id"], "field_name": "closing_amount", "old_value": None,
+                            "new_value": str(lead["closing_amount"]), "changed_by": user, "changed_at": when})
+
+    while len(history) < count and leads:
+        lead = rng.choice(leads)
+        field = rng.choice(("remarks", "next_follow_up_date", "approx_value"))
+        value = {"remarks": "Followed up", "approx_value": str(lead["approx_value"]),
+                 "next_follow_up_date": str((now + timedelta(days=rng.randint(1, 30))).date())}[field]
+        history.append({"lead_id": lead["lead_id"], "field_name": field, "old_value": None, "new_value": value,
+                        "changed_by": lead["assigned_to"],
+                        "changed_at": max(lead["created_at"], _recent_datetime(rng, now, 180))})
+    return history[:count], status_history
+
+
+def make_audit_rows(count: int, users: List[Dict], lead_ids: List[str], rng: random.Random,
+                    now: datetime) -> Iterator[Dict]:
+    weights = owner_weights(len(users), skew=0.6)
+    for _ in range(count):
+        user = rng.choices(users, weights=weights)[0]
+        action, resource_type, _share = _weighted(rng, AUDIT_ACTIONS)
+        resource_id = rng.choice(lead_ids) if resource_type == "lead" and lead_ids else "-"
+        method = {"view": "GET", "create": "POST", "update": "PUT", "delete": "DELETE"}.get(action, "POST")
+        success = rng.random() > 0.02
+        yield {
+            "user_id": user["id"], "username": user["username"], "action": action,
+            "resource_type": resource_type, "resource_id": resource_id, "method": method,
+            "path": f"/api/leads/{resource_id}" if resource_type == "lead" else f"/api/{resource_type}",
+            "ip_address": f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+            "user_agent": "Mozilla/5.0 (loadtest)", "status_code": 200 if success else 403,
+            "success": 1 if success else 0, "details": f"{action} {resource_type}",
+            "session_token": "-", "description": "-",
+            "created_at": _recent_datetime(rng, now, 365),
+        }
@@ -0,0 +1,256 @@
+"""
+Response compression for the CRM app
+gzip / brotli middleware plus pre-compressed static assets
+
+brotli is optional - without the `brotli` package only gzip is used.
+"""
+
+import os
+import stat
+import zlib
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Already-compressed or streaming formats - compressing again only burns CPU
+DEFAULT_EXCLUDED_CONTENT_TYPES = (
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/octet-stream",
+    "text/event-stream",
+    "font/woff",
+    "font/woff2",
+    "image/*",
+    "audio/*",
+    "video/*",
+)
+
+# Static file types worth pre-compressing
+PRECOMPRESS_EXTENSIONS = (".css", ".js", ".html", ".svg", ".json", ".txt", ".map")
+
+# Encoding name -> file suffix for pre-compressed static variants
+STATIC_VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str, available: Tuple[str, ...] = None) -> Optional[str]:
+    """Pick the best encoding the client accepts (brotli preferred over gzip)"""
+    if not accept_encoding:
+        return None
+    available = available or supported_encodings()
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    """Streaming compressor with one interface for gzip and brotli"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + (self._gz.flush() if final else self._gz.flush(zlib.Z_SYNC_FLUSH))
+
+
+class CompressionMiddleware:
+    """gzip/brotli response compression with a minimum-size threshold
+
+    Responses that already carry Content-Encoding (pre-compressed static
+    files), partial content, bodiless statuses and excluded content types
+    (PDF reports, images, archives) pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        exclude_content_types: Tuple[str, ...] = DEFAULT_EXCLUDED_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_content_types = tuple(ct.lower() for ct in exclude_content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def is_excluded(self, content_type: str) -> bool:
+        media_type = content_type.partition(";")[0].strip().lower()
+        if not media_type:
+            return True
+        return (
+            media_type in self.exclude_content_types
+            or media_type.partition("/")[0] + "/*" in self.exclude_content_types
+        )
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.started = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or self.middleware.is_excluded(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.downstream(message)
+            else:
+                # Hold headers until the first body chunk decides compress / skip
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            if self.start_message is not None and not self.started:
+                self.started = True
+                await self.downstream(self.start_message)
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body and len(body) < self.middleware.minimum_size:
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+
+            self.compressor = _Compressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            body = await self._compress(body, final=not more_body)
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self.downstream(self.start_message)
+            await self.downstream({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        if self.compressor is None:
+            await self.downstream(message)
+            return
+        body = await self._compress(body, final=not more_body)
+        await self.downstream({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        # Big payloads (lead exports) are compressed off the event loop
+        if len(body) >= 256 * 1024:
+            return await anyio.to_thread.run_sync(self.compressor.compress, body, final)
+        return self.compressor.compress(body, final)
+
+
+def precompress_static_assets(directory: str, minimum_size: int = 1024, gzip_level: int = 9,
+                              brotli_quality: int = 11) -> int:
+    """Write .gz / .br siblings for static assets that are missing or stale.
+    Returns number of variant files written."""
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            source_stat = os.stat(source)
+            if source_stat.st_size < minimum_size:
+                continue
+
+            data = None
+            for encoding, suffix in STATIC_VARIANTS:
+                if encoding not in supported_encodings():
+                    continue
+                target = source + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime >= source_stat.st_mtime:
+                    continue
+                if data is None:
+                    with open(source, "rb") as f:
+                        data = f.read()
+                if encoding == "br":
+                    compressed = brotli.compress(data, quality=brotli_quality)
+                else:
+                    compressed = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                    compressed = compressed.compress(data) + compressed.flush()
+                with open(target, "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves file.br / file.gz when the client accepts it"""
+
+    async def get_response(self, path: str, scope: Scope):
+        if scope["method"] in ("GET", "HEAD") and path.endswith(PRECOMPRESS_EXTENSIONS):
+            accept = Headers(scope=scope).get("accept-encoding", "")
+            for variant_encoding, suffix in STATIC_VARIANTS:
+                if choose_encoding(accept, (variant_encoding,)) is None:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    response = self.file_response(full_path, stat_result, scope)
+                    response.headers["Content-Encoding"] = variant_encoding
+                    response.headers["Vary"] = "Accept-Encoding"
+                    return response
+        return await super().get_response(path, scope)
@@ -0,0 +1,479 @@
+"""
+Shared request-time helpers
+DB connection, sessions, audit logging, current user / permission checks, templates
+"""
+
+import hashlib
+import json
+import secrets
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Request, status
+
+from database import get_db
+from migrate import run_migrations
+
+# MySQL ke liye get_db_connection wrapper
+def get_db_connection():
+    """MySQL database connection return karta hai"""
+    return get_db()
+
+def dict_cursor(cursor):
+    """MySQL cursor ko dict-like results return karwane ke liye helper"""
+    columns = [col[0] for col in cursor.description] if cursor.description else []
+    
+    def fetchall_dict():
+        rows = cursor.fetchall()
+        return [dict(zip(columns, row)) for row in rows] if rows else []
+    
+    def fetchone_dict():
+        row = cursor.fetchone()
+        return dict(zip(columns, row)) if row else None
+    
+    cursor.fetchall_dict = fetchall_dict
+    cursor.fetchone_dict = fetchone_dict
+    return cursor
+
+# Session management
+sessions = {}
+SESSION_TIMEOUT = 3600  # 1 hour in seconds
+
+# Helper functions
+def generate_session_token():
+    return secrets.token_urlsafe(32)
+
+def create_session(user_id: int, username: str, role: str, permissions: Dict):
+    session_token = generate_session_token()
+    session_data = {
+        "user_id": user_id,
+        "username": username,
+        "role": role,
+        "permissions": permissions,
+        "created_at": datetime.now(),
+        "last_activity": datetime.now()
+    }
+    sessions[session_token] = session_data
+    return session_token
+
+def validate_session_token(session_token: str) -> Optional[Dict]:
+    if session_token not in sessions:
+        return None
+    
+    session_data = sessions[session_token]
+    
+    # Check session timeout
+    last_activity = session_data["last_activity"]
+    if (datetime.now() - last_activity).seconds > SESSION_TIMEOUT:
+        del sessions[session_token]
+        return None
+    
+    # Update last activity
+    session_data["last_activity"] = datetime.now()
+    sessions[session_token] = session_data
+    
+    return session_data
+
+def logout_session(session_token: str):
+    if session_token in sessions:
+        del sessions[session_token]
+    return True
+
+def log_user_activity(
+    request: Optional[Request],
+    user_id: Optional[int],
+    username: Optional[str],
+    action: str,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    success: bool = True,
+    status_code: Optional[int] = None,
+    details: Optional[str] = None,
+    session_token: Optional[str] = None,
+    description: Optional[str] = None,
+):
+    """Persist a user activity audit record.
+
+    Parameters:
+    - request: FastAPI Request to capture path, method, IP, UA (optional)
+    - user_id/username: actor identifiers (nullable for unauthenticated events)
+    - action: verb like 'login', 'logout', 'create', 'update', 'delete', 'view'
+    - resource_type/resource_id: target of the action, e.g., 'lead', 'user'
+    - success/status_code: outcome details
+    - details: short free-text/context payload
+    - session_token: current session id if available
+    """
+
+    path = None
+    method = None
+    ip_address = None
+    user_agent = None
+
+    try:
+        if request is not None:
+            path = str(request.url.path)
+            method = request.method
+            # Best-effort IP capture
+            ip_address = request.headers.get("x-forwarded-for") or request.client.host if request.client else None
+            user_agent = request.headers.get("user-agent")
+    except Exception:
+        # Avoid blocking core flows due to audit capture errors
+        pass
+
+
+    def safe(val, default='N/A', int_field=False):
+        if int_field:
+            if val is None or val == '' or (isinstance(val, str) and not val.isdigit()):
+                return None
+            return int(val)
+        if val is None:
+            return default
+        if isinstance(val, str) and not val.strip():
+            return default
+        return val
+
+    # Defensive: description
+    description = description or '-'
+    if not description or (isinstance(description, str) and not description.strip()):
+        description = '-'
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            '''
+            INSERT INTO audit_logs (
+                user_id,
+                username,
+                action,
+                resource_type,
+                resource_id,
+                method,
+                path,
+                ip_address,
+                user_agent,
+                status_code,
+                success,
+                details,
+                session_token,
+                description
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ''', (
+                safe(user_id, None, int_field=True),
+                safe(username, '-'),
+                safe(action, '-'),
+                safe(resource_type, '-'),
+                safe(resource_id, '-'),
+                safe(method, '-'),
+                safe(path, '-'),
+                safe(ip_address, '-'),
+                safe(user_agent, '-'),
+                safe(status_code, '-'),
+                1 if success else 0,
+                safe(details, '-'),
+                safe(session_token, '-'),
+                safe(description, '-')
+            )
+        )
+        conn.commit()
+
+def generate_lead_id():
+    """Generate unique lead ID using preferences (prefix + sequential numbers)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Get preferences from settings
+        cursor.execute("SELECT setting_data FROM lead_settings WHERE setting_type = 'preferences'")
+        prefs_row = cursor.fetchone()
+        
+        prefix = 'CS'
+        start_number = 1000000001
+        
+        if prefs_row:
+            try:
+                prefs = json.loads(prefs_row['setting_data'])
+                prefix = prefs.get('leadIdPrefix', 'CS').strip() or 'CS'
+                start_number = int(prefs.get('leadIdStart', 1000000001))
+            except (json.JSONDecodeError, ValueError, TypeError):
+                pass
+        
+        # Get last lead ID
+        cursor.execute("SELECT lead_id FROM leads ORDER BY id DESC LIMIT 1")
+        last_lead = cursor.fetchone()
+        
+        if last_lead:
+            try:
+                # Extract number part after prefix
+                last_id = last_lead['lead_id']
+                # Find where the prefix ends and numbers begin
+                num_part = last_id[len(prefix):] if last_id.startswith(prefix) else last_id
+                last_number = int(num_part)
+                new_number = last_number + 1
+            except (ValueError, KeyError, TypeError, IndexError):
+                new_number = start_number
+        else:
+            new_number = start_number
+        
+        lead_id = f"{prefix}{new_number:010d}"
+        return lead_id
+
+def get_preferences():
+    """Get system preferences from database with fallback defaults"""
+    defaults = {
+        'leadIdPrefix': 'CS',
+        'leadIdStart': 1000000001,
+        'followUpDays': 7,
+        'agingAlertDays': 30,
+        'emailNotifications': True,
+        'dailyDigest': True,
+        'defaultPageSize': 20,
+        'autoLeadPercentage': False
+    }
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT setting_data FROM lead_settings WHERE setting_type = 'preferences'")
+            prefs_row = cursor.fetchone()
+            
+            if prefs_row:
+                prefs = json.loads(prefs_row['setting_data'])
+                # Merge with defaults (user settings override defaults)
+                return {**defaults, **prefs}
+    except Exception:
+        pass
+    
+    return defaults
+
+def get_status_percentages():
+    """Get status-to-percentage mappings from database
+    FRESH DATA FETCH - No caching to ensure latest config is always used
+    """
+    try:
+        # Always fresh from database - no caching
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT setting_data FROM lead_settings WHERE setting_type = 'status_percentages'")
+            row = cursor.fetchone()
+            
+            if row and row['setting_data']:
+                data = json.loads(row['setting_data'])
+                # Ensure it's a dictionary
+                if isinstance(data, dict) and data:
+                    return data
+    except Exception as e:
+        # Log but don't block
+        print(f"⚠️ Error fetching status percentages: {e}")
+    
+    # Return empty dict (no fallback - force explicit config)
+    return {}
+
+def lead_percentage_for(lead_status: str, mappings: dict) -> int:
+    """Percentage for a status from an already-fetched get_status_percentages() dict"""
+    if lead_status and lead_status in mappings:
+        try:
+            return int(mappings[lead_status])
+        except (ValueError, TypeError):
+            pass
+    
+    # IMPORTANT: No fallback defaults - if not configured, return 0
+    # This forces users to explicitly configure statuses
+    # Old default mappings removed to prevent confusion
+    return 0
+
+def calculate_lead_percentage(lead_status: str) -> int:
+    """Calculate lead percentage based on status from configured mappings
+    IMPORTANT: This uses CURRENT database config, not defaults
+    If status not configured, returns 0 (not old default)
+    """
+    # Fresh fetch every time to avoid stale data
+    return lead_percentage_for(lead_status, get_status_percentages())
+
+def hash_password(password: str) -> str:
+    """Hash password using SHA-256"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def init_database():
+    """Bring the MySQL schema up to date (versioned migrations, see migrate.py)"""
+    with get_db_connection() as conn:
+        result = run_migrations(conn)
+    if result["applied"]:
+        print(f"✅ Applied migrations: {', '.join(result['applied'])}")
+    print(f"✅ MySQL Database ready (schema version {result['version']})")
+
+# Database initialization - runs once per process, off the startup path (see app_factory)
+_db_initialized = False
+_db_init_lock = threading.Lock()
+
+def ensure_db_initialized():
+    """Run pending migrations once (safe to call from several threads)"""
+    global _db_initialized
+    if _db_initialized:
+        return
+    with _db_init_lock:
+        if not _db_initialized:
+            print("🔄 Initializing database...")
+            init_database()
+            _db_initialized = True
+
+def db_ready() -> bool:
+    return _db_initialized
+
+# Dependency to get current user
+def get_current_user(request: Request):
+    """Get current user from session token"""
+    session_token = request.cookies.get("session_token")
+    
+    if not session_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    
+    session_data = validate_session_token(session_token)
+    
+    if not session_data:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session expired or invalid"
+        )
+    
+    # Get user details from database
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE id = %s', (session_data["user_id"],))
+        user = cursor.fetchone()
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        
+        permissions = json.loads(user['permissions']) if user['permissions'] else {}
+        
+        # Fetch hierarchical permission keys assigned to the user
+        cursor.execute('''
+        SELECT p.permission_key
+        FROM user_permissions up
+        JOIN permissions p ON up.permission_id = p.id
+        WHERE up.user_id = %s AND up.granted = 1
+        ORDER BY p.permission_key
+        ''', (user['id'],))
+        perm_rows = cursor.fetchall()
+        permission_keys = [r['permission_key'] for r in perm_rows] if perm_rows else []
+        
+        return {
+            "user_id": user['id'],
+            "username": user['username'],
+            "full_name": user['full_name'],
+            "email": user['email'],
+            "role": user['role'],
+            "permissions": permissions,
+            "permission_keys": permission_keys,
+            "is_admin": user['role'] == 'admin',
+            "session_token": session_token
+        }
+
+LEGACY_PERMISSION_ALIASES = {
+    # Legacy boolean permission -> hierarchical equivalents
+    "can_view_leads": ["leads", "leads.view_table"],
+    "can_create_leads": ["add_lead", "leads.action.add"],
+    "can_edit_leads": ["leads.action.edit"],
+    "can_delete_leads": ["leads.action.delete"],
+    "can_view_users": ["users", "control_panel"],
+    "can_manage_users": ["control_panel", "users"],
+}
+
+
+def _has_permission_in_keys(permission: str, permission_keys: List[str]) -> bool:
+    """Check hierarchical permission matches including parents/children"""
+    if not permission:
+        return True
+    if not permission_keys:
+        return False
+    
+    if permission in permission_keys:
+        return True
+    
+    # Allow if any parent of the requested permission is granted
+    parts = permission.split('.')
+    for i in range(len(parts), 0, -1):
+        candidate = '.'.join(parts[:i])
+        if candidate in permission_keys:
+            return True
+    
+    # Allow if any child of the requested permission is granted
+    prefix = f"{permission}."
+    return any(key.startswith(prefix) for key in permission_keys)
+
+
+def check_user_permission(user: dict, permission: str):
+    if not permission:
+        return True
+    if user.get('role') == 'admin' or user.get('is_admin'):
+        return True
+    
+    permission_keys = user.get('permission_keys') or []
+    if _has_permission_in_keys(permission, permission_keys):
+        return True
+    
+    for alias in LEGACY_PERMISSION_ALIASES.get(permission, []):
+        if _has_permission_in_keys(alias, permission_keys):
+            return True
+    
+    permissions_map = user.get('permissions') or {}
+    return permissions_map.get(permission, False)
+
+
+def resolve_default_route(user: dict) -> str:
+    """Choose first accessible page for user"""
+    preferred_routes = [
+        ("dashboard", "/dashboard"),
+        ("leads", "/leads"),
+        ("add_lead", "/add-lead"),
+        ("target_management", "/target-management"),
+        ("lead_settings", "/lead-settings"),
+        ("users", "/users"),
+        ("control_panel", "/control-panel"),
+    ]
+
+    for key, path in preferred_routes:
+        if check_user_permission(user, key):
+            return path
+
+    # Fallback to legacy booleans
+    if (user.get('permissions') or {}).get('can_view_leads'):
+        return "/leads"
+
+    # Last resort
+    return "/dashboard"
+
+
+
+class LazyTemplates:
+    """Jinja2Templates built on first render - keeps jinja2 off the import / startup path"""
+
+    def __init__(self, directory: str = "templates"):
+        self.directory = directory
+        self.globals: Dict[str, Any] = {}
+        self._templates = None
+
+    def configure(self, directory: str, **globals):
+        self.directory = directory
+        self.globals.update(globals)
+        self._templates = None
+
+    def get(self):
+        if self._templates is None:
+            from fastapi.templating import Jinja2Templates
+            templates = Jinja2Templates(directory=self.directory)
+            templates.env.globals.update(self.globals)
+            self._templates = templates
+        return self._templates
+
+    def TemplateResponse(self, *args, **kwargs):
+        return self.get().TemplateResponse(*args, **kwargs)
+
+
+templates = LazyTemplates()
+
@@ -8,8 +8,13 @@ import pymysql
 import pymysql.cursors
 from pymysql import Error
 from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
 from typing import Optional
 import os
+import threading
+
+from query_log import query_log
 
 # MySQL Configuration
 MYSQL_HOST = "127.0.0.1"
@@ -21,6 +26,10 @@ MYSQL_DB = "crm_test"
 # Connection Pool - PyMySQL doesn't have built-in pooling, so we'll use simple connections
 connection_pool = None
 
+# Connections handed out by get_db() - exported on /metrics
+connection_stats = {"open": 0, "opened": 0}
+_connection_stats_lock = threading.Lock()
+
 def init_connection_pool():
     """MySQL connection pool - PyMySQL uses direct connections"""
     global connection_pool
@@ -41,6 +50,48 @@ def init_connection_pool():
         print(f"❌ Error initializing connection: {e}")
         return False
 
+class QueryStats:
+    """Queries / DB time / rows for one unit of work (usually one HTTP request)"""
+
+    __slots__ = ("queries", "db_time", "rows")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0  # seconds
+        self.rows = 0
+
+    def record(self, elapsed: float, rows: int):
+        self.queries += 1
+        self.db_time += elapsed
+        self.rows += rows
+
+
+# Set by RequestTimingMiddleware. Worker threads (sync endpoints, asyncio.to_thread) get a
+# copy of the context, so they record into the same QueryStats object.
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+class InstrumentedCursor(pymysql.cursors.DictCursor):
+    """DictCursor that times execute() into query_stats when a request is being measured,
+    and into query_log (slow-query log / per-statement aggregates) when that is enabled.
+    executemany() sends its statements through execute(), so each round trip is counted."""
+
+    def execute(self, query, args=None):
+        stats = query_stats.get()
+        if stats is None and not query_log.enabled:
+            return super().execute(query, args)
+        started = perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            elapsed = perf_counter() - started
+            if stats is not None:
+                # Results are buffered, so rowcount is the number of rows fetched for a SELECT
+                stats.record(elapsed, self.rowcount if self.description and self.rowcount > 0 else 0)
+            if query_log.enabled:
+                query_log.record(self, query, args, elapsed)
+
+
 def get_connection():
     """Direct MySQL connection return karta hai with DictCursor"""
     global connection_pool
@@ -58,7 +109,7 @@ def get_connection():
             user=MYSQL_USER,
             password=MYSQL_PASSWORD,
             database=MYSQL_DB,
-            cursorclass=pymysql.cursors.DictCursor  # Dictionary cursor for dict-like results
+            cursorclass=InstrumentedCursor  # DictCursor (dict-like results) + per-request query accounting
         )
     except Error as e:
         print(f"❌ Error getting connection: {e}")
@@ -77,6 +128,9 @@ def get_db():
             results = cursor.fetchall()
     """
     conn = get_connection()
+    with _connection_stats_lock:
+        connection_stats["open"] += 1
+        connection_stats["opened"] += 1
     try:
         yield conn
         conn.commit()
@@ -86,6 +140,8 @@ def get_db():
         raise
     finally:
         conn.close()
+        with _connection_stats_lock:
+            connection_stats["open"] -= 1
 
 def create_database_if_not_exists():
     """Agar database exist nahi karta toh create kar deta hai"""
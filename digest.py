@@ -0,0 +1,303 @@
+"""
+Daily digest emails
+Har user ko overdue follow-ups, purane (aging) leads aur target progress ka roz ka summary
+
+All users are covered by four set-based queries (recipients, overdue follow-ups,
+aging leads, targets); rows are bucketed per user in Python and each digest is
+rendered from templates/email/daily_digest.{txt,html}.
+
+Delivery is pluggable:
+    FileSink    - writes .eml files under outbox/digests/<date>/ (local testing)
+    SMTPSender  - one SMTP connection for the whole batch. For an SMTP debug sink run
+                  `python -m aiosmtpd -n -l localhost:1025` and use host=localhost, port=1025
+
+Usage:
+    python digest.py [--sink file|smtp] [--force]
+"""
+
+import argparse
+import json
+import os
+import smtplib
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+# Delivery settings
+DIGEST_SENDER = "file"  # "file" or "smtp"
+DIGEST_FROM_ADDRESS = "crm@localhost"
+DIGEST_OUTBOX = "outbox"
+DIGEST_SMTP_HOST = "localhost"
+DIGEST_SMTP_PORT = 1025
+DIGEST_SMTP_USER = None
+DIGEST_SMTP_PASSWORD = None
+DIGEST_SMTP_TLS = False
+
+DIGEST_SEND_HOUR = 8  # scheduled run sends once a day, after this local hour
+DIGEST_MAX_ITEMS = 20  # rows listed per section (counts are always complete)
+DIGEST_CLAIM_TIMEOUT_MINUTES = 60  # an unfinished run claimed this long ago is retried
+
+_env = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "email")),
+    autoescape=select_autoescape(["html"]),
+)
+
+
+class FileSink:
+    """Writes each message as an .eml file - for local testing"""
+
+    def __init__(self, directory: str = DIGEST_OUTBOX):
+        self.directory = directory
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, message: Message, run_date: date):
+        folder = os.path.join(self.directory, "digests", run_date.isoformat())
+        os.makedirs(folder, exist_ok=True)
+        name = message["X-CRM-Username"] or message["To"]
+        with open(os.path.join(folder, f"{name}.eml"), "wb") as f:
+            f.write(bytes(message))
+
+
+class SMTPSender:
+    """Sends through one SMTP connection for the whole batch"""
+
+    def __init__(self, host: str = DIGEST_SMTP_HOST, port: int = DIGEST_SMTP_PORT,
+                 username: Optional[str] = DIGEST_SMTP_USER, password: Optional[str] = DIGEST_SMTP_PASSWORD,
+                 use_tls: bool = DIGEST_SMTP_TLS):
+        self.host, self.port = host, port
+        self.username, self.password = username, password
+        self.use_tls = use_tls
+        self.smtp = None
+
+    def __enter__(self):
+        self.smtp = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            self.smtp.starttls()
+        if self.username:
+            self.smtp.login(self.username, self.password)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.smtp.quit()
+        except Exception:
+            pass
+        return False
+
+    def send(self, message: Message, run_date: date):
+        self.smtp.send_message(message)
+
+
+def get_sender(name: str = DIGEST_SENDER):
+    if name == "smtp":
+        return SMTPSender()
+    return FileSink()
+
+
+def load_digest_preferences(cursor) -> dict:
+    """Digest-related preferences (same defaults as get_preferences)"""
+    prefs = {'followUpDays': 7, 'agingAlertDays': 30, 'emailNotifications': True, 'dailyDigest': True}
+    cursor.execute("SELECT setting_data FROM lead_settings WHERE setting_type = 'preferences'")
+    row = cursor.fetchone()
+    if row and row.get('setting_data'):
+        try:
+            prefs.update(json.loads(row['setting_data']))
+        except ValueError:
+            pass
+    return prefs
+
+
+def ensure_digest_table(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS digest_runs (
+        run_date DATE PRIMARY KEY,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP NULL,
+        recipients INT DEFAULT 0,
+        sent INT DEFAULT 0,
+        failed INT DEFAULT 0
+    )
+    ''')
+
+
+def claim_digest_run(cursor, run_date: date) -> Optional[str]:
+    """Claim the day's run: None when this worker should send, else why not.
+    The row stays unfinished (finished_at NULL) until delivery is done; a claim older than
+    DIGEST_CLAIM_TIMEOUT_MINUTES belongs to a worker that died mid-run and is taken over."""
+    cursor.execute('INSERT IGNORE INTO digest_runs (run_date) VALUES (%s)', (run_date,))
+    if cursor.rowcount:
+        return None
+    cursor.execute('''
+        UPDATE digest_runs SET started_at = CURRENT_TIMESTAMP
+        WHERE run_date = %s AND finished_at IS NULL
+          AND started_at < CURRENT_TIMESTAMP - INTERVAL %s MINUTE
+    ''', (run_date, DIGEST_CLAIM_TIMEOUT_MINUTES))
+    if cursor.rowcount:
+        print(f"⚠️ Digest run for {run_date} never finished - retrying")
+        return None
+    cursor.execute('SELECT finished_at FROM digest_runs WHERE run_date = %s', (run_date,))
+    row = cursor.fetchone() or {}
+    return "already_sent" if row.get('finished_at') else "in_progress"
+
+
+def _collect(cursor, aging_days: int) -> dict:
+    """Everything the digests need, in four queries - keyed by user id"""
+    data = defaultdict(lambda: {"overdue": [], "overdue_count": 0, "aging": [], "aging_count": 0, "targets": []})
+
+    cursor.execute('''
+        SELECT assigned_to, lead_id, company_name, customer_name, contact_no, lead_status,
+               next_follow_up_date, DATEDIFF(CURDATE(), next_follow_up_date) as days_overdue
+        FROM leads
+        WHERE next_follow_up_date < CURDATE()
+          AND assigned_to IS NOT NULL
+        ORDER BY assigned_to, next_follow_up_date
+    ''')
+    for row in cursor.fetchall() or []:
+        entry = data[row['assigned_to']]
+        entry["overdue_count"] += 1
+        if len(entry["overdue"]) < DIGEST_MAX_ITEMS:
+            entry["overdue"].append(row)
+
+    cursor.execute('''
+        SELECT assigned_to, lead_id, company_name, customer_name, lead_status, lead_date,
+               DATEDIFF(CURDATE(), lead_date) as aging_days
+        FROM leads
+        WHERE lead_date <= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+          AND COALESCE(lead_percentage, 0) < 100
+          AND assigned_to IS NOT NULL
+        ORDER BY assigned_to, lead_date
+    ''', (aging_days,))
+    for row in cursor.fetchall() or []:
+        entry = data[row['assigned_to']]
+        entry["aging_count"] += 1
+        if len(entry["aging"]) < DIGEST_MAX_ITEMS:
+            entry["aging"].append(row)
+
+    cursor.execute('''
+        SELECT assigned_to, name, type, period, target_value, current_value
+        FROM targets
+        WHERE is_active = 1
+        ORDER BY assigned_to, name
+    ''')
+    for row in cursor.fetchall() or []:
+        target_value = float(row['target_value'] or 0)
+        current_value = float(row['current_value'] or 0)
+        row['percentage'] = round(current_value / target_value * 100, 1) if target_value > 0 else 0
+        data[row['assigned_to']]["targets"].append(row)
+
+    return data
+
+
+def build_message(recipient: dict, digest: dict, run_date: date, prefs: dict) -> Message:
+    context = {
+        "user": recipient,
+        "run_date": run_date,
+        "aging_alert_days": prefs.get('agingAlertDays', 30),
+        "max_items": DIGEST_MAX_ITEMS,
+        **digest,
+    }
+    # compat32 MIME classes - several times faster than EmailMessage's header parsing
+    message = MIMEMultipart("alternative")
+    message["Subject"] = (f"Your CRM digest for {run_date:%d %b %Y}: "
+                          f"{digest['overdue_count']} overdue follow-ups")
+    message["From"] = DIGEST_FROM_ADDRESS
+    message["To"] = recipient['email']
+    message["X-CRM-Username"] = recipient['username']
+    message.attach(MIMEText(_env.get_template("daily_digest.txt").render(**context), "plain", "utf-8"))
+    message.attach(MIMEText(_env.get_template("daily_digest.html").render(**context), "html", "utf-8"))
+    return message
+
+
+def run_daily_digest(conn, sender=None, run_date: Optional[date] = None, force: bool = False) -> dict:
+    """Build and deliver digests for every active user with something to report"""
+    started = time.perf_counter()
+    run_date = run_date or date.today()
+    cursor = conn.cursor()
+
+    prefs = load_digest_preferences(cursor)
+    if not force and not (prefs.get('dailyDigest') and prefs.get('emailNotifications')):
+        return {"status": "disabled"}
+
+    ensure_digest_table(cursor)
+    if not force:
+        status = claim_digest_run(cursor, run_date)
+        if status:
+            return {"status": status}
+        conn.commit()
+
+    sent, failed, skipped = 0, 0, 0
+    try:
+        cursor.execute('''
+            SELECT id, username, full_name, email
+            FROM users
+            WHERE is_active = 1 AND email IS NOT NULL AND email != ''
+        ''')
+        recipients = cursor.fetchall() or []
+        data = _collect(cursor, int(prefs.get('agingAlertDays', 30)))
+
+        with (sender or get_sender()) as delivery:
+            for recipient in recipients:
+                digest = data.get(recipient['id'])
+                if not digest or not (digest["overdue_count"] or digest["aging_count"] or digest["targets"]):
+                    skipped += 1
+                    continue
+                try:
+                    delivery.send(build_message(recipient, digest, run_date, prefs), run_date)
+                    sent += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"⚠️ Digest for {recipient['username']} failed: {e}")
+    except Exception:
+        if not force and not sent:
+            # Nothing went out (sender didn't open, query failed) - release the claim so the next run retries
+            conn.rollback()
+            cursor.execute('DELETE FROM digest_runs WHERE run_date = %s AND finished_at IS NULL', (run_date,))
+            conn.commit()
+        raise
+
+    cursor.execute('''
+        INSERT INTO digest_runs (run_date, finished_at, recipients, sent, failed)
+        VALUES (%s, CURRENT_TIMESTAMP, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE finished_at = CURRENT_TIMESTAMP, recipients = VALUES(recipients),
+                                sent = VALUES(sent), failed = VALUES(failed)
+    ''', (run_date, len(recipients), sent, failed))
+    conn.commit()
+    return {
+        "status": "sent",
+        "recipients": len(recipients),
+        "sent": sent,
+        "skipped": skipped,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def digest_job(conn) -> dict:
+    """Scheduler job body - sends once per day after DIGEST_SEND_HOUR"""
+    if datetime.now().hour < DIGEST_SEND_HOUR:
+        return {"status": "waiting"}
+    return run_daily_digest(conn)
+
+
+if __name__ == "__main__":
+    from database import get_db
+
+    parser = argparse.ArgumentParser(description="Send the daily CRM digest")
+    parser.add_argument("--sink", choices=["file", "smtp"], default=DIGEST_SENDER)
+    parser.add_argument("--force", action="store_true", help="send even if already sent today / disabled")
+    args = parser.parse_args()
+
+    with get_db() as conn:
+        result = run_daily_digest(conn, get_sender(args.sink), force=args.force)
+    print(f"✅ Daily digest: {result}")
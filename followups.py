@@ -0,0 +1,113 @@
+"""
+Follow-up worklist
+Har sales rep ke leads ka next_follow_up_date ke hisaab se overdue / today / upcoming list
+
+Queries filter on assigned_to + a next_follow_up_date range so they run off
+idx_leads_assigned_followup (assigned_to, next_follow_up_date). Bucket counts
+are cached per user and dropped whenever one of that user's leads is written.
+"""
+
+import threading
+import time
+from datetime import date
+from typing import Dict, Optional
+
+FOLLOWUP_BUCKETS = ("overdue", "today", "upcoming")
+
+# Counts are also re-read after this many seconds (covers writes outside the API)
+FOLLOWUP_COUNT_TTL = 300
+
+FOLLOWUP_COLUMNS = '''
+    l.lead_id, l.company_name, l.customer_name, l.contact_no, l.email_id,
+    l.lead_status, l.lead_percentage, l.lead_owner, l.method_of_communication,
+    l.next_follow_up_date, l.remarks,
+    DATEDIFF(CURDATE(), l.next_follow_up_date) as days_overdue
+'''
+
+
+def _bucket_condition(bucket: str) -> str:
+    """WHERE fragment for a bucket - every form is a range on next_follow_up_date"""
+    if bucket == "overdue":
+        return "l.next_follow_up_date < CURDATE()"
+    if bucket == "today":
+        return "l.next_follow_up_date = CURDATE()"
+    if bucket == "upcoming":
+        return "l.next_follow_up_date > CURDATE() AND l.next_follow_up_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)"
+    raise ValueError(f"Unknown follow-up bucket: {bucket}")
+
+
+class FollowupCountCache:
+    """Per-user bucket counts, valid for one day / follow-up window / TTL"""
+
+    def __init__(self, ttl: int = FOLLOWUP_COUNT_TTL):
+        self.ttl = ttl
+        self._entries: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        # Unlocked counters for /metrics - a lost increment under contention doesn't matter
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, follow_up_days: int) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        if entry:
+            day, days, stored_at, counts = entry
+            if day == date.today() and days == follow_up_days and time.monotonic() - stored_at <= self.ttl:
+                self.hits += 1
+                return counts
+        self.misses += 1
+        return None
+
+    def set(self, user_id: int, follow_up_days: int, counts: dict):
+        with self._lock:
+            self._entries[user_id] = (date.today(), follow_up_days, time.monotonic(), counts)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                if user_id is not None:
+                    self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+followup_counts = FollowupCountCache()
+
+
+def get_followup_counts(cursor, user_id: int, follow_up_days: int) -> dict:
+    """overdue / today / upcoming counts for one user (cached)"""
+    counts = followup_counts.get(user_id, follow_up_days)
+    if counts is not None:
+        return counts
+    cursor.execute('''
+        SELECT COALESCE(SUM(next_follow_up_date < CURDATE()), 0) as overdue,
+               COALESCE(SUM(next_follow_up_date = CURDATE()), 0) as today,
+               COALESCE(SUM(next_follow_up_date > CURDATE()), 0) as upcoming
+        FROM leads
+        WHERE assigned_to = %s
+          AND next_follow_up_date IS NOT NULL
+          AND next_follow_up_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+    ''', (user_id, follow_up_days))
+    row = cursor.fetchone() or {}
+    counts = {bucket: int(row.get(bucket) or 0) for bucket in FOLLOWUP_BUCKETS}
+    followup_counts.set(user_id, follow_up_days, counts)
+    return counts
+
+
+def get_followup_page(cursor, user_id: int, bucket: str, follow_up_days: int,
+                      page: int = 1, limit: int = 20) -> list:
+    """One page of a bucket - most overdue first, then soonest upcoming"""
+    params = [user_id]
+    if bucket == "upcoming":
+        params.append(follow_up_days)
+    params.extend([limit, (page - 1) * limit])
+    cursor.execute(f'''
+        SELECT {FOLLOWUP_COLUMNS}
+        FROM leads l
+        WHERE l.assigned_to = %s
+          AND {_bucket_condition(bucket)}
+        ORDER BY l.next_follow_up_date ASC, l.id ASC
+        LIMIT %s OFFSET %s
+    ''', params)
+    return [dict(row) for row in cursor.fetchall() or []]
@@ -0,0 +1,69 @@
+"""
+HTTP conditional GET helpers
+ETag / If-None-Match handling for JSON API endpoints
+
+Usage:
+    @app.get("/api/thing/{thing_id}")
+    async def get_thing(thing_id: str, conditional: ConditionalGet = Depends()):
+        cursor.execute("SELECT updated_at FROM things WHERE id = %s", (thing_id,))
+        row = cursor.fetchone()
+        not_modified = conditional.evaluate(thing_id, row['updated_at'])
+        if not_modified:
+            return not_modified
+        ...  # build the full payload as usual
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Per-user data - browser may keep a copy but must revalidate every time
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*version_parts) -> str:
+    """Strong ETag built from the version columns of a resource"""
+    raw = "|".join("" if part is None else str(part) for part in version_parts)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak comparison as per RFC 7232)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class ConditionalGet:
+    """Request dependency that answers 304 when the client copy is still current"""
+
+    def __init__(self, request: Request, response: Response):
+        self.if_none_match = request.headers.get("if-none-match")
+        self.response = response
+        self.etag = None
+        self.headers = {}
+
+    def evaluate(self, *version_parts, cache_control: str = DEFAULT_CACHE_CONTROL) -> Optional[Response]:
+        """Set ETag/Cache-Control headers; return a 304 response if nothing changed"""
+        self.etag = make_etag(*version_parts)
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": cache_control,
+            "Vary": "Cookie",
+        }
+        if etag_matches(self.if_none_match, self.etag):
+            return Response(status_code=304, headers=self.headers)
+        # Merged by FastAPI for dict returns; pass self.headers when returning a Response
+        for key, value in self.headers.items():
+            self.response.headers[key] = value
+        return None
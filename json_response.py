@@ -0,0 +1,59 @@
+"""
+Fast JSON response class for the CRM API
+orjson based encoder with native datetime/date/Decimal handling
+
+Endpoints returning plain dicts still pass through FastAPI's jsonable_encoder
+before reaching render(). Hot endpoints (lead list, lead detail, audit logs)
+return FastJSONResponse(...) directly so DB rows go straight to orjson.
+"""
+
+import json
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, stdlib json fallback
+    orjson = None
+
+
+def _default(obj: Any):
+    """Types orjson (and stdlib json) do not serialize natively"""
+    if isinstance(obj, Decimal):
+        # Same shape as jsonable_encoder: integral decimals -> int, others -> float
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if hasattr(obj, "isoformat"):
+        # Only reached on the stdlib fallback path (orjson handles dates itself)
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Project-wide default response class"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,134 @@
+"""
+Faceted filter counts for the leads page
+Status / owner / source / type / system ke counts ek hi query mein, current filters ke hisaab se
+
+One GROUP BY over the five facet columns returns every combination that
+matches the non-facet filters (role scope, search, aging) together with its
+lead count and KPI sums. Per-facet counts are then folded in Python:
+a facet's counts honour every selected facet except its own, so the status
+dropdown still shows the other statuses while a status is selected.
+
+The grouped rows are cached per filter signature and dropped on any lead write.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Optional
+
+LEAD_FACET_FIELDS = ("lead_status", "lead_owner", "lead_source", "lead_type", "system")
+
+# Grouped rows are also re-read after this many seconds (covers writes outside the API)
+LEAD_FACET_TTL = 120
+LEAD_FACET_CACHE_SIZE = 256
+
+LEAD_KPI_FIELDS = ("upcoming_followups", "new_this_month")
+
+
+class FacetCache:
+    """Grouped facet rows per filter signature, valid for one day / TTL"""
+
+    def __init__(self, ttl: int = LEAD_FACET_TTL, max_entries: int = LEAD_FACET_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+        # Unlocked counters for /metrics - a lost increment under contention doesn't matter
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, signature: tuple) -> Optional[list]:
+        entry = self._entries.get(signature)
+        if not entry or entry[0] != date.today() or time.monotonic() - entry[1] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[2]
+
+    def set(self, signature: tuple, rows: list):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop the oldest entry (dicts keep insertion order)
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[signature] = (date.today(), time.monotonic(), rows)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+facet_cache = FacetCache()
+
+
+def invalidate_lead_facets():
+    """Call after any lead insert / update / delete"""
+    facet_cache.clear()
+
+
+def _fold(value) -> str:
+    # Same comparison the default case-insensitive collation does for `col = %s`
+    return str(value).rstrip().casefold() if value is not None else ""
+
+
+def _grouped_rows(cursor, where_sql: str, params: list) -> list:
+    columns = ", ".join(f"l.`{field}`" for field in LEAD_FACET_FIELDS)
+    cursor.execute(f'''
+        SELECT {columns},
+               COUNT(*) as lead_count,
+               COALESCE(SUM(l.next_follow_up_date >= CURDATE()
+                            AND l.next_follow_up_date <= DATE_ADD(CURDATE(), INTERVAL 7 DAY)), 0) as upcoming_followups,
+               COALESCE(SUM(l.created_at >= DATE_FORMAT(CURDATE(), '%%Y-%%m-01')), 0) as new_this_month
+        {where_sql}
+        GROUP BY {columns}
+    ''', params)
+    return [
+        {**{field: row[field] for field in LEAD_FACET_FIELDS},
+         "lead_count": int(row['lead_count'] or 0),
+         **{kpi: int(row[kpi] or 0) for kpi in LEAD_KPI_FIELDS}}
+        for row in cursor.fetchall() or []
+    ]
+
+
+def summarize_facets(rows: list, selected: dict) -> dict:
+    """Fold grouped rows into per-facet counts for the selected facet values"""
+    active = {field: _fold(value) for field, value in selected.items() if value}
+    counts = {field: defaultdict(int) for field in LEAD_FACET_FIELDS}
+    totals = {"total": 0, **{kpi: 0 for kpi in LEAD_KPI_FIELDS}}
+
+    for row in rows:
+        misses = [field for field, value in active.items() if _fold(row[field]) != value]
+        if len(misses) > 1:
+            continue
+        for field in LEAD_FACET_FIELDS:
+            # A facet ignores its own selection, so one miss on that facet still counts
+            if not misses or misses[0] == field:
+                counts[field][row[field]] += row['lead_count']
+        if not misses:
+            totals["total"] += row['lead_count']
+            for kpi in LEAD_KPI_FIELDS:
+                totals[kpi] += row[kpi]
+
+    return {
+        **totals,
+        "facets": {
+            field: [
+                {"value": value, "count": count}
+                for value, count in sorted(values.items(), key=lambda item: (-item[1], _fold(item[0])))
+            ]
+            for field, values in counts.items()
+        },
+    }
+
+
+def get_lead_facets(cursor, where_sql: str, params: list, signature: tuple, selected: dict) -> dict:
+    """Facet counts + KPIs for the current filters. where_sql is the FROM/WHERE
+    part without the facet filters; signature identifies it for the cache."""
+    rows = facet_cache.get(signature)
+    cached = rows is not None
+    if not cached:
+        rows = _grouped_rows(cursor, where_sql, params)
+        facet_cache.set(signature, rows)
+    result = summarize_facets(rows, selected)
+    result["cached"] = cached
+    return result
@@ -0,0 +1,323 @@
+"""
+Lead daily facts
+lead_history / lead_status_history ko per day, per user pre-aggregate karta hai
+
+One row per (day, user, metric, metric_value, lead status/source/type/system)
+with event_count, distinct_leads and revenue. Period reports and targets sum
+these rows instead of scanning free-text history with CAST(new_value AS DECIMAL).
+
+Metrics:
+    status                   - lead_status_history rows, metric_value = new_status
+    closing_amount           - closing amounts set (revenue holds the sum)
+    lead_source              - lead_history rows, metric_value = new value
+    method_of_communication  - lead_history rows, metric_value = new value
+
+distinct_leads is distinct per day; summing it over a period counts a lead
+once per day it appears, so exact period-distinct numbers still need history.
+
+Usage:
+    python lead_facts.py backfill [--from 2025-01-01] [--to 2025-12-31]
+    python lead_facts.py refresh
+"""
+
+import argparse
+import re
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+# lead_history fields copied into facts
+FACT_HISTORY_FIELDS = ('closing_amount', 'lead_source', 'method_of_communication')
+
+# Lead columns stored as fact dimensions - changing one of these re-aggregates that lead's days
+FACT_DIMENSION_FIELDS = ('lead_status', 'lead_source', 'lead_type', 'system')
+
+# Context tab -> fact dimension column
+FACT_DIMENSION_BY_TAB = {
+    'statuses': 'lead_status',
+    'sources': 'lead_source',
+    'types': 'lead_type',
+    'systems': '`system`',
+}
+
+BACKFILL_CHUNK_DAYS = 31
+
+# closing_amount history is free text ("1,50,000", "TBD"): only plain decimals are summed, anything
+# else counts as 0. CAST of such text inside INSERT ... SELECT is an error under strict sql_mode.
+NUMERIC_AMOUNT_PATTERN = r'^-?[0-9]{1,13}(\.[0-9]+)?$'
+NUMERIC_AMOUNT = re.compile(NUMERIC_AMOUNT_PATTERN)
+
+# Refresh re-reads history ids this far below the watermark, and always rebuilds the last
+# REFRESH_TRAILING_DAYS days - AUTO_INCREMENT ids are assigned at insert, not commit, so a
+# transaction that commits late leaves lower ids behind the watermark
+REFRESH_ID_OVERLAP = 5000
+REFRESH_TRAILING_DAYS = 2  # today and yesterday
+
+
+def create_fact_tables(cursor):
+    """Create fact + bookkeeping tables (called from init_database and the backfill command)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lead_daily_facts (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        fact_date DATE NOT NULL,
+        user_id INT NOT NULL,
+        metric VARCHAR(50) NOT NULL,
+        metric_value VARCHAR(255) NOT NULL DEFAULT '',
+        lead_status VARCHAR(100) NOT NULL DEFAULT '',
+        lead_source VARCHAR(255) NOT NULL DEFAULT '',
+        lead_type VARCHAR(255) NOT NULL DEFAULT '',
+        `system` VARCHAR(255) NOT NULL DEFAULT '',
+        event_count INT NOT NULL DEFAULT 0,
+        distinct_leads INT NOT NULL DEFAULT 0,
+        revenue DECIMAL(15,2) NOT NULL DEFAULT 0,
+        INDEX idx_ldf_user_metric_date (user_id, metric, fact_date),
+        INDEX idx_ldf_date (fact_date)
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lead_daily_facts_state (
+        id TINYINT PRIMARY KEY,
+        last_status_history_id BIGINT NOT NULL DEFAULT 0,
+        last_history_id BIGINT NOT NULL DEFAULT 0,
+        backfilled_at TIMESTAMP NULL,
+        refreshed_at TIMESTAMP NULL
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lead_daily_facts_dirty (
+        fact_date DATE PRIMARY KEY
+    )
+    ''')
+
+
+def rebuild_fact_range(cursor, start: date, end: date) -> int:
+    """Re-aggregate facts for days in [start, end). Returns fact rows written."""
+    range_params = (start.isoformat(), end.isoformat())
+    cursor.execute('DELETE FROM lead_daily_facts WHERE fact_date >= %s AND fact_date < %s', range_params)
+
+    cursor.execute('''
+    INSERT INTO lead_daily_facts
+        (fact_date, user_id, metric, metric_value, lead_status, lead_source, lead_type, `system`,
+         event_count, distinct_leads, revenue)
+    SELECT fact_date, user_id, 'status', metric_value, lead_status, lead_source, lead_type, lead_system,
+           COUNT(*), COUNT(DISTINCT lead_id), 0
+    FROM (
+        SELECT DATE(lsh.changed_at) as fact_date, lsh.changed_by as user_id, lsh.lead_id,
+               COALESCE(lsh.new_status, '') as metric_value,
+               COALESCE(l.lead_status, '') as lead_status, COALESCE(l.lead_source, '') as lead_source,
+               COALESCE(l.lead_type, '') as lead_type, COALESCE(l.`system`, '') as lead_system
+        FROM lead_status_history lsh
+        LEFT JOIN leads l ON l.lead_id = lsh.lead_id
+        WHERE lsh.changed_at >= %s AND lsh.changed_at < %s
+    ) s
+    GROUP BY fact_date, user_id, metric_value, lead_status, lead_source, lead_type, lead_system
+    ''', range_params)
+    written = cursor.rowcount
+
+    field_in = ', '.join(['%s'] * len(FACT_HISTORY_FIELDS))
+    cursor.execute(f'''
+    INSERT INTO lead_daily_facts
+        (fact_date, user_id, metric, metric_value, lead_status, lead_source, lead_type, `system`,
+         event_count, distinct_leads, revenue)
+    SELECT fact_date, user_id, metric, metric_value, lead_status, lead_source, lead_type, lead_system,
+           COUNT(*), COUNT(DISTINCT lead_id), COALESCE(SUM(amount), 0)
+    FROM (
+        SELECT DATE(lh.changed_at) as fact_date, lh.changed_by as user_id, lh.lead_id,
+               lh.field_name as metric,
+               CASE WHEN lh.field_name = 'closing_amount' THEN '' ELSE LEFT(lh.new_value, 255) END as metric_value,
+               CASE WHEN lh.field_name = 'closing_amount' AND lh.new_value REGEXP %s
+                    THEN CAST(lh.new_value AS DECIMAL(15,2)) ELSE 0 END as amount,
+               COALESCE(l.lead_status, '') as lead_status, COALESCE(l.lead_source, '') as lead_source,
+               COALESCE(l.lead_type, '') as lead_type, COALESCE(l.`system`, '') as lead_system
+        FROM lead_history lh
+        LEFT JOIN leads l ON l.lead_id = lh.lead_id
+        WHERE lh.field_name IN ({field_in})
+          AND lh.new_value IS NOT NULL
+          AND NOT (lh.field_name = 'closing_amount' AND lh.new_value IN ('', '0'))
+          AND lh.changed_at >= %s AND lh.changed_at < %s
+    ) h
+    GROUP BY fact_date, user_id, metric, metric_value, lead_status, lead_source, lead_type, lead_system
+    ''', (NUMERIC_AMOUNT_PATTERN, *FACT_HISTORY_FIELDS, *range_params))
+    return written + cursor.rowcount
+
+
+def _rebuild_days(cursor, days: Iterable[date]) -> int:
+    """Rebuild a set of single days, merging consecutive days into one range"""
+    written = 0
+    run_start = run_end = None
+    for day in sorted(set(days)):
+        if run_end is not None and day == run_end:
+            run_end = day + timedelta(days=1)
+            continue
+        if run_start is not None:
+            written += rebuild_fact_range(cursor, run_start, run_end)
+        run_start, run_end = day, day + timedelta(days=1)
+    if run_start is not None:
+        written += rebuild_fact_range(cursor, run_start, run_end)
+    return written
+
+
+def _load_state(cursor) -> dict:
+    cursor.execute('SELECT * FROM lead_daily_facts_state WHERE id = 1')
+    row = cursor.fetchone()
+    if row:
+        return dict(row)
+    cursor.execute('INSERT INTO lead_daily_facts_state (id) VALUES (1)')
+    return {"id": 1, "last_status_history_id": 0, "last_history_id": 0,
+            "backfilled_at": None, "refreshed_at": None}
+
+
+def _history_high_water(cursor) -> tuple:
+    cursor.execute('SELECT COALESCE(MAX(id), 0) as max_id FROM lead_status_history')
+    status_max = cursor.fetchone()['max_id']
+    cursor.execute('SELECT COALESCE(MAX(id), 0) as max_id FROM lead_history')
+    history_max = cursor.fetchone()['max_id']
+    return status_max, history_max
+
+
+def facts_ready(cursor) -> bool:
+    """True once a backfill has completed - before that, facts are incomplete"""
+    try:
+        cursor.execute('SELECT backfilled_at FROM lead_daily_facts_state WHERE id = 1')
+        row = cursor.fetchone()
+    except Exception:
+        return False
+    return bool(row and row.get('backfilled_at'))
+
+
+def facts_current(cursor) -> bool:
+    """Read-only check for request handlers: backfilled, no days queued as dirty and no history
+    written since the last refresh - facts then give the same numbers as raw history"""
+    try:
+        cursor.execute('''
+            SELECT backfilled_at, last_status_history_id, last_history_id
+            FROM lead_daily_facts_state WHERE id = 1
+        ''')
+        state = cursor.fetchone()
+    except Exception:
+        return False
+    if not state or not state.get('backfilled_at'):
+        return False
+    cursor.execute('SELECT fact_date FROM lead_daily_facts_dirty LIMIT 1')
+    if cursor.fetchone():
+        return False
+    status_max, history_max = _history_high_water(cursor)
+    return status_max <= state['last_status_history_id'] and history_max <= state['last_history_id']
+
+
+def mark_lead_dirty(cursor, lead_id: str):
+    """Queue every day a lead has history on for re-aggregation.
+    Call before deleting a lead's history, or after one of its dimension columns changes."""
+    cursor.execute('''
+    INSERT IGNORE INTO lead_daily_facts_dirty (fact_date)
+    SELECT DISTINCT DATE(changed_at) FROM lead_status_history WHERE lead_id = %s
+    UNION
+    SELECT DISTINCT DATE(changed_at) FROM lead_history WHERE lead_id = %s
+    ''', (lead_id, lead_id))
+
+
+def refresh_lead_daily_facts(cursor, today: Optional[date] = None) -> dict:
+    """Incremental update - re-aggregate days with new (or late-committed) history rows,
+    the trailing REFRESH_TRAILING_DAYS days, and days queued as dirty"""
+    state = _load_state(cursor)
+    status_max, history_max = _history_high_water(cursor)
+    today = today or date.today()
+
+    cursor.execute('SELECT fact_date FROM lead_daily_facts_dirty')
+    days = {row['fact_date'] for row in cursor.fetchall() or []}
+    days.update(today - timedelta(days=i) for i in range(REFRESH_TRAILING_DAYS))
+
+    if status_max > 0:
+        cursor.execute('''
+            SELECT DISTINCT DATE(changed_at) as fact_date FROM lead_status_history
+            WHERE id > %s AND id <= %s
+        ''', (max(state['last_status_history_id'] - REFRESH_ID_OVERLAP, 0), status_max))
+        days.update(row['fact_date'] for row in cursor.fetchall() or [])
+    if history_max > 0:
+        field_in = ', '.join(['%s'] * len(FACT_HISTORY_FIELDS))
+        cursor.execute(f'''
+            SELECT DISTINCT DATE(changed_at) as fact_date FROM lead_history
+            WHERE id > %s AND id <= %s AND field_name IN ({field_in})
+        ''', (max(state['last_history_id'] - REFRESH_ID_OVERLAP, 0), history_max, *FACT_HISTORY_FIELDS))
+        days.update(row['fact_date'] for row in cursor.fetchall() or [])
+
+    written = _rebuild_days(cursor, days)
+    if days:
+        placeholders = ', '.join(['%s'] * len(days))
+        cursor.execute(f'DELETE FROM lead_daily_facts_dirty WHERE fact_date IN ({placeholders})',
+                       [d.isoformat() for d in days])
+    cursor.execute('''
+        UPDATE lead_daily_facts_state
+        SET last_status_history_id = %s, last_history_id = %s, refreshed_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    ''', (status_max, history_max))
+    return {"days": len(days), "rows": written}
+
+
+def backfill_lead_daily_facts(conn, date_from: Optional[date] = None, date_to: Optional[date] = None) -> dict:
+    """Rebuild facts over a date range (default: all history) in month-sized committed chunks"""
+    cursor = conn.cursor()
+    create_fact_tables(cursor)
+    _load_state(cursor)
+    # Watermark taken first - rows written during the backfill are picked up by the next refresh
+    status_max, history_max = _history_high_water(cursor)
+
+    if date_from is None or date_to is None:
+        cursor.execute('''
+            SELECT MIN(d) as first_day, MAX(d) as last_day FROM (
+                SELECT DATE(MIN(changed_at)) as d FROM lead_status_history
+                UNION ALL SELECT DATE(MAX(changed_at)) FROM lead_status_history
+                UNION ALL SELECT DATE(MIN(changed_at)) FROM lead_history
+                UNION ALL SELECT DATE(MAX(changed_at)) FROM lead_history
+            ) bounds
+        ''')
+        bounds = cursor.fetchone() or {}
+        date_from = date_from or bounds.get('first_day') or date.today()
+        date_to = date_to or bounds.get('last_day') or date.today()
+
+    written, chunks = 0, 0
+    chunk_start = date_from
+    while chunk_start <= date_to:
+        chunk_end = min(chunk_start + timedelta(days=BACKFILL_CHUNK_DAYS), date_to + timedelta(days=1))
+        written += rebuild_fact_range(cursor, chunk_start, chunk_end)
+        conn.commit()
+        chunks += 1
+        print(f"  {chunk_start} -> {chunk_end - timedelta(days=1)}: {written} fact rows so far")
+        chunk_start = chunk_end
+
+    cursor.execute('''
+        UPDATE lead_daily_facts_state
+        SET last_status_history_id = GREATEST(last_status_history_id, %s),
+            last_history_id = GREATEST(last_history_id, %s),
+            backfilled_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    ''', (status_max, history_max))
+    conn.commit()
+    return {"from": str(date_from), "to": str(date_to), "chunks": chunks, "rows": written}
+
+
+def refresh_job(conn) -> dict:
+    """Scheduler job body"""
+    return refresh_lead_daily_facts(conn.cursor())
+
+
+def _parse_day(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+if __name__ == "__main__":
+    from database import get_db
+
+    parser = argparse.ArgumentParser(description="Build lead_daily_facts from lead history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill_cmd = sub.add_parser("backfill", help="rebuild facts for a date range (default: all history)")
+    backfill_cmd.add_argument("--from", dest="date_from", type=_parse_day)
+    backfill_cmd.add_argument("--to", dest="date_to", type=_parse_day)
+    sub.add_parser("refresh", help="incremental update from new history rows")
+    args = parser.parse_args()
+
+    with get_db() as conn:
+        if args.command == "backfill":
+            print("📊 Backfilling lead_daily_facts...")
+            print(f"✅ Done: {backfill_lead_daily_facts(conn, args.date_from, args.date_to)}")
+        else:
+            print(f"✅ Refreshed: {refresh_lead_daily_facts(conn.cursor())}")
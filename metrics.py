@@ -0,0 +1,189 @@
+"""
+Prometheus metrics
+/metrics ke liye request counters, latency histograms, DB connections, sessions, caches aur jobs
+
+Request metrics are recorded by RequestTimingMiddleware on the event loop
+thread, and /metrics is an async endpoint on the same thread, so they need no
+lock. Everything else (open connections, sessions, cache counters, scheduler
+job stats) is read from the owning module at scrape time. A scrape only
+formats strings (label sets are formatted once per route) and touches no database.
+"""
+
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterable, List, Tuple
+
+# Seconds - covers cached lookups through slow report queries
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_bounds")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._bounds = [_number(bound) for bound in buckets] + ["+Inf"]
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        return zip(self._bounds, accumulate(self.counts + [self.count - sum(self.counts)]))
+
+
+class RequestMetrics:
+    """Per-route request counters and latency histograms (route template labels, not raw paths)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.db_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], int] = {}
+        self.label_cache: Dict[Tuple[str, str], str] = {}  # formatted once per route
+
+    def observe(self, method: str, route: str, status: int, wall_seconds: float,
+                db_seconds: float, queries: int):
+        key = (method, route)
+        self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+        if key not in self.latency:
+            self.latency[key] = Histogram(self.buckets)
+            self.db_latency[key] = Histogram(self.buckets)
+        self.latency[key].observe(wall_seconds)
+        self.db_latency[key].observe(db_seconds)
+        self.queries[key] = self.queries.get(key, 0) + queries
+
+
+request_metrics = RequestMetrics()
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else f"{value:.1f}"
+    return str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    """'a="1",b="2"' - without braces so histograms can append le"""
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class _Exposition:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value, labels: str = ""):
+        self.lines.append(f"{name}{{{labels}}} {_number(value)}" if labels else f"{name} {_number(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, labels: str):
+        prefix = f"{name}_bucket{{{labels},le=" if labels else f"{name}_bucket{{le="
+        self.lines.extend(f'{prefix}"{bound}"}} {count}' for bound, count in histogram.cumulative())
+        self.sample(f"{name}_sum", histogram.sum, labels)
+        self.sample(f"{name}_count", histogram.count, labels)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _request_families(out: _Exposition, metrics: RequestMetrics):
+    label_cache = metrics.label_cache
+
+    def route_labels(method: str, route: str) -> str:
+        labels = label_cache.get((method, route))
+        if labels is None:
+            labels = label_cache[(method, route)] = _labels(method=method, route=route)
+        return labels
+
+    out.family("crm_http_requests_total", "counter", "HTTP requests by route template and status")
+    for (method, route, status), count in list(metrics.requests.items()):
+        out.sample("crm_http_requests_total", count, f'{route_labels(method, route)},status="{status}"')
+
+    out.family("crm_http_request_duration_seconds", "histogram", "Request wall time")
+    for (method, route), histogram in list(metrics.latency.items()):
+        out.histogram("crm_http_request_duration_seconds", histogram, route_labels(method, route))
+
+    out.family("crm_http_request_db_seconds", "histogram", "Time spent in SQL per request")
+    for (method, route), histogram in list(metrics.db_latency.items()):
+        out.histogram("crm_http_request_db_seconds", histogram, route_labels(method, route))
+
+    out.family("crm_http_request_queries_total", "counter", "SQL statements issued by requests")
+    for (method, route), count in list(metrics.queries.items()):
+        out.sample("crm_http_request_queries_total", count, route_labels(method, route))
+
+
+def _db_families(out: _Exposition):
+    import database
+
+    out.family("crm_db_connections_open", "gauge", "MySQL connections currently checked out via get_db()")
+    out.sample("crm_db_connections_open", database.connection_stats["open"])
+    out.family("crm_db_connections_opened_total", "counter", "MySQL connections opened via get_db()")
+    out.sample("crm_db_connections_opened_total", database.connection_stats["opened"])
+
+
+def _session_families(out: _Exposition):
+    from core import sessions
+
+    out.family("crm_active_sessions", "gauge", "Sessions held in this worker's session store")
+    out.sample("crm_active_sessions", len(sessions))
+
+
+def _cache_families(out: _Exposition):
+    from followups import followup_counts
+    from lead_facets import facet_cache
+
+    caches = (("lead_facets", facet_cache), ("followup_counts", followup_counts))
+    out.family("crm_cache_requests_total", "counter", "Cache lookups by result")
+    for name, cache in caches:
+        out.sample("crm_cache_requests_total", cache.hits, _labels(cache=name, result="hit"))
+        out.sample("crm_cache_requests_total", cache.misses, _labels(cache=name, result="miss"))
+    out.family("crm_cache_hit_ratio", "gauge", "Cache hits / lookups since start")
+    for name, cache in caches:
+        lookups = cache.hits + cache.misses
+        out.sample("crm_cache_hit_ratio", cache.hits / lookups if lookups else 0.0, _labels(cache=name))
+
+
+def _job_families(out: _Exposition, scheduler):
+    jobs = list(scheduler.jobs.values())
+    out.family("crm_job_runs_total", "counter", "Background job runs by outcome")
+    for job in jobs:
+        out.sample("crm_job_runs_total", job.metrics["runs"], _labels(job=job.name, outcome="ok"))
+        out.sample("crm_job_runs_total", job.metrics["errors"], _labels(job=job.name, outcome="error"))
+        out.sample("crm_job_runs_total", job.metrics["skipped"], _labels(job=job.name, outcome="skipped_locked"))
+    out.family("crm_job_duration_seconds", "histogram", "Background job run time (runs that took the lock)")
+    for job in jobs:
+        out.histogram("crm_job_duration_seconds", job.durations, _labels(job=job.name))
+    out.family("crm_job_last_duration_seconds", "gauge", "Duration of the most recent run")
+    for job in jobs:
+        if job.metrics["last_duration_ms"] is not None:
+            out.sample("crm_job_last_duration_seconds", job.metrics["last_duration_ms"] / 1000, _labels(job=job.name))
+
+
+def render_metrics(scheduler=None, metrics: RequestMetrics = request_metrics) -> str:
+    """Prometheus text exposition for this worker"""
+    out = _Exposition()
+    _request_families(out, metrics)
+    _db_families(out)
+    _session_families(out)
+    _cache_families(out)
+    if scheduler is not None:
+        _job_families(out, scheduler)
+    return out.text()
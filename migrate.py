@@ -0,0 +1,181 @@
+"""
+Schema migrations
+Database schema ko versioned migrations se update karta hai - up to date ho to startup par sirf ek query
+
+Migrations live in migrations/ as NNNN_description.py files, each with an
+upgrade(cursor) function, and run in version order. Applied versions are
+recorded in schema_version. When the newest file is already recorded the
+runner issues a single SELECT and returns.
+
+Otherwise it takes a MySQL named lock (so only one worker migrates), re-reads
+the version and applies whatever is pending. MySQL commits DDL implicitly, so a
+migration that fails half way is not rolled back - write every migration so it
+can safely run again (IF NOT EXISTS, create_index, INSERT IGNORE ...).
+
+Usage:
+    python migrate.py           apply pending migrations
+    python migrate.py status    show applied / pending versions
+"""
+
+import argparse
+import importlib
+import os
+import re
+import time
+from typing import List, Optional
+
+import pymysql
+
+MIGRATIONS_PACKAGE = "migrations"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), MIGRATIONS_PACKAGE)
+MIGRATION_LOCK_NAME = "crm_schema_migrate"
+MIGRATION_LOCK_TIMEOUT = 120  # seconds another worker waits for a running migration
+
+_MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.py$")
+_NO_SUCH_TABLE = 1146
+
+
+class Migration:
+    """One migrations/NNNN_name.py file"""
+
+    def __init__(self, version: int, name: str, module_name: str):
+        self.version = version
+        self.name = name
+        self.module_name = module_name
+
+    def upgrade(self, cursor):
+        importlib.import_module(self.module_name).upgrade(cursor)
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Migration files in version order (modules are only imported when applied)"""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2),
+                                        f"{MIGRATIONS_PACKAGE}.{filename[:-3]}"))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def current_version(cursor) -> Optional[int]:
+    """Highest applied version, 0 for an empty table, None if schema_version doesn't exist yet"""
+    try:
+        cursor.execute("SELECT MAX(version) as version FROM schema_version")
+    except pymysql.err.ProgrammingError as e:
+        if e.args and e.args[0] == _NO_SUCH_TABLE:
+            return None
+        raise
+    row = cursor.fetchone()
+    return int(row['version'] or 0) if row else 0
+
+
+def ensure_version_table(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        duration_ms INT
+    )
+    ''')
+
+
+def index_exists(cursor, table: str, index_name: str) -> bool:
+    cursor.execute('''
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    ''', (table, index_name))
+    return cursor.fetchone() is not None
+
+
+def create_index(cursor, table: str, index_name: str, columns: str):
+    """CREATE INDEX unless it already exists (helper for migrations)"""
+    if not index_exists(cursor, table, index_name):
+        cursor.execute(f"CREATE INDEX {index_name} ON {table}({columns})")
+
+
+def column_exists(cursor, table: str, column: str) -> bool:
+    cursor.execute('''
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+    ''', (table, column))
+    return cursor.fetchone() is not None
+
+
+def run_migrations(conn, migrations: Optional[List[Migration]] = None) -> dict:
+    """Apply pending migrations. One query when already up to date."""
+    migrations = discover_migrations() if migrations is None else migrations
+    latest = migrations[-1].version if migrations else 0
+    cursor = conn.cursor()
+
+    version = current_version(cursor)
+    if version is not None and version >= latest:
+        return {"status": "up_to_date", "version": version, "applied": []}
+
+    cursor.execute("SELECT GET_LOCK(%s, %s) as acquired", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+    row = cursor.fetchone()
+    if not row or not row.get('acquired'):
+        raise RuntimeError(f"Could not acquire migration lock '{MIGRATION_LOCK_NAME}'")
+
+    applied = []
+    try:
+        ensure_version_table(cursor)
+        # Another worker may have finished while we waited for the lock
+        version = current_version(cursor) or 0
+        for migration in migrations:
+            if migration.version <= version:
+                continue
+            started = time.perf_counter()
+            migration.upgrade(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, name, duration_ms) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, int((time.perf_counter() - started) * 1000))
+            )
+            conn.commit()
+            applied.append(f"{migration.version:04d}_{migration.name}")
+            version = migration.version
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+
+    return {"status": "migrated" if applied else "up_to_date", "version": version, "applied": applied}
+
+
+def migration_status(conn) -> list:
+    cursor = conn.cursor()
+    applied = {}
+    if current_version(cursor) is not None:
+        cursor.execute("SELECT version, applied_at, duration_ms FROM schema_version")
+        applied = {row['version']: row for row in cursor.fetchall() or []}
+    return [
+        {
+            "version": m.version,
+            "name": m.name,
+            "applied_at": applied[m.version]['applied_at'] if m.version in applied else None,
+            "duration_ms": applied[m.version]['duration_ms'] if m.version in applied else None,
+        }
+        for m in discover_migrations()
+    ]
+
+
+if __name__ == "__main__":
+    from database import get_db
+
+    parser = argparse.ArgumentParser(description="Apply CRM schema migrations")
+    parser.add_argument("command", nargs="?", choices=["up", "status"], default="up")
+    args = parser.parse_args()
+
+    with get_db() as conn:
+        if args.command == "status":
+            for entry in migration_status(conn):
+                state = f"applied {entry['applied_at']}" if entry['applied_at'] else "pending"
+                print(f"{entry['version']:04d}_{entry['name']}: {state}")
+        else:
+            result = run_migrations(conn)
+            print(f"✅ Schema at version {result['version']} (applied: {', '.join(result['applied']) or 'none'})")
@@ -0,0 +1,247 @@
+"""
+Initial schema - every table init_database used to create on each boot
+Sab tables CREATE TABLE IF NOT EXISTS se, existing databases par no-op
+"""
+
+from lead_facts import create_fact_tables
+
+
+def upgrade(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lead_reports (
+        id VARCHAR(64) PRIMARY KEY,
+        lead_id VARCHAR(64),
+        name VARCHAR(255),
+        description TEXT,
+        filename VARCHAR(255),
+        uploaded_at DATETIME,
+        uploaded_by VARCHAR(128)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS designations (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(255) UNIQUE NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(255) UNIQUE NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        first_name VARCHAR(255),
+        last_name VARCHAR(255),
+        full_name VARCHAR(255) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        designation VARCHAR(255),
+        mobile_no VARCHAR(50),
+        date_of_birth DATE,
+        photo TEXT,
+        role VARCHAR(50) NOT NULL,
+        permissions TEXT,
+        is_active TINYINT(1) DEFAULT 1,
+        created_by INT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_login TIMESTAMP NULL
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS leads (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        lead_id VARCHAR(255) UNIQUE NOT NULL,
+        lead_date DATE NOT NULL,
+        lead_source VARCHAR(255),
+        lead_type VARCHAR(255),
+        lead_owner VARCHAR(255),
+        staff_location VARCHAR(255),
+        designation VARCHAR(255),
+        company_name VARCHAR(500) NOT NULL,
+        industry_type VARCHAR(255),
+        `system` VARCHAR(255),
+        project_amc VARCHAR(255),
+        state VARCHAR(255),
+        district VARCHAR(255),
+        city VARCHAR(255),
+        pin_code VARCHAR(20),
+        full_address TEXT,
+        company_website VARCHAR(500),
+        company_linkedin_link VARCHAR(500),
+        sub_industry VARCHAR(255),
+        gstin VARCHAR(50),
+        customer_name VARCHAR(255) NOT NULL,
+        contact_no VARCHAR(50) NOT NULL,
+        email_id VARCHAR(255) NOT NULL,
+        linkedin_profile VARCHAR(500),
+        designation_customer VARCHAR(255),
+        method_of_communication VARCHAR(100) DEFAULT 'Email',
+        lead_status VARCHAR(100) DEFAULT 'New',
+        purpose_of_meeting TEXT,
+        meeting_outcome TEXT,
+        discussion_held TEXT,
+        remarks TEXT,
+        next_follow_up_date DATE,
+        prospect VARCHAR(255),
+        approx_value DECIMAL(15,2),
+        negotiated_value DECIMAL(15,2),
+        closing_amount DECIMAL(15,2),
+        margin_percent DECIMAL(7,2),
+        gross_margin_amount DECIMAL(15,2),
+        net_margin_amount DECIMAL(15,2),
+        received_amount DECIMAL(15,2),
+        balance_amount DECIMAL(15,2),
+        payment_term VARCHAR(255),
+        lead_closer_date DATE,
+        expected_lead_closer_month VARCHAR(20),
+        lead_aging INT DEFAULT 0,
+        lead_percentage INT DEFAULT 0,
+        created_by INT NOT NULL,
+        assigned_to INT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES users(id),
+        FOREIGN KEY (assigned_to) REFERENCES users(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lead_history (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        lead_id VARCHAR(255) NOT NULL,
+        field_name VARCHAR(255) NOT NULL,
+        old_value TEXT,
+        new_value TEXT,
+        changed_by INT NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (changed_by) REFERENCES users(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lead_status_history (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        lead_id VARCHAR(255) NOT NULL,
+        old_status VARCHAR(100),
+        new_status VARCHAR(100),
+        remarks TEXT,
+        changed_by INT NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (changed_by) REFERENCES users(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lead_activities (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        lead_id VARCHAR(255) NOT NULL,
+        activity_type VARCHAR(100) NOT NULL,
+        description TEXT NOT NULL,
+        activity_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        performed_by INT NOT NULL,
+        FOREIGN KEY (performed_by) REFERENCES users(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lead_settings (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        setting_type VARCHAR(255) NOT NULL UNIQUE,
+        setting_data TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        updated_by INT,
+        FOREIGN KEY (updated_by) REFERENCES users(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS system_settings (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        setting_key VARCHAR(255) NOT NULL UNIQUE,
+        setting_value TEXT NOT NULL,
+        setting_type VARCHAR(50) DEFAULT 'string',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        updated_by INT,
+        FOREIGN KEY (updated_by) REFERENCES users(id)
+    )
+    ''')
+
+    # User activity audit table
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS audit_logs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT,
+        username VARCHAR(255),
+        action VARCHAR(255) NOT NULL,
+        resource_type VARCHAR(255),
+        resource_id VARCHAR(255),
+        method VARCHAR(50),
+        path TEXT,
+        ip_address VARCHAR(50),
+        user_agent TEXT,
+        status_code INT,
+        success TINYINT(1),
+        details TEXT,
+        session_token VARCHAR(255),
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS targets (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        type VARCHAR(100) NOT NULL,
+        target_value DECIMAL(15,2) NOT NULL,
+        current_value DECIMAL(15,2) DEFAULT 0,
+        assigned_to INT NOT NULL,
+        period VARCHAR(100) NOT NULL,
+        context_tab VARCHAR(100),
+        description TEXT,
+        is_active TINYINT(1) DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        created_by INT,
+        FOREIGN KEY (assigned_to) REFERENCES users(id),
+        FOREIGN KEY (created_by) REFERENCES users(id)
+    )
+    ''')
+
+    # Per day / per user pre-aggregated lead history (filled by lead_facts.py backfill + refresh job)
+    create_fact_tables(cursor)
+
+    # Create permissions table for hierarchical permission system
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS permissions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        permission_key VARCHAR(255) UNIQUE NOT NULL,
+        permission_name VARCHAR(255) NOT NULL,
+        parent_id INT,
+        category VARCHAR(100) NOT NULL,
+        level INT DEFAULT 0,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (parent_id) REFERENCES permissions(id)
+    )
+    ''')
+
+    # Create user_permissions table for direct user-based permission assignment
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_permissions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        permission_id INT NOT NULL,
+        granted TINYINT(1) DEFAULT 1,
+        granted_by INT,
+        granted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id),
+        FOREIGN KEY (permission_id) REFERENCES permissions(id),
+        FOREIGN KEY (granted_by) REFERENCES users(id),
+        UNIQUE(user_id, permission_id)
+    )
+    ''')
@@ -0,0 +1,35 @@
+"""
+Indexes previously attempted on every boot (and printed "Audit log error" once they existed)
+Har index sirf tab banta hai jab information_schema mein na ho
+"""
+
+from migrate import create_index
+
+
+def upgrade(cursor):
+    # Helpful indexes for audit queries
+    create_index(cursor, "audit_logs", "idx_audit_user_time", "user_id, created_at")
+    create_index(cursor, "audit_logs", "idx_audit_action_resource", "action, resource_type")
+
+    # Create indexes for faster permission lookups
+    create_index(cursor, "permissions", "idx_permissions_key", "permission_key")
+    create_index(cursor, "permissions", "idx_permissions_parent", "parent_id")
+    create_index(cursor, "user_permissions", "idx_user_permissions_user", "user_id")
+    create_index(cursor, "user_permissions", "idx_user_permissions_perm", "permission_id")
+
+    # Index for the follow-up worklist (per-user next_follow_up_date ranges)
+    create_index(cursor, "leads", "idx_leads_assigned_followup", "assigned_to, next_follow_up_date")
+
+    # Index for aging filters / sorts (lead_date ranges)
+    create_index(cursor, "leads", "idx_leads_lead_date", "lead_date")
+
+    # Index for ETag version probes (MAX(updated_at) on leads)
+    create_index(cursor, "leads", "idx_leads_updated_at", "updated_at")
+
+    # Index for users list permission counts (grouped join on granted rows)
+    create_index(cursor, "user_permissions", "idx_user_permissions_user_granted", "user_id, granted")
+
+    # Indexes for target progress aggregates (changed_by IN (...) AND changed_at range)
+    create_index(cursor, "lead_status_history", "idx_lsh_changed_by_at", "changed_by, changed_at")
+    create_index(cursor, "lead_status_history", "idx_lsh_lead_changed_by", "lead_id, changed_by, changed_at")
+    create_index(cursor, "lead_history", "idx_lead_history_field_by_at", "field_name, changed_by, changed_at")
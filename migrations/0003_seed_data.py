@@ -0,0 +1,176 @@
+"""
+Seed data - hierarchical permissions and the default admin user
+Permissions seed + admin user; sab admins ko saari permissions ek INSERT ... SELECT se
+"""
+
+import hashlib
+import json
+
+
+def seed_permissions(cursor):
+    """Seed hierarchical permissions into database"""
+    permissions = []
+    
+    # Helper to add permission
+    def add_perm(key, name, parent_id, category, level, desc=""):
+        cursor.execute('''
+        INSERT INTO permissions (permission_key, permission_name, parent_id, category, level, description)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ''', (key, name, parent_id, category, level, desc))
+        return cursor.lastrowid
+    
+    # ROOT LEVEL - Pages (Level 0)
+    dashboard_id = add_perm("dashboard", "Dashboard", None, "page", 0, "Access to dashboard page")
+    leads_id = add_perm("leads", "Leads", None, "page", 0, "Access to leads page")
+    add_lead_id = add_perm("add_lead", "Add Lead", None, "page", 0, "Access to add lead page")
+    target_id = add_perm("target_management", "Target Management", None, "page", 0, "Access to target management")
+    settings_id = add_perm("lead_settings", "Lead Settings", None, "page", 0, "Access to lead settings")
+    users_id = add_perm("users", "Users", None, "page", 0, "Access to users management")
+    control_id = add_perm("control_panel", "Control Panel", None, "page", 0, "Access to control panel")
+    
+    # DASHBOARD - Level 1 & 2
+    dash_kpis_id = add_perm("dashboard.view_kpis", "View KPIs", dashboard_id, "feature", 1, "View all KPIs")
+    add_perm("dashboard.kpi.total_leads", "Total Leads KPI", dash_kpis_id, "kpi", 2)
+    add_perm("dashboard.kpi.qualified_leads", "Qualified Leads KPI", dash_kpis_id, "kpi", 2)
+    add_perm("dashboard.kpi.won_deals", "Won Deals KPI", dash_kpis_id, "kpi", 2)
+    add_perm("dashboard.kpi.total_revenue", "Total Revenue KPI", dash_kpis_id, "kpi", 2)
+    add_perm("dashboard.kpi.avg_lead_value", "Avg Lead Value KPI", dash_kpis_id, "kpi", 2)
+    add_perm("dashboard.kpi.conversion_rate", "Conversion Rate KPI", dash_kpis_id, "kpi", 2)
+    
+    dash_charts_id = add_perm("dashboard.view_charts", "View Charts", dashboard_id, "feature", 1, "View all charts")
+    add_perm("dashboard.chart.revenue", "Revenue Chart", dash_charts_id, "chart", 2)
+    add_perm("dashboard.chart.lead_source", "Lead Source Chart", dash_charts_id, "chart", 2)
+    add_perm("dashboard.chart.monthly_trend", "Monthly Trend Chart", dash_charts_id, "chart", 2)
+    add_perm("dashboard.chart.status_distribution", "Status Distribution Chart", dash_charts_id, "chart", 2)
+    
+    # LEADS PAGE - Level 1 & 2
+    add_perm("leads.view_table", "View Leads Table", leads_id, "feature", 1, "View leads table")
+    
+    leads_actions_id = add_perm("leads.actions", "Lead Actions", leads_id, "feature", 1, "Perform actions on leads")
+    add_perm("leads.action.add", "Add Lead", leads_actions_id, "action", 2)
+    add_perm("leads.action.edit", "Edit Lead", leads_actions_id, "action", 2)
+    add_perm("leads.action.delete", "Delete Lead", leads_actions_id, "action", 2)
+    add_perm("leads.action.export", "Export Leads", leads_actions_id, "action", 2)
+    add_perm("leads.action.bulk", "Bulk Operations", leads_actions_id, "action", 2)
+    
+    # LEADS - Table Columns
+    leads_cols_id = add_perm("leads.table_columns", "Table Columns", leads_id, "feature", 1, "View table columns")
+    columns = [
+        "lead_id", "lead_date", "company_name", "customer_name", "contact_no", "email_id",
+        "lead_source", "lead_type", "lead_status", "lead_owner", "assigned_to", "industry_type",
+        "state", "city", "method_of_communication", "next_follow_up_date", "prospect",
+        "purpose_of_meeting", "approx_value", "negotiated_value", "closing_amount",
+        "lead_percentage", "lead_aging", "meeting_outcome", "discussion_held", "remarks"
+    ]
+    for col in columns:
+        add_perm(f"leads.column.{col}", f"{col.replace('_', ' ').title()} Column", leads_cols_id, "column", 2)
+    
+    # LEADS - View Fields
+    leads_view_id = add_perm("leads.fields_view", "View Lead Fields", leads_id, "feature", 1, "View lead field values")
+    fields = [
+        "lead_id", "lead_date", "lead_source", "lead_type", "lead_owner", "designation",
+        "company_name", "industry_type", "system", "project_amc", "state", "district",
+        "city", "pin_code", "full_address", "company_website", "company_linkedin_link",
+        "sub_industry", "gstin", "customer_name", "contact_no", "email_id", "linkedin_profile",
+        "designation_customer", "method_of_communication", "lead_status", "purpose_of_meeting",
+        "meeting_outcome", "discussion_held", "remarks", "next_follow_up_date", "prospect",
+        "approx_value", "negotiated_value", "closing_amount", "lead_aging", "lead_percentage",
+        "created_by", "assigned_to", "created_at", "updated_at"
+    ]
+    for field in fields:
+        add_perm(f"leads.field.view.{field}", f"View {field.replace('_', ' ').title()}", leads_view_id, "field", 2)
+    
+    # LEADS - Edit Fields
+    leads_edit_id = add_perm("leads.fields_edit", "Edit Lead Fields", leads_id, "feature", 1, "Edit lead field values")
+    for field in fields:
+        add_perm(f"leads.field.edit.{field}", f"Edit {field.replace('_', ' ').title()}", leads_edit_id, "field", 2)
+    
+    # ADD LEAD PAGE
+    add_lead_view_id = add_perm("add_lead.view_form", "View Add Lead Form", add_lead_id, "feature", 1)
+    add_lead_fields_id = add_perm("add_lead.fields", "Add Lead Form Fields", add_lead_id, "feature", 1)
+    for field in fields[:35]:  # Most relevant fields for adding
+        add_perm(f"add_lead.field.{field}", f"{field.replace('_', ' ').title()} Field", add_lead_fields_id, "field", 2)
+    add_perm("add_lead.action.submit", "Submit New Lead", add_lead_id, "action", 1)
+    
+    # TARGET MANAGEMENT
+    add_perm("target_management.view_page", "View Targets", target_id, "feature", 1)
+    add_perm("target_management.action.add", "Add Target", target_id, "action", 1)
+    add_perm("target_management.action.edit", "Edit Target", target_id, "action", 1)
+    add_perm("target_management.action.delete", "Delete Target", target_id, "action", 1)
+    
+    # LEAD SETTINGS
+    settings_view_id = add_perm("lead_settings.view_page", "View Settings", settings_id, "feature", 1)
+    settings_tabs_id = add_perm("lead_settings.tabs", "Settings Tabs", settings_id, "feature", 1)
+    tabs = [
+        "status", "source", "type", "industry", "communication_method", "sub_industry",
+        "designation", "system", "project_amc", "state", "district", "prospect", "purpose_of_meeting"
+    ]
+    for tab in tabs:
+        add_perm(f"lead_settings.tab.{tab}", f"{tab.replace('_', ' ').title()} Tab", settings_tabs_id, "tab", 2)
+    add_perm("lead_settings.action.edit", "Edit Settings", settings_id, "action", 1)
+    
+    # USERS MANAGEMENT
+    add_perm("users.view_page", "View Users", users_id, "feature", 1)
+    add_perm("users.action.add", "Add User", users_id, "action", 1)
+    add_perm("users.action.edit", "Edit User", users_id, "action", 1)
+    add_perm("users.action.delete", "Delete User", users_id, "action", 1)
+    add_perm("users.manage_permissions", "Manage User Permissions", users_id, "action", 1, "Access permission management")
+    
+    # CONTROL PANEL
+    add_perm("control_panel.view_page", "View Control Panel", control_id, "feature", 1)
+    add_perm("control_panel.backup", "Database Backup", control_id, "action", 1)
+    add_perm("control_panel.audit_logs", "View Audit Logs", control_id, "feature", 1)
+    
+    cursor.execute('SELECT COUNT(*) as count FROM permissions')
+    perm_count_result = cursor.fetchone()
+    perm_count = perm_count_result['count'] if perm_count_result else 0
+    print(f"✅ {perm_count} permissions seeded!")
+
+
+def grant_all_permissions_to_admins(cursor):
+    """Give every admin every permission - one set-based statement"""
+    cursor.execute('''
+    INSERT IGNORE INTO user_permissions (user_id, permission_id, granted, granted_by)
+    SELECT u.id, p.id, 1, u.id
+    FROM users u
+    CROSS JOIN permissions p
+    WHERE u.role = 'admin'
+    ''')
+
+
+def upgrade(cursor):
+    # Seed permissions (hierarchical structure)
+    cursor.execute('SELECT COUNT(*) as count FROM permissions')
+    perm_count_result = cursor.fetchone()
+    perm_count = perm_count_result['count'] if perm_count_result else 0
+
+    if perm_count == 0:
+        print("🔐 Seeding permissions...")
+        seed_permissions(cursor)
+
+    # Create the default admin user if there is none
+    cursor.execute('SELECT COUNT(*) as count FROM users WHERE role = %s', ("admin",))
+    result = cursor.fetchone()
+    admin_count = result['count'] if result else 0
+
+    if admin_count == 0:
+        default_admin_permissions = {
+            'can_view_leads': True,
+            'can_create_leads': True,
+            'can_edit_leads': True,
+            'can_delete_leads': True,
+            'can_view_users': True,
+            'can_manage_users': True,
+            'can_view_reports': True,
+            'can_export_data': True
+        }
+
+        hashed_password = hashlib.sha256("admin123".encode()).hexdigest()
+        cursor.execute('''
+        INSERT INTO users (username, password, full_name, email, role, permissions, created_by)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ''', ('admin', hashed_password, 'Administrator', 'admin@crm.com', 'admin',
+              json.dumps(default_admin_permissions), 1))
+        print("✅ Admin user created (username: admin, password: admin123)")
+
+    grant_all_permissions_to_admins(cursor)
@@ -0,0 +1,64 @@
+"""
+Monthly RANGE partitions for audit_logs (retention drops whole partitions)
+audit_logs ko created_at ke mahine ke hisaab se partition karta hai
+
+MySQL requires every unique key of a partitioned table to contain the
+partitioning column and doesn't allow foreign keys on it, so the primary key
+becomes (id, created_at) and the user_id -> users FK is dropped (audit rows
+are meant to outlive the user anyway). created_at becomes NOT NULL.
+
+The final ALTER rebuilds the table - on a large audit_logs run migrate.py in a
+maintenance window. Every step checks the current state first, so a re-run
+after a failure continues where it stopped.
+"""
+
+from datetime import datetime
+
+from audit_archive import AUDIT_TABLE, PARTITIONS_AHEAD, add_months, list_partitions, month_start, partition_clauses
+
+
+def _foreign_keys(cursor):
+    cursor.execute('''
+        SELECT constraint_name as name
+        FROM information_schema.key_column_usage
+        WHERE table_schema = DATABASE() AND table_name = %s AND referenced_table_name IS NOT NULL
+    ''', (AUDIT_TABLE,))
+    return [row['name'] for row in cursor.fetchall() or []]
+
+
+def _primary_key_columns(cursor):
+    cursor.execute('''
+        SELECT column_name as name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = 'PRIMARY'
+        ORDER BY seq_in_index
+    ''', (AUDIT_TABLE,))
+    return [row['name'].lower() for row in cursor.fetchall() or []]
+
+
+def upgrade(cursor):
+    if list_partitions(cursor):
+        return
+
+    for name in _foreign_keys(cursor):
+        cursor.execute(f"ALTER TABLE {AUDIT_TABLE} DROP FOREIGN KEY `{name}`")
+
+    if _primary_key_columns(cursor) != ["id", "created_at"]:
+        cursor.execute(f"UPDATE {AUDIT_TABLE} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+        cursor.execute(f'''
+        ALTER TABLE {AUDIT_TABLE}
+            MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (id, created_at)
+        ''')
+
+    cursor.execute(f"SELECT MIN(created_at) as oldest, COUNT(*) as count FROM {AUDIT_TABLE}")
+    row = cursor.fetchone() or {}
+    current_month = month_start(datetime.now())
+    first_month = month_start(row['oldest']) if row.get('oldest') else current_month
+    clauses = partition_clauses(min(first_month, current_month), add_months(current_month, PARTITIONS_AHEAD))
+    print(f"🗂️ Partitioning {AUDIT_TABLE} ({row.get('count', 0)} rows, {len(clauses) - 1} monthly partitions)...")
+    cursor.execute(
+        f"ALTER TABLE {AUDIT_TABLE} PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) ("
+        + ", ".join(clauses) + ")"
+    )
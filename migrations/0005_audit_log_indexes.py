@@ -0,0 +1,26 @@
+"""
+Composite indexes for /api/audit/logs filters + keyset order
+Har filter combination ke liye (filter, created_at, id) index - ORDER BY created_at DESC, id DESC bina filesort
+
+The page query is `WHERE <equality filters> [AND created_at range]
+[AND (created_at, id) < cursor] ORDER BY created_at DESC, id DESC LIMIT n`, so
+each index is the equality columns followed by (created_at, id) and MySQL
+reads the page straight off the index backwards. user_id is the most
+selective filter: with it, idx_audit_user_time (user_id, created_at + the
+primary key's id) serves the page and action / resource_type are checked on
+the rows it reads. idx_audit_action_resource is a prefix of the new
+action + resource_type index and is dropped.
+"""
+
+from migrate import create_index, index_exists
+
+
+def upgrade(cursor):
+    # No filter / date range only (also /api/security-audit-table's latest-rows query)
+    create_index(cursor, "audit_logs", "idx_audit_created_id", "created_at, id")
+    create_index(cursor, "audit_logs", "idx_audit_action_time", "action, created_at, id")
+    create_index(cursor, "audit_logs", "idx_audit_resource_time", "resource_type, created_at, id")
+    create_index(cursor, "audit_logs", "idx_audit_action_resource_time", "action, resource_type, created_at, id")
+
+    if index_exists(cursor, "audit_logs", "idx_audit_action_resource"):
+        cursor.execute("DROP INDEX idx_audit_action_resource ON audit_logs")
@@ -0,0 +1,33 @@
+"""
+Microsecond updated_at for leads and lead_settings
+ETag version columns - ek second mein do edits ka bhi alag version
+
+/api/leads/{lead_id} and /api/dashboard/stats build their ETags from
+leads.updated_at (and MAX(lead_settings.updated_at)). At second resolution two
+edits within the same second left the version unchanged, so a client holding
+the first copy got a 304 for stale data. TIMESTAMP(6) keeps the same column
+semantics (ON UPDATE, nullable) with microseconds.
+"""
+
+COLUMNS = (("leads", "updated_at"), ("lead_settings", "updated_at"))
+
+
+def _precision(cursor, table, column):
+    cursor.execute('''
+        SELECT datetime_precision as `precision`
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    ''', (table, column))
+    row = cursor.fetchone()
+    return row['precision'] if row else None
+
+
+def upgrade(cursor):
+    for table, column in COLUMNS:
+        precision = _precision(cursor, table, column)
+        if precision is None or precision >= 6:
+            continue
+        cursor.execute(f'''
+        ALTER TABLE {table}
+            MODIFY {column} TIMESTAMP(6) NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+        ''')
@@ -0,0 +1,4 @@
+"""
+Schema migrations, applied in order by migrate.py
+New file = next number: NNNN_short_description.py with an idempotent upgrade(cursor)
+"""
@@ -0,0 +1,130 @@
+"""
+Request / response models
+API ke Pydantic models (users, login, leads)
+"""
+
+from datetime import date
+from enum import Enum
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+class UserRole(str, Enum):
+    ADMIN = "admin"
+    MANAGER = "manager"
+    SALES = "sales"
+    VIEWER = "viewer"
+
+class UserPermissions(BaseModel):
+    can_view_leads: bool = True
+    can_create_leads: bool = True
+    can_edit_leads: bool = True
+    can_delete_leads: bool = False
+    can_view_users: bool = False
+    can_manage_users: bool = False
+    can_view_reports: bool = True
+    can_export_data: bool = True
+
+class UserCreate(BaseModel):
+    username: str
+    password: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    full_name: str
+    email: str
+    designation: Optional[str] = None
+    mobile_no: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    photo: Optional[str] = None
+    role: UserRole = UserRole.SALES
+    permissions: Optional[Dict[str, bool]] = None
+
+class UserUpdate(BaseModel):
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[UserRole] = None
+    permissions: Optional[Dict[str, bool]] = None
+    is_active: Optional[bool] = None
+
+class LoginRequest(BaseModel):
+    username: str
+    password: str
+
+class LeadCreate(BaseModel):
+    lead_date: str
+    lead_source: str
+    lead_type: str
+    lead_status: Optional[str] = None
+    method_of_communication: Optional[str] = None
+    lead_owner: Optional[str] = None
+    assigned_to: Optional[int] = None
+    staff_location: Optional[str] = None
+    designation: str
+    company_name: str
+    industry_type: str
+    system: str
+    project_amc: str
+    state: str
+    district: str
+    city: str
+    pin_code: str
+    full_address: str
+    company_website: Optional[str] = None
+    company_linkedin_link: Optional[str] = None
+    sub_industry: Optional[str] = None
+    gstin: Optional[str] = None
+    customer_name: str
+    contact_no: str
+    email_id: str
+    linkedin_profile: Optional[str] = None
+    designation_customer: Optional[str] = None
+    margin_percent: Optional[float] = None
+    gross_margin_amount: Optional[float] = None
+    net_margin_amount: Optional[float] = None
+    received_amount: Optional[float] = None
+    balance_amount: Optional[float] = None
+    lead_closer_date: Optional[str] = None  # ISO date string
+    expected_lead_closer_month: Optional[str] = None
+
+class LeadUpdate(BaseModel):
+    lead_type: Optional[str] = None
+    lead_owner: Optional[str] = None
+    assigned_to: Optional[int] = None
+    designation: Optional[str] = None
+    company_name: Optional[str] = None
+    industry_type: Optional[str] = None
+    sub_industry: Optional[str] = None
+    system: Optional[str] = None
+    project_amc: Optional[str] = None
+    company_website: Optional[str] = None
+    company_linkedin_profile: Optional[str] = None
+    state: Optional[str] = None
+    district: Optional[str] = None
+    city: Optional[str] = None
+    pin_code: Optional[str] = None
+    full_address: Optional[str] = None
+    customer_name: Optional[str] = None
+    contact_no: Optional[str] = None
+    email_id: Optional[str] = None
+    linkedin_profile: Optional[str] = None
+    designation_customer: Optional[str] = None
+    method_of_communication: Optional[str] = None
+    lead_status: Optional[str] = None
+    purpose_of_meeting: Optional[str] = None
+    meeting_outcome: Optional[str] = None
+    discussion_held: Optional[str] = None
+    remarks: Optional[str] = None
+    next_follow_up_date: Optional[str] = None
+    prospect: Optional[str] = None
+    approx_value: Optional[float] = None
+    negotiated_value: Optional[float] = None
+    closing_amount: Optional[float] = None
+    gstin: Optional[str] = None
+    lead_percentage: Optional[int] = None
+    margin_percent: Optional[float] = None
+    gross_margin_amount: Optional[float] = None
+    net_margin_amount: Optional[float] = None
+    received_amount: Optional[float] = None
+    balance_amount: Optional[float] = None
+    lead_closer_date: Optional[str] = None
+    expected_lead_closer_month: Optional[str] = None
@@ -0,0 +1,183 @@
+"""
+Period parser for targets and reports
+Period string -> half-open [start, end) datetime range
+
+Supported forms (case-insensitive):
+    daily / today, weekly, monthly, quarterly, yearly   rolling, relative to today
+    fiscal_yearly, fiscal_quarterly                     current fiscal year / quarter
+    2027                                                calendar year
+    2027-Q3                                             calendar quarter
+    2027-03                                             month
+    2027-W09                                            ISO week (Monday start)
+    2027-03-15                                          single day
+    2027-01-01..2027-03-31  or  2027-01-01/2027-03-31   custom range, both ends inclusive
+    FY2027, FY2026-27                                   fiscal year ending in 2027
+    FY2027-Q1                                           first quarter of that fiscal year
+
+Fiscal years start in FISCAL_YEAR_START_MONTH (April). Ranges are half-open so
+queries use `changed_at >= start AND changed_at < end` - no 23:59:59 edge cases.
+Results are memoized per (period string, day).
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+
+FISCAL_YEAR_START_MONTH = 4  # April - Indian financial year
+
+_YEAR = re.compile(r"^(\d{4})$")
+_QUARTER = re.compile(r"^(\d{4})-?Q([1-4])$")
+_MONTH = re.compile(r"^(\d{4})-(\d{2})$")
+_WEEK = re.compile(r"^(\d{4})-?W(\d{2})$")
+_DAY = re.compile(r"^(\d{4}-\d{2}-\d{2})$")
+_RANGE = re.compile(r"^(\d{4}-\d{2}-\d{2})\s*(?:\.\.|/)\s*(\d{4}-\d{2}-\d{2})$")
+_FISCAL_YEAR = re.compile(r"^FY\s?(\d{4})(?:-(\d{2}))?$")
+_FISCAL_QUARTER = re.compile(r"^FY\s?(\d{4})(?:-(\d{2}))?-?Q([1-4])$")
+
+
+class PeriodError(ValueError):
+    """Period string that cannot be turned into a date range"""
+
+
+def _month_start(year: int, month: int) -> datetime:
+    # month may run past 12 - normalise into the following years
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return datetime(year, month, 1)
+
+
+def _day(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise PeriodError(f"Invalid date in period: {value}")
+
+
+def _fiscal_year_start(end_year: int, start_month: int) -> datetime:
+    """First day of the fiscal year that ends in end_year"""
+    if start_month == 1:
+        return datetime(end_year, 1, 1)
+    return datetime(end_year - 1, start_month, 1)
+
+
+def _fiscal_end_year(end_year: str, short_suffix: Optional[str]) -> int:
+    """FY2027 -> 2027, FY2026-27 -> 2027"""
+    year = int(end_year)
+    if short_suffix is None:
+        return year
+    suffix = int(short_suffix)
+    if suffix != (year + 1) % 100:
+        raise PeriodError(f"Fiscal year FY{end_year}-{short_suffix} is not consecutive")
+    return year + 1
+
+
+def _current_fiscal_end_year(today: date, start_month: int) -> int:
+    if start_month == 1:
+        return today.year
+    return today.year + 1 if today.month >= start_month else today.year
+
+
+def _parse_range(period: str, today: date, fiscal_start_month: int) -> Tuple[datetime, datetime]:
+    key = period.strip().upper()
+    midnight = datetime(today.year, today.month, today.day)
+
+    if key in ("DAILY", "TODAY"):
+        return midnight, midnight + timedelta(days=1)
+    if key == "WEEKLY":
+        start = midnight - timedelta(days=today.weekday())
+        return start, start + timedelta(days=7)
+    if key == "MONTHLY":
+        start = datetime(today.year, today.month, 1)
+        return start, _month_start(today.year, today.month + 1)
+    if key == "QUARTERLY":
+        first_month = (today.month - 1) // 3 * 3 + 1
+        return datetime(today.year, first_month, 1), _month_start(today.year, first_month + 3)
+    if key == "YEARLY":
+        return datetime(today.year, 1, 1), datetime(today.year + 1, 1, 1)
+    if key in ("FISCAL_YEARLY", "FISCAL_YEAR"):
+        start = _fiscal_year_start(_current_fiscal_end_year(today, fiscal_start_month), fiscal_start_month)
+        return start, _month_start(start.year, start.month + 12)
+    if key in ("FISCAL_QUARTERLY", "FISCAL_QUARTER"):
+        offset = (today.month - fiscal_start_month) % 12 // 3 * 3
+        start = _month_start(today.year if today.month >= fiscal_start_month else today.year - 1,
+                             fiscal_start_month + offset)
+        return start, _month_start(start.year, start.month + 3)
+
+    match = _YEAR.match(key)
+    if match:
+        year = int(match.group(1))
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+    match = _QUARTER.match(key)
+    if match:
+        year, quarter = int(match.group(1)), int(match.group(2))
+        first_month = (quarter - 1) * 3 + 1
+        return datetime(year, first_month, 1), _month_start(year, first_month + 3)
+
+    match = _MONTH.match(key)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+        if not 1 <= month <= 12:
+            raise PeriodError(f"Invalid month in period: {period}")
+        return datetime(year, month, 1), _month_start(year, month + 1)
+
+    match = _WEEK.match(key)
+    if match:
+        try:
+            start = datetime.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+        except ValueError:
+            raise PeriodError(f"Invalid ISO week in period: {period}")
+        return start, start + timedelta(days=7)
+
+    match = _DAY.match(key)
+    if match:
+        start = _day(match.group(1))
+        return start, start + timedelta(days=1)
+
+    match = _RANGE.match(key)
+    if match:
+        start, last = _day(match.group(1)), _day(match.group(2))
+        if last < start:
+            raise PeriodError(f"Period range ends before it starts: {period}")
+        return start, last + timedelta(days=1)
+
+    match = _FISCAL_QUARTER.match(key)
+    if match:
+        start = _fiscal_year_start(_fiscal_end_year(match.group(1), match.group(2)), fiscal_start_month)
+        start = _month_start(start.year, start.month + (int(match.group(3)) - 1) * 3)
+        return start, _month_start(start.year, start.month + 3)
+
+    match = _FISCAL_YEAR.match(key)
+    if match:
+        start = _fiscal_year_start(_fiscal_end_year(match.group(1), match.group(2)), fiscal_start_month)
+        return start, _month_start(start.year, start.month + 12)
+
+    raise PeriodError(f"Unrecognised period: {period}")
+
+
+@lru_cache(maxsize=1024)
+def _parse(period: str, today: date, fiscal_start_month: int) -> Tuple[datetime, datetime]:
+    try:
+        return _parse_range(period, today, fiscal_start_month)
+    except PeriodError:
+        raise
+    except (ValueError, OverflowError):
+        # Well-formed but outside datetime's years 1..9999 (9999, 0000, FY0001, 9999-W52, ...)
+        raise PeriodError(f"Period out of range: {period}")
+
+
+def parse_period(period: str, today: Optional[date] = None,
+                 fiscal_start_month: int = FISCAL_YEAR_START_MONTH) -> Tuple[datetime, datetime]:
+    """Half-open [start, end) range for a period string. Raises PeriodError if unrecognised or out of range."""
+    if not period or not period.strip():
+        raise PeriodError("Period is required")
+    return _parse(period, today or date.today(), fiscal_start_month)
+
+
+def is_valid_period(period: str) -> bool:
+    try:
+        parse_period(period)
+        return True
+    except PeriodError:
+        return False
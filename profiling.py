@@ -0,0 +1,168 @@
+"""
+On-demand request profiling
+Admin ke flag wale requests ko cProfile ke saath chalata hai aur profile disk par save karta hai
+
+Opt-in twice over: ProfilingMiddleware is only installed when
+Settings.profiling_enabled is set (otherwise it costs nothing), and then only
+profiles requests that carry `X-Profile: 1` or `?profile=1` from a logged-in
+admin, sampled at Settings.profile_sample_rate.
+
+Endpoints are async and run their DB calls on the event loop thread, so a
+cProfile of that thread covers the request. Anything else the loop runs in the
+meantime shows up too; one request is profiled at a time.
+
+Each run writes <id>.prof (pstats - open with snakeviz, or flameprof /
+gprof2dot for a flamegraph) plus <id>.json with the request details.
+/api/admin/profiles lists them.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+from datetime import datetime
+from time import perf_counter
+from typing import List, Optional
+
+from starlette.datastructures import Headers
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from request_timing import route_template
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_FLAG = "profile=1"
+PROFILE_ID = re.compile(r"^\d{8}T\d{6}_\d+_[\w-]+$")
+
+
+def _is_admin_session(headers: Headers) -> bool:
+    from core import sessions
+
+    token = cookie_parser(headers.get("cookie", "")).get("session_token")
+    session = sessions.get(token) if token else None
+    return bool(session and session.get("role") == "admin")
+
+
+def _slug(route: str) -> str:
+    return re.sub(r"[^\w-]+", "-", route).strip("-")[:60] or "root"
+
+
+class ProfileStore:
+    """<id>.prof + <id>.json pairs in one directory, oldest pruned past max_files"""
+
+    def __init__(self, directory: str = "profiles", max_files: int = 50):
+        self.directory = directory
+        self.max_files = max_files
+        self._counter = 0
+
+    def save(self, profiler: cProfile.Profile, meta: dict) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        self._counter += 1
+        profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}_{self._counter}_{_slug(meta['route'])}"
+        profiler.dump_stats(os.path.join(self.directory, f"{profile_id}.prof"))
+        with open(os.path.join(self.directory, f"{profile_id}.json"), "w") as f:
+            json.dump({"id": profile_id, **meta}, f)
+        self.prune()
+        return profile_id
+
+    def prune(self):
+        ids = self.ids()
+        for profile_id in ids[:-self.max_files] if len(ids) > self.max_files else []:
+            for suffix in (".prof", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def ids(self) -> List[str]:
+        """Oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        names = [name[:-5] for name in os.listdir(self.directory) if name.endswith(".json")]
+        # <timestamp>_<counter>_<route> - the counter orders profiles saved in the same second
+        return sorted((name for name in names if PROFILE_ID.match(name)),
+                      key=lambda name: (name[:15], int(name.split("_")[1])))
+
+    def list(self) -> List[dict]:
+        entries = []
+        for profile_id in reversed(self.ids()):
+            try:
+                with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def path(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.prof")
+        return path if os.path.isfile(path) else None
+
+    def summary(self, profile_id: str, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+        """pstats text report (top functions)"""
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """Profile flagged admin requests (install only when profiling is enabled)"""
+
+    def __init__(self, app: ASGIApp, store: ProfileStore, sample_rate: float = 1.0):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self._busy = threading.Lock()
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        headers = Headers(scope=scope)
+        flagged = headers.get(PROFILE_HEADER) == "1" or PROFILE_QUERY_FLAG in scope.get("query_string", b"").decode("latin-1")
+        if not flagged or random.random() >= self.sample_rate:
+            return False
+        return _is_admin_session(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            # Another profile is running - cProfile is per thread and would mix the two
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        started = perf_counter()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+            wall_ms = (perf_counter() - started) * 1000
+            profile_id = self.store.save(profiler, {
+                "method": scope["method"],
+                "route": route_template(scope),
+                "path": scope["path"],
+                "status": status,
+                "wall_ms": round(wall_ms, 1),
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+            })
+        finally:
+            self._busy.release()
+        print(f"🔬 Profiled {scope['method']} {scope['path']} -> {profile_id}")
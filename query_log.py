@@ -0,0 +1,184 @@
+"""
+Slow-query log and per-statement aggregates
+Har SQL statement ka fingerprint, count / total / p95 aur slow queries ka EXPLAIN
+
+InstrumentedCursor (database.py) hands every execute() to query_log.record().
+Statements are reduced to a fingerprint - literals and %s placeholders become
+?, IN lists collapse, whitespace is squeezed - so f-string queries that differ
+only in their values aggregate together. Statements slower than slow_ms are
+logged as one JSON line; with explain on, the first slow run of a fingerprint
+per EXPLAIN_INTERVAL also captures EXPLAIN FORMAT=JSON for it.
+
+Aggregates are per worker process; /api/admin/queries lists them.
+"""
+
+import json
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import pymysql.cursors
+
+# Recent durations kept per fingerprint for the p95
+QUERY_SAMPLE_SIZE = 256
+# Distinct fingerprints tracked; later ones are counted under OVERFLOW_FINGERPRINT
+MAX_FINGERPRINTS = 1000
+OVERFLOW_FINGERPRINT = "(other statements)"
+# Raw query text -> fingerprint memo (parameterised queries repeat verbatim)
+FINGERPRINT_CACHE_SIZE = 2048
+# Seconds before the same fingerprint is EXPLAINed again
+EXPLAIN_INTERVAL = 300
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*|#[^\n]*", re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBERS = re.compile(r"(?<![\w`.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.I)
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def fingerprint(query) -> str:
+    """Normalized statement text - same shape, same fingerprint"""
+    if isinstance(query, (bytes, bytearray)):
+        query = bytes(query).decode("utf-8", "replace")
+    text = _COMMENTS.sub(" ", query)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    text = _IN_LISTS.sub("(?+)", text)
+    return _VALUES_ROWS.sub(r"\1, ...", text)
+
+
+def bind_count(args) -> int:
+    if args is None:
+        return 0
+    if isinstance(args, (list, tuple, dict)):
+        return len(args)
+    return 1
+
+
+class QueryAggregate:
+    __slots__ = ("fingerprint", "count", "total", "max", "slow", "samples", "plan", "explained_at")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.samples = deque(maxlen=QUERY_SAMPLE_SIZE)
+        self.plan = None
+        self.explained_at = 0.0
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 2),
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p95_ms": round(p95 * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "slow": self.slow,
+            "plan": self.plan,
+        }
+
+
+class QueryLog:
+    """Per-fingerprint aggregates + slow-query log (off until configure(enabled=True))"""
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms: Optional[float] = 200
+        self.explain = False
+        self.stream = None
+        self._aggregates: Dict[str, QueryAggregate] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool = True, slow_ms: Optional[float] = 200, explain: bool = False, stream=None):
+        """slow_ms: log statements at least this slow (None: aggregate only)
+        explain: also capture EXPLAIN FORMAT=JSON for slow statements (debug)"""
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.stream = stream
+
+    def _fingerprint(self, query) -> str:
+        if not isinstance(query, str):
+            return fingerprint(query)
+        cached = self._fingerprints.get(query)
+        if cached is None:
+            cached = fingerprint(query)
+            if len(self._fingerprints) >= FINGERPRINT_CACHE_SIZE:
+                self._fingerprints.clear()
+            self._fingerprints[query] = cached
+        return cached
+
+    def record(self, cursor, query, args, elapsed: float):
+        """Called by InstrumentedCursor after each execute()"""
+        statement = self._fingerprint(query)
+        slow = self.slow_ms is not None and elapsed * 1000 >= self.slow_ms
+        with self._lock:
+            aggregate = self._aggregates.get(statement)
+            if aggregate is None:
+                key = statement if len(self._aggregates) < MAX_FINGERPRINTS else OVERFLOW_FINGERPRINT
+                aggregate = self._aggregates.get(key)
+                if aggregate is None:
+                    aggregate = self._aggregates[key] = QueryAggregate(key)
+            aggregate.count += 1
+            aggregate.total += elapsed
+            aggregate.samples.append(elapsed)
+            if elapsed > aggregate.max:
+                aggregate.max = elapsed
+            explain_now = False
+            if slow:
+                aggregate.slow += 1
+                now = time.monotonic()
+                if self.explain and now - aggregate.explained_at >= EXPLAIN_INTERVAL:
+                    aggregate.explained_at = now
+                    explain_now = True
+
+        if not slow:
+            return
+        entry = {"event": "slow_query", "ms": round(elapsed * 1000, 1), "binds": bind_count(args), "sql": statement}
+        if explain_now:
+            plan = self._explain(cursor, query, args)
+            if plan is not None:
+                aggregate.plan = plan
+                entry["plan"] = plan
+        print(json.dumps(entry, default=str), file=self.stream or sys.stdout, flush=True)
+
+    @staticmethod
+    def _explain(cursor, query, args) -> Optional[dict]:
+        if not isinstance(query, str) or not query.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        try:
+            bound = cursor.mogrify(query, args)
+            # Plain cursor - its execute() isn't instrumented, so no recursion
+            with cursor.connection.cursor(pymysql.cursors.Cursor) as explain_cursor:
+                explain_cursor.execute("EXPLAIN FORMAT=JSON " + bound)
+                row = explain_cursor.fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    def snapshot(self, sort: str = "total_ms", limit: int = 50) -> list:
+        with self._lock:
+            rows = [aggregate.snapshot() for aggregate in self._aggregates.values()]
+        rows.sort(key=lambda row: row[sort], reverse=True)
+        return rows[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._aggregates.clear()
+
+
+query_log = QueryLog()
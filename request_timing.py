@@ -0,0 +1,104 @@
+"""
+Request timing and per-request query accounting
+Har request ka wall time, DB time, query count, rows aur response bytes
+
+RequestTimingMiddleware puts a fresh QueryStats into database.query_stats for
+each HTTP request; the InstrumentedCursor behind get_connection() records every
+execute() into it. The totals go out as a Server-Timing header (visible in the
+browser devtools timing tab) and, for requests slower than
+Settings.request_log_threshold_ms, as one JSON log line:
+
+    {"event": "request", "method": "GET", "route": "/api/leads/{lead_id}", "status": 200,
+     "wall_ms": 41.2, "db_ms": 30.5, "queries": 3, "rows": 12, "bytes": 1834}
+"""
+
+import json
+import sys
+from time import perf_counter
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from database import QueryStats, query_stats
+from metrics import RequestMetrics
+
+
+def route_template(scope: Scope) -> str:
+    """Matched route path ("/api/leads/{lead_id}") - keeps log / metric labels low-cardinality"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounts (static files) extend root_path instead of setting scope["route"]
+    app_root = scope.get("app_root_path")
+    if app_root is not None and scope.get("root_path", "") != app_root:
+        return scope["root_path"][len(app_root):] + "/*"
+    return "<unmatched>"
+
+
+def server_timing(wall_ms: float, stats: QueryStats) -> str:
+    return f'app;dur={wall_ms:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"'
+
+
+class RequestTimingMiddleware:
+    """Wall / DB time, query count, rows and bytes per request.
+
+    log_threshold_ms: log requests at least this slow (0 logs every request, None disables logging)
+    metrics: per-route counters / histograms for /metrics (None to skip)
+    """
+
+    def __init__(self, app: ASGIApp, log_threshold_ms: Optional[float] = 500,
+                 server_timing_header: bool = True, metrics: Optional[RequestMetrics] = None, stream=None):
+        self.app = app
+        self.metrics = metrics
+        self.log_threshold_ms = log_threshold_ms
+        self.server_timing_header = server_timing_header
+        self.stream = stream
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        started = perf_counter()
+        status = 500
+        sent_bytes = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, sent_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing_header:
+                    # Streaming bodies keep querying after this point - the header covers up to the first byte
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing((perf_counter() - started) * 1000, stats))
+            elif message["type"] == "http.response.body":
+                sent_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            query_stats.reset(token)
+            wall_ms = (perf_counter() - started) * 1000
+            if self.metrics is not None:
+                self.metrics.observe(scope["method"], route_template(scope), status,
+                                     wall_ms / 1000, stats.db_time, stats.queries)
+            if self.log_threshold_ms is not None and wall_ms >= self.log_threshold_ms:
+                self.log(scope, status, wall_ms, stats, sent_bytes)
+
+    def log(self, scope: Scope, status: int, wall_ms: float, stats: QueryStats, sent_bytes: int):
+        entry = {
+            "event": "request",
+            "method": scope["method"],
+            "route": route_template(scope),
+            "status": status,
+            "wall_ms": round(wall_ms, 1),
+            "db_ms": round(stats.db_time * 1000, 1),
+            "queries": stats.queries,
+            "rows": stats.rows,
+            "bytes": sent_bytes,
+        }
+        print(json.dumps(entry), file=self.stream or sys.stdout, flush=True)
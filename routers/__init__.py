@@ -0,0 +1,4 @@
+"""
+API routers by domain, included by app_factory.create_app
+Har module ek APIRouter `router` export karta hai
+"""
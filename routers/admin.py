@@ -0,0 +1,131 @@
+"""
+Admin API
+Health check, Prometheus metrics, SQL statement stats, request profiles, background scheduler status / manual runs
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response
+
+from core import db_ready, log_user_activity, get_current_user
+from json_response import FastJSONResponse
+from metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from query_log import query_log
+
+QUERY_STAT_SORTS = ("total_ms", "count", "p95_ms", "max_ms", "avg_ms", "slow")
+
+router = APIRouter()
+
+@router.get("/api/health")
+async def health(request: Request):
+    """Readiness for rolling restarts - 503 until startup migrations have finished"""
+    ready = db_ready() or request.app.state.settings.db_init == "off"
+    return FastJSONResponse(
+        {"status": "ok" if ready else "starting", "db_ready": db_ready()},
+        status_code=200 if ready else 503
+    )
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint (per worker process) - no auth, like /api/health"""
+    if not request.app.state.settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(render_metrics(request.app.state.scheduler), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/api/admin/queries")
+async def get_query_stats(sort: str = "total_ms", limit: int = 50, user: dict = Depends(get_current_user)):
+    """Per-statement fingerprints for this worker - count, total, p95, slow runs, last EXPLAIN (admin only)"""
+    if user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin only")
+    if sort not in QUERY_STAT_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(QUERY_STAT_SORTS)}")
+    return FastJSONResponse({
+        "success": True,
+        "enabled": query_log.enabled,
+        "slow_query_ms": query_log.slow_ms,
+        "explain": query_log.explain,
+        "statements": query_log.snapshot(sort=sort, limit=max(1, min(limit, 500))),
+    })
+
+@router.post("/api/admin/queries/reset")
+async def reset_query_stats(request: Request, user: dict = Depends(get_current_user)):
+    """Clear the statement aggregates (admin only)"""
+    if user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin only")
+    query_log.reset()
+    try:
+        log_user_activity(
+            request=request,
+            user_id=user['user_id'],
+            username=user['username'],
+            action="reset",
+            resource_type="query_stats",
+            success=True,
+            status_code=200,
+            details="Cleared SQL statement aggregates",
+            session_token=user.get('session_token'),
+        )
+    except Exception:
+        pass
+    return {"success": True}
+
+@router.get("/api/admin/profiles")
+async def list_profiles(request: Request, user: dict = Depends(get_current_user)):
+    """Saved request profiles, newest first (admin only)"""
+    if user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin only")
+    settings = request.app.state.settings
+    return FastJSONResponse({
+        "success": True,
+        "enabled": settings.profiling_enabled,
+        "sample_rate": settings.profile_sample_rate,
+        "profiles": request.app.state.profile_store.list(),
+    })
+
+@router.get("/api/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request, format: str = "prof", sort: str = "cumulative",
+                      user: dict = Depends(get_current_user)):
+    """Download a profile - format=prof (pstats file) or format=text (top functions) (admin only)"""
+    if user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin only")
+    store = request.app.state.profile_store
+    path = store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "text":
+        if sort not in ("cumulative", "tottime", "calls"):
+            raise HTTPException(status_code=400, detail="sort must be cumulative, tottime or calls")
+        return PlainTextResponse(store.summary(profile_id, sort=sort))
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+@router.get("/api/admin/scheduler")
+async def get_scheduler_status(request: Request, user: dict = Depends(get_current_user)):
+    """Background job status - last run time, duration, result and errors (admin only)"""
+    if user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin only")
+    return {"success": True, "jobs": request.app.state.scheduler.snapshot()}
+
+@router.post("/api/admin/scheduler/{job_name}/run")
+async def run_scheduled_job(job_name: str, request: Request, user: dict = Depends(get_current_user)):
+    """Run a background job immediately (admin only)"""
+    scheduler = request.app.state.scheduler
+    if user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin only")
+    if job_name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_name}")
+    outcome = await scheduler.run_now(job_name)
+    try:
+        log_user_activity(
+            request=None,
+            user_id=user['user_id'],
+            username=user['username'],
+            action="run",
+            resource_type="scheduled_job",
+            resource_id=job_name,
+            success=outcome != "error",
+            status_code=200,
+            details=f"Manual run: {outcome}",
+            session_token=user.get('session_token'),
+        )
+    except Exception:
+        pass
+    return {"success": outcome != "error", "outcome": outcome, "job": scheduler.jobs[job_name].snapshot()}
@@ -0,0 +1,227 @@
+"""
+Audit API
+Frontend activity logs aur admin audit log query
+"""
+
+import base64
+import json
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+
+from audit_archive import audit_archive, live_from
+from json_response import FastJSONResponse
+from core import get_db_connection, validate_session_token, log_user_activity, get_current_user
+
+router = APIRouter()
+
+AUDIT_PAGE_MAX = 500
+# Rows after the cursor in ORDER BY created_at DESC, id DESC (params: created_at, created_at, id)
+AUDIT_KEYSET_CONDITION = '(created_at < %s OR (created_at = %s AND id < %s))'
+
+
+def _day_start(value: str, name: str) -> datetime:
+    try:
+        day = date.fromisoformat(value[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+    return datetime(day.year, day.month, day.day)
+
+
+def encode_audit_cursor(row: dict) -> str:
+    """Opaque ?cursor= value for the page after this row"""
+    created_at = row['created_at']
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    return base64.urlsafe_b64encode(f"{created_at}|{row['id']}".encode()).decode().rstrip("=")
+
+
+def decode_audit_cursor(value: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _audit_filters(user_id: Optional[int], action: Optional[str], resource_type: Optional[str],
+                   start: Optional[datetime], end: Optional[datetime]) -> Tuple[List[str], list]:
+    """WHERE conditions -> (conditions, params); each combination has a (..., created_at, id) index"""
+    where = []
+    params = []
+    if user_id is not None:
+        where.append('user_id = %s')
+        params.append(user_id)
+    if action:
+        where.append('action = %s')
+        params.append(action)
+    if resource_type:
+        where.append('resource_type = %s')
+        params.append(resource_type)
+    if start is not None:
+        where.append('created_at >= %s')
+        params.append(start)
+    if end is not None:
+        where.append('created_at < %s')
+        params.append(end)
+    return where, params
+
+
+def _where_sql(where: List[str]) -> str:
+    return ' WHERE ' + ' AND '.join(where) if where else ''
+
+
+# API endpoint to receive user activity logs from frontend
+@router.post("/api/audit-log")
+async def api_audit_log(request: Request, payload: dict = Body(...)):
+    """
+    Receives user activity logs from frontend and stores in audit_logs table.
+    Expects: { action: str, details: dict, path: str, timestamp: str, resource: str, description: str }
+    """
+    session_token = request.cookies.get("session_token")
+    user_id = None
+    username = None
+    if session_token:
+        session_data = None
+        try:
+            session_data = validate_session_token(session_token)
+        except Exception:
+            pass
+        if session_data:
+            user_id = session_data.get("user_id")
+            username = session_data.get("username")
+
+    action = payload.get("action")
+    details = payload.get("details", {})
+    path = payload.get("path")
+    timestamp = payload.get("timestamp")
+    resource = payload.get("resource") or details.get("resource") or '-'
+    description = payload.get("description") or details.get("description") or '-'
+
+    # Use log_user_activity to persist
+    try:
+        log_user_activity(
+            request=request,
+            user_id=user_id,
+            username=username,
+            action=action,
+            resource_type=resource,
+            resource_id=None,
+            success=True,
+            status_code=200,
+            details=json.dumps(details),
+            session_token=session_token,
+            description=description,
+        )
+        return {"success": True}
+    except Exception as e:
+        print("Audit log error:", e)
+        return {"success": False, "error": str(e)}
+
+# ====== Audit query endpoint (admin only) ======
+@router.get("/api/audit/logs")
+async def get_audit_logs(
+    request: Request,
+    user: dict = Depends(get_current_user),
+    user_id: Optional[int] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    page_cursor: Optional[str] = Query(None, alias="cursor"),
+    limit: int = 50,
+    page: Optional[int] = None,
+):
+    """Newest first. Pass pagination.next_cursor back as ?cursor= for the next page;
+    total is only counted for the first page."""
+    # Admin-only access
+    if user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin only")
+    if page is not None:
+        # ?page= was replaced by keyset cursors - answering page 1 again would loop page-walking clients
+        return FastJSONResponse({
+            "success": False,
+            "detail": "The page parameter is no longer supported: pass pagination.next_cursor from the "
+                      "previous response as ?cursor= (omit it for the first page)",
+        }, status_code=400)
+
+    limit = max(1, min(limit, AUDIT_PAGE_MAX))
+    # Half-open [start, end) on the raw column - sargable, prunes partitions
+    start = _day_start(date_from, "date_from") if date_from else None
+    end = _day_start(date_to, "date_to") + timedelta(days=1) if date_to else None
+    before = decode_audit_cursor(page_cursor) if page_cursor else None
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        where, params = _audit_filters(user_id, action, resource_type, start, end)
+
+        # Listings reaching back past the oldest live partition (any listing without date_from)
+        # continue into the archive files - older rows always sort after the live ones, so the
+        # page simply carries on there
+        boundary = live_from(cursor)
+        use_archive = (boundary is not None and (start is None or start < boundary)
+                       and bool(audit_archive.months()))
+        archive_filters = dict(user_id=user_id, action=action, resource_type=resource_type,
+                               start=start, end=min(end, boundary) if end and boundary else boundary)
+
+        total = None
+        if before is None:
+            cursor.execute('SELECT COUNT(*) as count FROM audit_logs' + _where_sql(where), params)
+            count_result = cursor.fetchone()
+            total = count_result['count'] if count_result else 0
+            if use_archive:
+                total += audit_archive.count(**archive_filters)
+
+        logs = []
+        if before is None or boundary is None or before[0] >= boundary:
+            # Keyset on (created_at, id) - the filter's index already ends in (created_at, id)
+            page_where = list(where)
+            page_params = list(params)
+            if before is not None:
+                page_where.append(AUDIT_KEYSET_CONDITION)
+                page_params.extend([before[0], before[0], before[1]])
+            cursor.execute(
+                'SELECT * FROM audit_logs' + _where_sql(page_where) + ' ORDER BY created_at DESC, id DESC LIMIT %s',
+                page_params + [limit + 1]
+            )
+            rows = cursor.fetchall()
+            logs = [dict(r) for r in rows] if rows else []
+
+        if use_archive and len(logs) <= limit:
+            archive_before = before if before is not None and before[0] < boundary else None
+            logs += list(islice(audit_archive.query(**archive_filters, before=archive_before), limit + 1 - len(logs)))
+
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+
+        # Audit: audit logs viewed
+        try:
+            log_user_activity(
+                request=request,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="view",
+                resource_type="audit_logs",
+                resource_id=None,
+                success=True,
+                status_code=200,
+                details=f"filters user_id={user_id} action={action} resource_type={resource_type}",
+                session_token=user.get('session_token'),
+            )
+        except Exception:
+            pass
+
+        return FastJSONResponse({
+            "success": True,
+            "data": logs,
+            "pagination": {
+                "limit": limit,
+                "total": total,
+                "has_more": has_more,
+                "next_cursor": encode_audit_cursor(logs[-1]) if has_more else None,
+            },
+            "archive": {"included": use_archive, "live_from": boundary},
+        })
@@ -0,0 +1,219 @@
+"""
+Authentication API
+Login / logout / session validation aur current user info
+"""
+
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, RedirectResponse
+
+from models import LoginRequest
+from core import (
+    SESSION_TIMEOUT, get_db_connection, create_session, validate_session_token, logout_session,
+    log_user_activity, hash_password, get_current_user, resolve_default_route,
+)
+
+router = APIRouter()
+
+# API Routes
+@router.post("/api/login")
+async def login(login_data: LoginRequest, response: Response):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        hashed_password = hash_password(login_data.password)
+        cursor.execute('SELECT * FROM users WHERE username = %s AND is_active = 1', 
+                      (login_data.username,))
+        user = cursor.fetchone()
+        
+        if not user or hashed_password != user['password']:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        
+        permissions = json.loads(user['permissions']) if user['permissions'] else {}
+        
+        # Get user's hierarchical permissions
+        cursor.execute('''
+        SELECT p.permission_key
+        FROM user_permissions up
+        JOIN permissions p ON up.permission_id = p.id
+        WHERE up.user_id = %s AND up.granted = 1
+        ORDER BY p.permission_key
+        ''', (user['id'],))
+        perm_rows = cursor.fetchall()
+        permission_keys = [r['permission_key'] for r in perm_rows] if perm_rows else []
+        
+        cursor.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = %s', (user['id'],))
+        conn.commit()
+        
+        user_payload = {
+            "user_id": user['id'],
+            "username": user['username'],
+            "full_name": user['full_name'],
+            "email": user['email'],
+            "role": user['role'],
+            "permissions": permissions,
+            "permission_keys": permission_keys,
+            "is_admin": user['role'] == 'admin'
+        }
+        redirect_to = resolve_default_route(user_payload)
+        
+        # Create session
+        session_token = create_session(
+            user_id=user['id'],
+            username=user['username'],
+            role=user['role'],
+            permissions=permissions
+        )
+        
+        # Set session cookie
+        response.set_cookie(
+            key="session_token",
+            value=session_token,
+            httponly=True,
+            secure=False,
+            samesite="lax",
+            max_age=SESSION_TIMEOUT
+        )
+
+        # Audit: successful login
+        try:
+            log_user_activity(
+                request=None,
+                user_id=user['id'],
+                username=user['username'],
+                action="login",
+                resource_type="session",
+                resource_id=session_token,
+                success=True,
+                status_code=200,
+                details="User login successful",
+                session_token=session_token,
+            )
+        except Exception as e:
+            print("Audit log error:", e)
+        
+        return {
+            "success": True,
+            "user": user_payload,
+            "session_token": session_token,
+            "redirect_to": redirect_to
+        }
+
+@router.post("/api/logout")
+async def logout(request: Request, response: Response):
+    session_token = request.cookies.get("session_token")
+    
+    if session_token:
+        # Resolve user for audit (best-effort)
+        session_data = validate_session_token(session_token)
+        user_id = session_data["user_id"] if session_data else None
+        username = session_data["username"] if session_data else None
+
+        logout_session(session_token)
+
+        # Audit: logout
+        try:
+            log_user_activity(
+                request=request,
+                user_id=user_id,
+                username=username,
+                action="logout",
+                resource_type="session",
+                resource_id=session_token,
+                success=True,
+                status_code=200,
+                details="User logout",
+                session_token=session_token,
+            )
+        except Exception as e:
+            print("Audit log error:", e)
+    
+    response.delete_cookie(key="session_token")
+    
+    # Redirect to login page
+    return RedirectResponse(url="/login", status_code=302)
+
+@router.get("/api/validate-session")
+async def validate_session(request: Request):
+    """Check if user has a valid session"""
+    try:
+        session_token = request.cookies.get("session_token")
+        
+        if not session_token:
+            return JSONResponse(
+                status_code=401,
+                content={"success": False, "detail": "No session token"}
+            )
+        
+        session_data = validate_session_token(session_token)
+        
+        if not session_data:
+            return JSONResponse(
+                status_code=401,
+                content={"success": False, "detail": "Session expired"}
+            )
+        
+        # Get user details
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id, username, full_name, email, role, permissions FROM users WHERE id = %s', 
+                          (session_data["user_id"],))
+            user = cursor.fetchone()
+            
+            if not user:
+                return JSONResponse(
+                    status_code=401,
+                    content={"success": False, "detail": "User not found"}
+                )
+            
+            permissions = json.loads(user['permissions']) if user['permissions'] else {}
+            
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "success": True,
+                    "user": {
+                        "user_id": user['id'],
+                        "username": user['username'],
+                        "full_name": user['full_name'],
+                        "email": user['email'],
+                        "role": user['role'],
+                        "permissions": permissions
+                    }
+                }
+            )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "detail": str(e)}
+        )
+
+@router.get("/api/user")
+async def get_current_user_info(user: dict = Depends(get_current_user)):
+    """Get current logged-in user information"""
+    result = {
+        "user_id": user["user_id"],
+        "username": user["username"],
+        "full_name": user["full_name"],
+        "email": user["email"],
+        "role": user["role"],
+        "permissions": user["permissions"],
+        "is_admin": user['role'] == 'admin'
+    }
+    try:
+        log_user_activity(
+            request=None,
+            user_id=user['user_id'],
+            username=user['username'],
+            action="view",
+            resource_type="user",
+            resource_id=str(user['user_id']),
+            success=True,
+            status_code=200,
+            details="Fetched current user",
+            session_token=user.get('session_token'),
+        )
+    except Exception:
+        pass
+    return result
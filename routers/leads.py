@@ -0,0 +1,1111 @@
+"""
+Leads API
+Leads list / facets / detail / create / update / delete, follow-ups aur lead settings
+"""
+
+import json
+import sys
+from datetime import date, datetime
+from typing import List, Optional
+
+import pymysql
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from http_cache import ConditionalGet
+from json_response import FastJSONResponse
+from models import LeadCreate, LeadUpdate
+from core import (
+    get_db_connection, log_user_activity, generate_lead_id, get_preferences,
+    calculate_lead_percentage, get_current_user, check_user_permission,
+    get_status_percentages, lead_percentage_for,
+)
+from target_progress import TRACKED_HISTORY_FIELDS, apply_lead_changes
+from followups import FOLLOWUP_BUCKETS, followup_counts, get_followup_counts, get_followup_page
+from lead_facets import get_lead_facets, invalidate_lead_facets
+from lead_facts import FACT_DIMENSION_FIELDS, mark_lead_dirty
+
+router = APIRouter()
+
+# ====== Column projection for /api/leads (fields= parameter) ======
+LEAD_LIST_COLUMNS = [
+    "id", "lead_id", "lead_date", "lead_source", "lead_type", "lead_owner", "staff_location",
+    "designation", "company_name", "industry_type", "system", "project_amc", "state", "district",
+    "city", "pin_code", "full_address", "company_website", "company_linkedin_link", "sub_industry",
+    "gstin", "customer_name", "contact_no", "email_id", "linkedin_profile", "designation_customer",
+    "method_of_communication", "lead_status", "purpose_of_meeting", "meeting_outcome",
+    "discussion_held", "remarks", "next_follow_up_date", "prospect", "approx_value",
+    "negotiated_value", "closing_amount", "margin_percent", "gross_margin_amount",
+    "net_margin_amount", "received_amount", "balance_amount", "payment_term", "lead_closer_date",
+    "expected_lead_closer_month", "lead_aging", "lead_percentage", "created_by", "assigned_to",
+    "created_at", "updated_at"
+]
+
+# Aging is derived at read time - a stored value goes stale the day after insert.
+# (A generated column can't use CURDATE(); filters compare lead_date instead so they stay sargable.)
+LEAD_AGING_SQL = "GREATEST(DATEDIFF(CURDATE(), l.lead_date), 0)"
+
+# Whitelist: API field name -> SQL expression (never interpolate user input directly)
+LEAD_LIST_FIELDS = {col: f"l.`{col}`" for col in LEAD_LIST_COLUMNS}
+LEAD_LIST_FIELDS["lead_aging"] = LEAD_AGING_SQL
+LEAD_LIST_FIELDS["created_by_name"] = "u1.full_name"
+LEAD_LIST_FIELDS["assigned_to_name"] = "u2.full_name"
+
+# Full row: every column spelled out so lead_aging comes from LEAD_AGING_SQL, not the stored column
+LEAD_FULL_SELECT = ", ".join(
+    f"{LEAD_LIST_FIELDS[name]} as `{name}`"
+    for name in LEAD_LIST_COLUMNS + ["created_by_name", "assigned_to_name"]
+)
+
+# Sortable fields for /api/leads (aging sorts by lead_date so the index is used)
+LEAD_SORT_COLUMNS = {
+    "updated_at": "l.updated_at",
+    "created_at": "l.created_at",
+    "lead_date": "l.lead_date",
+    "lead_aging": "l.lead_date",
+    "next_follow_up_date": "l.next_follow_up_date",
+    "company_name": "l.company_name",
+}
+
+LEAD_FIELD_PRESETS = {
+    # Compact set the leads page always needs (ids, filters, KPIs, links)
+    "table": [
+        "lead_id", "lead_date", "lead_source", "lead_type", "lead_owner", "company_name",
+        "customer_name", "contact_no", "email_id", "lead_status", "next_follow_up_date",
+        "approx_value", "negotiated_value", "closing_amount", "lead_aging", "lead_percentage",
+        "assigned_to_name", "created_at", "updated_at"
+    ],
+    # Every column the leads page can show / export (matches allColumns in leads.html)
+    "export": [
+        col for col in LEAD_LIST_COLUMNS if col not in ("id", "created_by", "assigned_to")
+    ] + ["created_by_name", "assigned_to_name"],
+    # Whole row - default when fields is not given
+    "full": None,
+}
+
+# Computed fields need their source columns to be selected too
+LEAD_FIELD_DEPENDENCIES = {
+    "lead_percentage": ["lead_status"],
+    "lead_aging": ["lead_date"],
+}
+
+
+def resolve_lead_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Turn a fields= value (field names and/or preset names) into a validated field list.
+    Returns None for the full row."""
+    if not fields:
+        return None
+
+    selected = []
+    for name in (f.strip() for f in fields.split(',')):
+        if not name:
+            continue
+        if name in LEAD_FIELD_PRESETS:
+            preset = LEAD_FIELD_PRESETS[name]
+            if preset is None:
+                return None
+            selected.extend(preset)
+        elif name in LEAD_LIST_FIELDS:
+            selected.append(name)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown lead field: {name}")
+
+    for name in list(selected):
+        selected.extend(LEAD_FIELD_DEPENDENCIES.get(name, []))
+    if "lead_id" not in selected:
+        selected.insert(0, "lead_id")
+
+    # De-duplicate, keep order
+    return list(dict.fromkeys(selected))
+
+
+def build_lead_select_list(field_list: Optional[List[str]]) -> str:
+    if field_list is None:
+        return LEAD_FULL_SELECT
+    return ", ".join(f"{LEAD_LIST_FIELDS[name]} as `{name}`" for name in field_list)
+
+
+def build_lead_filters(user: dict, search: Optional[str], min_aging: Optional[int],
+                       max_aging: Optional[int]) -> tuple:
+    """Non-facet WHERE conditions shared by /api/leads and /api/leads/facets -> (sql, params)"""
+    conditions = ""
+    params = []
+
+    # Role-based filtering
+    if user['role'] != 'admin':
+        conditions += ' AND (l.created_by = %s OR l.assigned_to = %s)'
+        params.extend([user['user_id'], user['user_id']])
+
+    # Search filter
+    if search:
+        search_term = f'%{search}%'
+        conditions += '''
+            AND (l.lead_id LIKE %s OR l.company_name LIKE %s 
+            OR l.customer_name LIKE %s OR l.email_id LIKE %s 
+            OR l.contact_no LIKE %s)
+        '''
+        params.extend([search_term, search_term, search_term, search_term, search_term])
+
+    # Aging filters become lead_date ranges (sargable, uses idx_leads_lead_date).
+    # Displayed aging is GREATEST(..., 0), so min_aging <= 0 matches every lead - future-dated ones too
+    if min_aging is not None and min_aging > 0:
+        conditions += ' AND l.lead_date <= DATE_SUB(CURDATE(), INTERVAL %s DAY)'
+        params.append(min_aging)
+    if max_aging is not None:
+        conditions += ' AND l.lead_date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)'
+        params.append(max(max_aging, 0))
+
+    return conditions, params
+
+
+def fill_lead_percentages(leads_list: List[dict], mappings: Optional[dict] = None) -> List[dict]:
+    """Derive lead_percentage from the status where it is missing or zero.
+    The status mapping is fetched once, and only if some row needs it."""
+    for l in leads_list:
+        if "lead_percentage" in l and not l.get("lead_percentage"):
+            if mappings is None:
+                mappings = get_status_percentages()
+            l["lead_percentage"] = lead_percentage_for(l.get("lead_status", "New"), mappings)
+    return leads_list
+
+
+# Column names that must be backquoted in UPDATE ... SET
+LEAD_RESERVED_COLUMNS = {"system", "state", "order", "group", "user", "key", "date", "percent", "rank"}
+
+
+def diff_lead_update(current: dict, updates: dict) -> tuple:
+    """SET clauses + params for an update, and the (field, old, new) changes to log.
+    new is None when a field is cleared. lead_closer_date is always written and never logged."""
+    update_fields = []
+    params = []
+    changes = []
+    for field, value in updates.items():
+        sql_field = f"`{field}`" if field in LEAD_RESERVED_COLUMNS else field
+        old_value = current.get(field)
+        if field == "lead_closer_date":
+            # Always update this field if present
+            if value is None:
+                update_fields.append(f"{sql_field} = NULL")
+                params.append(None)
+            else:
+                update_fields.append(f"{sql_field} = %s")
+                params.append(value)
+        elif value is None:
+            # Only log if value actually changed
+            if old_value is not None:
+                update_fields.append(f"{sql_field} = NULL")
+                changes.append((field, old_value, None))
+        elif str(value) != str(old_value):
+            update_fields.append(f"{sql_field} = %s")
+            params.append(value)
+            changes.append((field, old_value, value))
+    return update_fields, params, changes
+
+
+def activity_description(detail: str) -> str:
+    """"field: 'old' -> 'new'" (or "-> (cleared)") -> lead_activities description"""
+    field_name = detail.split(':')[0].strip()
+    readable_field = field_name.replace('_', ' ').title()
+    # Parse old and new values
+    if "->" in detail:
+        parts = detail.split("->")
+        old_val = parts[0].split(":")[1].strip().strip("'")
+        new_val = parts[1].strip().strip("'")
+        if new_val == "(cleared)":
+            return f"Cleared {readable_field} (was '{old_val}')"
+        return f"Changed {readable_field} from '{old_val}' to '{new_val}'"
+    return f"Edited {readable_field}"
+
+
+# Deadlock / lock wait timeout - InnoDB has rolled back the statement or the whole transaction
+TRANSACTION_ROLLBACK_ERRORS = (1205, 1213)
+
+
+def apply_target_progress(cursor, lead_id: str, lead: dict, user_id: int, **changes):
+    """apply_lead_changes inside a savepoint of the lead transaction. Other failures undo only the
+    target writes (left to the reconciliation job); a deadlock / lock wait re-raises - the lead
+    writes are gone too and the request must fail."""
+    cursor.execute("SAVEPOINT target_progress")
+    try:
+        apply_lead_changes(cursor, lead, user_id, **changes)
+    except pymysql.err.OperationalError as e:
+        if e.args and e.args[0] in TRANSACTION_ROLLBACK_ERRORS:
+            raise
+        _target_progress_failed(cursor, lead_id, e)
+    except Exception as e:
+        _target_progress_failed(cursor, lead_id, e)
+    else:
+        cursor.execute("RELEASE SAVEPOINT target_progress")
+
+
+def _target_progress_failed(cursor, lead_id: str, error: Exception):
+    cursor.execute("ROLLBACK TO SAVEPOINT target_progress")
+    entry = {"event": "target_progress_failed", "lead_id": lead_id, "error": f"{type(error).__name__}: {error}"}
+    print(json.dumps(entry, default=str), file=sys.stdout, flush=True)
+
+
+@router.get("/api/leads")
+async def get_leads(
+    request: Request,
+    status: Optional[str] = None,
+    owner: Optional[str] = None,
+    source: Optional[str] = None,
+    lead_type: Optional[str] = None,
+    system: Optional[str] = None,
+    search: Optional[str] = None,
+    page: int = 1,
+    limit: int = 20,
+    fields: Optional[str] = None,
+    min_aging: Optional[int] = None,
+    max_aging: Optional[int] = None,
+    sort: str = "updated_at",
+    order: str = "desc",
+    user: dict = Depends(get_current_user)
+):
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="No permission to view leads")
+    
+    field_list = resolve_lead_fields(fields)
+    sort_column = LEAD_SORT_COLUMNS.get(sort)
+    if sort_column is None:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort}")
+    sort_order = "ASC" if order.lower() == "asc" else "DESC"
+    if sort == "lead_aging":
+        # Older lead_date = higher aging
+        sort_order = "DESC" if sort_order == "ASC" else "ASC"
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Base query (FROM/WHERE only - select list is added below)
+        conditions, params = build_lead_filters(user, search, min_aging, max_aging)
+        query = '''
+        FROM leads l
+        LEFT JOIN users u1 ON l.created_by = u1.id
+        LEFT JOIN users u2 ON l.assigned_to = u2.id
+        WHERE 1=1
+        ''' + conditions
+        
+        # Facet filters (status, owner, source, type, system)
+        for column, value in (("lead_status", status), ("lead_owner", owner), ("lead_source", source),
+                              ("lead_type", lead_type), ("system", system)):
+            if value:
+                query += f' AND l.`{column}` = %s'
+                params.append(value)
+        
+        # Get total count (no row data needed)
+        count_query = "SELECT COUNT(*) as count " + query
+        
+        cursor.execute(count_query, params)
+        count_result = cursor.fetchone()
+        total = count_result['count'] if count_result else 0
+        
+        # Add projection and pagination
+        query = f"SELECT {build_lead_select_list(field_list)} " + query
+        query += f' ORDER BY {sort_column} {sort_order}, l.id {sort_order} LIMIT %s OFFSET %s'
+        offset = (page - 1) * limit
+        params.extend([limit, offset])
+        
+        cursor.execute(query, params)
+        leads = cursor.fetchall()
+        
+        # lead_aging comes from SQL; timestamps are encoded by FastJSONResponse
+        leads_list = fill_lead_percentages([dict(lead) for lead in leads] if leads else [])
+        
+        # Rows go straight to orjson (skips jsonable_encoder)
+        return FastJSONResponse({
+            "success": True,
+            "data": leads_list,
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": (total + limit - 1) // limit if limit > 0 else 0
+            }
+        })
+        
+        # Audit: leads list viewed
+        try:
+            log_user_activity(
+                request=request,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="view",
+                resource_type="lead_list",
+                resource_id=None,
+                success=True,
+                status_code=200,
+                details=f"status={status}, search={search}, owner={owner}, page={page}, limit={limit}",
+                session_token=user.get('session_token'),
+            )
+        except Exception:
+            pass
+
+@router.get("/api/leads/facets")
+async def get_leads_facets(
+    status: Optional[str] = None,
+    owner: Optional[str] = None,
+    source: Optional[str] = None,
+    lead_type: Optional[str] = None,
+    system: Optional[str] = None,
+    search: Optional[str] = None,
+    min_aging: Optional[int] = None,
+    max_aging: Optional[int] = None,
+    user: dict = Depends(get_current_user)
+):
+    """Counts per status / owner / source / type / system and page KPIs for the current filters"""
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="No permission to view leads")
+    
+    conditions, params = build_lead_filters(user, search, min_aging, max_aging)
+    scope = "all" if user['role'] == 'admin' else user['user_id']
+    signature = (scope, search or "", min_aging, max_aging)
+    selected = {
+        "lead_status": status,
+        "lead_owner": owner,
+        "lead_source": source,
+        "lead_type": lead_type,
+        "system": system,
+    }
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        result = get_lead_facets(cursor, "FROM leads l WHERE 1=1" + conditions, params, signature, selected)
+    
+    try:
+        log_user_activity(
+            request=None,
+            user_id=user['user_id'],
+            username=user['username'],
+            action="view",
+            resource_type="lead_facets",
+            resource_id=None,
+            success=True,
+            status_code=200,
+            details=f"status={status}, owner={owner}, search={search}, cached={result['cached']}",
+            session_token=user.get('session_token'),
+        )
+    except Exception:
+        pass
+    return FastJSONResponse({"success": True, **result})
+
+def lead_detail_version(cursor, lead_id: str, user: dict) -> Optional[tuple]:
+    """ETag parts for /api/leads/{lead_id} - None when the lead isn't visible to the user.
+    updated_at is TIMESTAMP(6) (migration 0006), so two edits in one second still differ; the
+    joined user names are in the body too. Settings version covers the lead_percentage fallback."""
+    query = '''
+    SELECT l.updated_at, u1.full_name as created_by_name, u2.full_name as assigned_to_name,
+           (SELECT MAX(updated_at) FROM lead_settings) as settings_updated_at
+    FROM leads l
+    LEFT JOIN users u1 ON l.created_by = u1.id
+    LEFT JOIN users u2 ON l.assigned_to = u2.id
+    WHERE l.lead_id = %s
+    '''
+    params = [lead_id]
+    if user['role'] != 'admin':
+        query += ' AND (l.created_by = %s OR l.assigned_to = %s)'
+        params.extend([user['user_id'], user['user_id']])
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return row['updated_at'], row['created_by_name'], row['assigned_to_name'], row['settings_updated_at']
+
+
+@router.get("/api/leads/{lead_id}")
+async def get_lead_detail(lead_id: str, request: Request, user: dict = Depends(get_current_user), conditional: ConditionalGet = Depends()):
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="No permission to view leads")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        version = lead_detail_version(cursor, lead_id, user)
+        if version:
+            not_modified = conditional.evaluate("lead", lead_id, user['user_id'], *version, date.today())
+            if not_modified:
+                return not_modified
+        
+        # Role-based access control
+        if user['role'] != 'admin':
+            cursor.execute('''
+            SELECT ''' + LEAD_FULL_SELECT + '''
+            FROM leads l
+            LEFT JOIN users u1 ON l.created_by = u1.id
+            LEFT JOIN users u2 ON l.assigned_to = u2.id
+            WHERE l.lead_id = %s AND (l.created_by = %s OR l.assigned_to = %s)
+            ''', (lead_id, user['user_id'], user['user_id']))
+        else:
+            cursor.execute('''
+            SELECT ''' + LEAD_FULL_SELECT + '''
+            FROM leads l
+            LEFT JOIN users u1 ON l.created_by = u1.id
+            LEFT JOIN users u2 ON l.assigned_to = u2.id
+            WHERE l.lead_id = %s
+            ''', (lead_id,))
+        
+        lead = cursor.fetchone()
+        
+        if not lead:
+            raise HTTPException(status_code=404, detail="Lead not found")
+        
+        # Get lead activities
+        cursor.execute('''
+        SELECT la.*, u.full_name as performed_by_name
+        FROM lead_activities la
+        LEFT JOIN users u ON la.performed_by = u.id
+        WHERE la.lead_id = %s
+        ORDER BY la.activity_date DESC
+        ''', (lead_id,))
+        activities = cursor.fetchall()
+        
+        # Get status history
+        cursor.execute('''
+        SELECT lsh.*, u.full_name as changed_by_name
+        FROM lead_status_history lsh
+        LEFT JOIN users u ON lsh.changed_by = u.id
+        WHERE lsh.lead_id = %s
+        ORDER BY lsh.changed_at DESC
+        ''', (lead_id,))
+        status_history = cursor.fetchall()
+
+        # Get detailed field change history
+        cursor.execute('''
+        SELECT lh.*, u.full_name as changed_by_name
+        FROM lead_history lh
+        LEFT JOIN users u ON lh.changed_by = u.id
+        WHERE lh.lead_id = %s
+        ORDER BY lh.changed_at DESC
+        ''', (lead_id,))
+        field_history = cursor.fetchall()
+        
+        # lead_aging comes from SQL (timestamps encoded by FastJSONResponse)
+        lead_dict = dict(lead)
+        
+        # Calculate lead percentage based on status (if not already set or zero)
+        if not lead_dict.get("lead_percentage") or lead_dict.get("lead_percentage") == 0:
+            lead_dict["lead_percentage"] = calculate_lead_percentage(lead_dict.get("lead_status", "New"))
+
+        activities_list = [dict(a) for a in activities] if activities else []
+        status_history_list = [dict(s) for s in status_history] if status_history else []
+        field_history_list = [dict(h) for h in field_history] if field_history else []
+
+        return FastJSONResponse({
+            "success": True,
+            "lead": lead_dict,
+            "activities": activities_list,
+            "status_history": status_history_list,
+            "field_history": field_history_list
+        }, headers=conditional.headers)
+        
+        # Audit: lead viewed
+
+        try:
+            log_user_activity(
+                request=request,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="view",
+                resource_type="lead",
+                resource_id=lead_id,
+                success=True,
+                status_code=200,
+                details="Lead detail fetched",
+                session_token=user.get('session_token')
+            )
+        except Exception:
+            pass
+
+@router.post("/api/leads")
+async def create_lead(lead_data: LeadCreate, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_create_leads'):
+        raise HTTPException(status_code=403, detail="No permission to create leads")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        lead_id = generate_lead_id()
+        
+        try:
+            # Validate lead_date up front (aging is derived from it at read time)
+            datetime.strptime(lead_data.lead_date, '%Y-%m-%d')
+
+            # Determine assignee (exclude missing users)
+            assigned_to_id = lead_data.assigned_to if lead_data.assigned_to else user['user_id']
+            cursor.execute('SELECT id, full_name FROM users WHERE id = %s', (assigned_to_id,))
+            assigned_user = cursor.fetchone()
+            if not assigned_user:
+                raise HTTPException(status_code=400, detail="Assigned user not found")
+
+            lead_owner_value = lead_data.lead_owner or assigned_user['full_name']
+            if not lead_owner_value:
+                lead_owner_value = user['full_name']
+            
+            # Use provided status or default to 'New'
+            status_value = lead_data.lead_status or 'New'
+            lead_percentage = calculate_lead_percentage(status_value)
+            
+            cursor.execute('''
+            INSERT INTO leads (
+                `lead_id`, `lead_date`, `lead_source`, `lead_type`, `lead_owner`,
+                `staff_location`,
+                `designation`, `company_name`, `industry_type`, `system`, `project_amc`,
+                `state`, `district`, `city`, `pin_code`, `full_address`, `company_website`,
+                `company_linkedin_link`, `sub_industry`, `gstin`, `customer_name`,
+                `contact_no`, `email_id`, `linkedin_profile`, `designation_customer`,
+                `method_of_communication`, `lead_status`, `lead_percentage`,
+                `lead_closer_date`,
+                `created_by`, `assigned_to`
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ''', (
+                lead_id, lead_data.lead_date, lead_data.lead_source, lead_data.lead_type,
+                lead_owner_value, lead_data.staff_location,
+                lead_data.designation, lead_data.company_name,
+                lead_data.industry_type, lead_data.system, lead_data.project_amc,
+                lead_data.state, lead_data.district, lead_data.city, lead_data.pin_code,
+                lead_data.full_address, lead_data.company_website,
+                lead_data.company_linkedin_link, lead_data.sub_industry,
+                lead_data.gstin, lead_data.customer_name, lead_data.contact_no,
+                lead_data.email_id, lead_data.linkedin_profile,
+                lead_data.designation_customer, lead_data.method_of_communication or 'Email', status_value, lead_percentage,
+                lead_data.lead_closer_date,
+                user['user_id'], assigned_to_id
+            ))
+            
+            # Get the newly created lead
+            cursor.execute('''
+            SELECT ''' + LEAD_FULL_SELECT + '''
+            FROM leads l
+            LEFT JOIN users u1 ON l.created_by = u1.id
+            LEFT JOIN users u2 ON l.assigned_to = u2.id
+            WHERE l.lead_id = %s
+            ''', (lead_id,))
+            new_lead = cursor.fetchone()
+            new_lead_dict = dict(new_lead) if new_lead else {}
+            
+            # Add initial history entries for ALL fields that are provided
+            history_count = 0
+            for field, value in lead_data.dict(exclude_unset=True).items():
+                if value is not None and value != '':
+                    try:
+                        cursor.execute('''
+                        INSERT INTO lead_history (lead_id, field_name, old_value, new_value, changed_by)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ''', (lead_id, field, None, str(value), user['user_id']))
+                        history_count += 1
+                        print(f"DEBUG: Inserted lead_history for {field} = {value}")
+                    except Exception as e:
+                        print(f"ERROR: Failed to insert lead_history for field {field}: {str(e)}")
+                        raise  # Re-raise to rollback transaction
+            
+            print(f"DEBUG: Total history entries inserted: {history_count}")
+            
+            # Add to status history
+            cursor.execute('''
+            INSERT INTO lead_status_history (lead_id, old_status, new_status, changed_by)
+            VALUES (%s, %s, %s, %s)
+            ''', (lead_id, 'New', 'New', user['user_id']))
+            
+            # Live target progress - failures are left to the reconciliation job
+            apply_target_progress(
+                cursor, lead_id, new_lead_dict, user['user_id'], new_status='New',
+                field_values={f: str(v) for f, v in lead_data.dict(exclude_unset=True).items()
+                              if v is not None and v != ''},
+            )
+            
+            # Add activity with details
+            company_name = new_lead_dict.get("company_name") or lead_data.company_name or "Unknown"
+            customer_name = new_lead_dict.get("customer_name") or lead_data.customer_name or "Unknown"
+            cursor.execute('''
+            INSERT INTO lead_activities (lead_id, activity_type, description, performed_by)
+            VALUES (%s, %s, %s, %s)
+            ''', (lead_id, 'created', f'Lead created: {company_name} - {customer_name}', user['user_id']))
+            
+            conn.commit()
+            followup_counts.invalidate(assigned_to_id)
+            invalidate_lead_facets()
+            print(f"DEBUG: Lead {lead_id} created successfully with {history_count} history entries")
+            
+            return {
+                "success": True,
+                "lead_id": lead_id,
+                "lead": dict(new_lead) if new_lead else None,
+                "message": "Lead created successfully"
+            }
+        except Exception as e:
+            conn.rollback()
+            # Audit: lead create failed
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="create",
+                    resource_type="lead",
+                    resource_id=None,
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    # Audit: lead created
+    try:
+        log_user_activity(
+            request=None,
+            user_id=user['user_id'],
+            username=user['username'],
+            action="create",
+            resource_type="lead",
+            resource_id=lead_id,
+            success=True,
+            status_code=200,
+            details="Lead created",
+            session_token=user.get('session_token'),
+        )
+    except Exception:
+        pass
+
+@router.put("/api/leads/{lead_id}")
+async def update_lead(lead_id: str, lead_data: LeadUpdate, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_edit_leads'):
+        raise HTTPException(status_code=403, detail="No permission to edit leads")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            # First get current lead data
+            cursor.execute('SELECT * FROM leads WHERE lead_id = %s', (lead_id,))
+            current_lead = cursor.fetchone()
+            
+            if not current_lead:
+                raise HTTPException(status_code=404, detail="Lead not found")
+            current_lead_dict = dict(current_lead)
+            # --- PATCH: If lead_percentage becomes 100, set lead_closer_date to today ---
+            # Calculate new percentage if status is being updated
+            new_percentage = None
+            if lead_data.lead_status:
+                new_percentage = calculate_lead_percentage(lead_data.lead_status)
+            elif lead_data.lead_percentage is not None:
+                new_percentage = lead_data.lead_percentage
+            else:
+                new_percentage = current_lead_dict.get('lead_percentage')
+
+            # If percentage is 100 and lead_closer_date is not set, set it to today
+            if int(new_percentage or 0) == 100:
+                from datetime import date
+                today_str = date.today().isoformat()
+                if not current_lead_dict.get('lead_closer_date') or lead_data.lead_closer_date is None:
+                    lead_data.lead_closer_date = today_str
+            
+            # Check access permission for non-admin users
+            if user['role'] != 'admin' and current_lead_dict.get('created_by') != user['user_id'] and current_lead_dict.get('assigned_to') != user['user_id']:
+                raise HTTPException(status_code=403, detail="No permission to edit this lead")
+            
+            # Build update query
+            update_fields, params, changes = diff_lead_update(current_lead_dict, lead_data.dict(exclude_unset=True))
+            activity_details = []  # Track all field changes for activity log
+            history_count = 0
+            tracked_changes = {}  # lead_history values that move target progress
+            
+            for field, old_value, value in changes:
+                new_value = str(value) if value is not None else None
+                try:
+                    cursor.execute('''
+                    INSERT INTO lead_history (lead_id, field_name, old_value, new_value, changed_by)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ''', (lead_id, field, str(old_value) if old_value else None, new_value, user['user_id']))
+                    history_count += 1
+                    print(f"DEBUG: Inserted lead_history for {field}: {old_value} -> {value if value is not None else 'NULL'}")
+                except Exception as e:
+                    print(f"ERROR: Failed to insert lead_history for {field}: {str(e)}")
+                    raise
+                if value is None:
+                    activity_details.append(f"{field}: '{old_value}' -> (cleared)")
+                else:
+                    if field in TRACKED_HISTORY_FIELDS:
+                        tracked_changes[field] = new_value
+                    activity_details.append(f"{field}: '{old_value}' -> '{value}'")
+            
+            # Handle lead status change separately
+            if lead_data.lead_status and lead_data.lead_status != current_lead_dict.get('lead_status'):
+                cursor.execute('''
+                INSERT INTO lead_status_history (lead_id, old_status, new_status, changed_by)
+                VALUES (%s, %s, %s, %s)
+                ''', (lead_id, current_lead_dict.get('lead_status'), lead_data.lead_status, user['user_id']))
+                
+                # Auto-calculate percentage if status changed: only if mapping exists
+                new_percentage = calculate_lead_percentage(lead_data.lead_status)
+                # Agar mapping mila (non-zero) to update karo, otherwise existing percentage rakho
+                if new_percentage > 0:
+                    # Find existing lead_percentage field and its param index (only count fields that use %s)
+                    existing_param_idx = None
+                    param_cursor = 0
+                    for f in update_fields:
+                        if "%s" in f:
+                            if f.strip().startswith("lead_percentage = %s"):
+                                existing_param_idx = param_cursor
+                                break
+                            param_cursor += 1
+                    if existing_param_idx is not None:
+                        # Replace existing parameter value with recalculated percentage
+                        params[existing_param_idx] = new_percentage
+                    else:
+                        update_fields.append("lead_percentage = %s")
+                        params.append(new_percentage)
+            
+            # If no fields to update, return early
+            if not update_fields:
+                raise HTTPException(status_code=400, detail="No fields to update")
+            
+            # Add updated_at timestamp
+            update_fields.append("updated_at = CURRENT_TIMESTAMP(6)")
+            
+            # Execute update
+            query = f"UPDATE leads SET {', '.join(update_fields)} WHERE lead_id = %s"
+            params.append(lead_id)
+            
+            cursor.execute(query, params)
+            
+            # A changed fact dimension (status/source/type/system) re-aggregates this lead's days
+            if any(field in FACT_DIMENSION_FIELDS and str(value) != str(current_lead_dict.get(field))
+                   for field, value in lead_data.dict(exclude_unset=True).items()):
+                mark_lead_dirty(cursor, lead_id)
+            
+            # Live target progress - failures are left to the reconciliation job
+            status_changed = lead_data.lead_status and lead_data.lead_status != current_lead_dict.get('lead_status')
+            apply_target_progress(
+                cursor, lead_id, {**current_lead_dict, **lead_data.dict(exclude_unset=True)}, user['user_id'],
+                new_status=lead_data.lead_status if status_changed else None,
+                field_values=tracked_changes,
+            )
+            
+            # Add individual activity log for each changed field, only if actually changed
+            for detail in activity_details:
+                cursor.execute('''
+                    INSERT INTO lead_activities (lead_id, activity_type, description, performed_by)
+                    VALUES (%s, %s, %s, %s)
+                ''', (lead_id, 'field_update', activity_description(detail), user['user_id']))
+            
+            conn.commit()
+            followup_counts.invalidate(current_lead_dict.get('assigned_to'), lead_data.dict(exclude_unset=True).get('assigned_to'))
+            invalidate_lead_facets()
+            print(f"DEBUG: Lead {lead_id} updated successfully with {history_count} history entries")
+            
+            return {
+                "success": True,
+                "message": "Lead updated successfully"
+            }
+            
+            return {
+                "success": True,
+                "message": "Lead updated successfully"
+            }
+        except Exception as e:
+            conn.rollback()
+            # Audit: lead update failed
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="update",
+                    resource_type="lead",
+                    resource_id=lead_id,
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    # Audit: lead updated
+    try:
+        log_user_activity(
+            request=None,
+            user_id=user['user_id'],
+            username=user['username'],
+            action="update",
+            resource_type="lead",
+            resource_id=lead_id,
+            success=True,
+            status_code=200,
+            details="Lead updated",
+            session_token=user.get('session_token'),
+        )
+    except Exception:
+        pass
+
+@router.get("/api/followups")
+async def get_followups(
+    bucket: Optional[str] = None,
+    page: int = 1,
+    limit: int = 20,
+    user_id: Optional[int] = None,
+    user: dict = Depends(get_current_user)
+):
+    """My follow-ups - overdue / today / upcoming buckets (one bucket paginated, or first page of each)"""
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="No permission to view leads")
+    if bucket is not None and bucket not in FOLLOWUP_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Invalid bucket: {bucket}")
+    
+    # Admins can open another rep's worklist, everyone else sees their own
+    owner_id = user_id if (user_id is not None and user['role'] == 'admin') else user['user_id']
+    follow_up_days = int(get_preferences().get('followUpDays', 7))
+    page = max(page, 1)
+    limit = max(1, min(limit, 100))
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        counts = get_followup_counts(cursor, owner_id, follow_up_days)
+        
+        buckets = {}
+        for name in ([bucket] if bucket else FOLLOWUP_BUCKETS):
+            bucket_page = page if bucket else 1
+            buckets[name] = {
+                "items": get_followup_page(cursor, owner_id, name, follow_up_days, bucket_page, limit),
+                "pagination": {
+                    "page": bucket_page,
+                    "limit": limit,
+                    "total": counts[name],
+                    "pages": (counts[name] + limit - 1) // limit if limit > 0 else 0
+                }
+            }
+    
+    try:
+        log_user_activity(
+            request=None,
+            user_id=user['user_id'],
+            username=user['username'],
+            action="view",
+            resource_type="followup_list",
+            resource_id=str(owner_id),
+            success=True,
+            status_code=200,
+            details=f"Fetched follow-ups ({bucket or 'all buckets'})",
+            session_token=user.get('session_token'),
+        )
+    except Exception:
+        pass
+    return FastJSONResponse({
+        "success": True,
+        "user_id": owner_id,
+        "follow_up_days": follow_up_days,
+        "counts": counts,
+        "buckets": buckets
+    })
+
+@router.delete("/api/leads/{lead_id}")
+async def delete_lead(lead_id: str, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_delete_leads'):
+        raise HTTPException(status_code=403, detail="No permission to delete leads")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            # First check if lead exists
+            cursor.execute('SELECT * FROM leads WHERE lead_id = %s', (lead_id,))
+            lead = cursor.fetchone()
+            
+            if not lead:
+                raise HTTPException(status_code=404, detail="Lead not found")
+            
+            # Facts for the days this lead touched are re-aggregated on the next refresh
+            mark_lead_dirty(cursor, lead_id)
+            
+            # CASCADE DELETE: Delete from all related tables first
+            # Delete lead history (field changes)
+            cursor.execute('DELETE FROM lead_history WHERE lead_id = %s', (lead_id,))
+            
+            # Delete lead status history
+            cursor.execute('DELETE FROM lead_status_history WHERE lead_id = %s', (lead_id,))
+            
+            # Delete lead activities
+            cursor.execute('DELETE FROM lead_activities WHERE lead_id = %s', (lead_id,))
+            
+            # Finally delete the main lead record
+            cursor.execute('DELETE FROM leads WHERE lead_id = %s', (lead_id,))
+            
+           
+            conn.commit()
+            followup_counts.invalidate(lead.get('assigned_to'))
+            invalidate_lead_facets()
+            
+            # Log successful deletion
+            log_user_activity(
+                request=None,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="delete",
+                resource_type="lead",
+                resource_id=lead_id,
+                success=True,
+                status_code=200,
+                details=f"Lead {lead_id} and all related data deleted successfully",
+                session_token=user.get('session_token'),
+            )
+            
+            return {
+                "success": True,
+                "message": "Lead and all related data deleted successfully"
+            }
+        except Exception as e:
+            conn.rollback()
+            # Audit: lead delete failed
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="delete",
+                    resource_type="lead",
+                    resource_id=lead_id,
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    # Audit: lead deleted
+    try:
+        log_user_activity(
+            request=None,
+            user_id=user['user_id'],
+            username=user['username'],
+            action="delete",
+            resource_type="lead",
+            resource_id=lead_id,
+            success=True,
+            status_code=200,
+            details="Lead deleted",
+            session_token=user.get('session_token'),
+        )
+    except Exception:
+        pass
+
+@router.get("/api/settings/lead-settings")
+async def get_lead_settings_api(user: dict = Depends(get_current_user), conditional: ConditionalGet = Depends()):
+    """Get all lead settings from database"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        # Settings are global - version is row count + latest updated_at
+        cursor.execute('SELECT COUNT(*) as count, MAX(updated_at) as updated_at FROM lead_settings')
+        version = cursor.fetchone()
+        not_modified = conditional.evaluate("lead_settings", version['count'], version['updated_at'])
+        if not_modified:
+            return not_modified
+
+        cursor.execute('SELECT setting_type, setting_data FROM lead_settings')
+        rows = cursor.fetchall()
+        
+        settings = {}
+        for row in rows:
+            try:
+                settings[row['setting_type']] = json.loads(row['setting_data'])
+            except:
+                settings[row['setting_type']] = []
+        
+        result = {"success": True, "settings": settings}
+
+        # Audit: view lead settings
+        try:
+            log_user_activity(
+                request=None,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="view",
+                resource_type="lead_settings",
+                resource_id=None,
+                success=True,
+                status_code=200,
+                details="Fetched lead settings",
+                session_token=user.get('session_token'),
+            )
+        except Exception:
+            pass
+        return result
+
+@router.post("/api/settings/lead-settings")
+async def save_lead_settings_api(request: Request, user: dict = Depends(get_current_user)):
+    """Save lead settings to database"""
+    if not check_user_permission(user, 'can_manage_users') and user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="No permission to save settings")
+    
+    try:
+        data = await request.json()
+        setting_type = data.get('type')
+        setting_data = data.get('data', [])
+        
+        if not setting_type:
+            raise HTTPException(status_code=400, detail="Setting type is required")
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Check if setting exists
+            cursor.execute('SELECT id FROM lead_settings WHERE setting_type = %s', (setting_type,))
+            existing = cursor.fetchone()
+            
+            setting_json = json.dumps(setting_data)
+            
+            if existing:
+                # Update existing
+                cursor.execute(
+                    'UPDATE lead_settings SET setting_data = %s, updated_at = CURRENT_TIMESTAMP(6), updated_by = %s WHERE setting_type = %s',
+                    (setting_json, user['user_id'], setting_type)
+                )
+            else:
+                # Create new
+                cursor.execute(
+                    'INSERT INTO lead_settings (setting_type, setting_data, updated_by) VALUES (%s, %s, %s)',
+                    (setting_type, setting_json, user['user_id'])
+                )
+            
+            conn.commit()
+            # Audit: save settings
+            try:
+                log_user_activity(
+                    request=request,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="update",
+                    resource_type="lead_settings",
+                    resource_id=setting_type,
+                    success=True,
+                    status_code=200,
+                    details=f"Saved {setting_type}",
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {"success": True, "message": f"{setting_type} settings saved successfully"}
+    
+    except Exception as e:
+        # Audit: settings save failed
+        try:
+            log_user_activity(
+                request=request,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="update",
+                resource_type="lead_settings",
+                resource_id=None,
+                success=False,
+                status_code=500,
+                details=str(e),
+                session_token=user.get('session_token'),
+            )
+        except Exception:
+            pass
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,284 @@
+"""
+HTML pages
+Login, dashboard, leads, users ... pages (templates render hote hain)
+"""
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import HTMLResponse, RedirectResponse
+
+from core import (
+    templates, get_db_connection, get_preferences, get_current_user, check_user_permission,
+)
+
+router = APIRouter()
+
+# Routes
+@router.get("/", response_class=HTMLResponse)
+async def root(request: Request):
+    return templates.TemplateResponse("login.html", {"request": request})
+
+@router.get("/login", response_class=HTMLResponse)
+async def login_page(request: Request):
+    return templates.TemplateResponse("login.html", {"request": request})
+
+@router.get("/permission-management", response_class=HTMLResponse)
+async def permission_management_page(request: Request, user: dict = Depends(get_current_user)):
+    """Permission management page - Admin only"""
+    if user['role'] != 'admin':
+        return templates.TemplateResponse("error.html", {
+            "request": request,
+            "error": "Access Denied",
+            "message": "Only administrators can access permission management."
+        })
+    
+    return templates.TemplateResponse("permission_management.html", {
+        "request": request,
+        "user": user
+    })
+
+@router.get("/dashboard", response_class=HTMLResponse)
+async def dashboard(request: Request, user: dict = Depends(get_current_user)):
+    # Server-side guard: if user lacks dashboard permission, redirect to Leads
+    if not check_user_permission(user, 'dashboard'):
+        return RedirectResponse(url="/leads", status_code=302)
+
+    from copy import deepcopy
+    stats = {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        where_clause = ""
+        params = []
+
+        if user['role'] != 'admin':
+            where_clause = "AND (created_by = %s OR assigned_to = %s)"
+            params = [user['user_id'], user['user_id']]
+
+        # Total leads
+        if where_clause:
+            cursor.execute(f'SELECT COUNT(*) as count FROM leads WHERE 1=1 {where_clause}', params)
+        else:
+            cursor.execute(f'SELECT COUNT(*) as count FROM leads', params)
+        result = cursor.fetchone()
+        total_leads = result['count'] if result else 0
+
+        # Upcoming follow-ups - use followUpDays preference
+        prefs = get_preferences()
+        follow_up_days = int(prefs.get('followUpDays', 7))
+        
+        upcoming_query = f'''
+        SELECT COUNT(*) as count 
+        FROM leads 
+        WHERE next_follow_up_date >= CURDATE() 
+        AND next_follow_up_date <= DATE_ADD(CURDATE(), INTERVAL {follow_up_days} DAY)
+        {where_clause}
+        '''
+        cursor.execute(upcoming_query, params)
+        upcoming_result = cursor.fetchone()
+        upcoming_followups = upcoming_result['count'] if upcoming_result else 0
+
+        # Missed follow-ups (where next_follow_up_date is in the past)
+        missed_query = f'''
+        SELECT COUNT(*) as count 
+        FROM leads 
+        WHERE next_follow_up_date IS NOT NULL
+        AND next_follow_up_date < CURDATE()
+        {where_clause}
+        '''
+        cursor.execute(missed_query, params)
+        missed_result = cursor.fetchone()
+        missed_followups = missed_result['count'] if missed_result else 0
+
+        # Leads by status
+        if where_clause:
+            status_query = f'''
+            SELECT lead_status, COUNT(*) as count 
+            FROM leads 
+            WHERE 1=1 {where_clause}
+            GROUP BY lead_status
+            ORDER BY count DESC
+            '''
+        else:
+            status_query = f'''
+            SELECT lead_status, COUNT(*) as count 
+            FROM leads 
+            GROUP BY lead_status
+            ORDER BY count DESC
+            '''
+        cursor.execute(status_query, params)
+        leads_by_status = cursor.fetchall()
+
+        # Recent leads
+        if where_clause:
+            recent_query = f'''
+            SELECT lead_id, company_name, customer_name, lead_status, updated_at, created_at
+            FROM leads 
+            WHERE 1=1 {where_clause}
+            ORDER BY updated_at DESC
+            LIMIT 10
+            '''
+        else:
+            recent_query = f'''
+            SELECT lead_id, company_name, customer_name, lead_status, updated_at, created_at
+            FROM leads 
+            ORDER BY updated_at DESC
+            LIMIT 10
+            '''
+        cursor.execute(recent_query, params)
+        recent_leads = cursor.fetchall()
+
+        # Value metrics: Total Proposed, Negotiated, Closing Amount
+        if where_clause:
+            value_query = f'''
+            SELECT 
+                COALESCE(SUM(approx_value), 0) as total_proposed,
+                COALESCE(SUM(negotiated_value), 0) as total_negotiated,
+                COALESCE(SUM(closing_amount), 0) as total_closing
+            FROM leads
+            WHERE 1=1 {where_clause}
+            '''
+        else:
+            value_query = '''
+            SELECT 
+                COALESCE(SUM(approx_value), 0) as total_proposed,
+                COALESCE(SUM(negotiated_value), 0) as total_negotiated,
+                COALESCE(SUM(closing_amount), 0) as total_closing
+            FROM leads
+            '''
+        cursor.execute(value_query, params)
+        value_result = cursor.fetchone()
+        
+        # Targets and Achievement (fetch active targets from database)
+        if user['role'] != 'admin':
+            targets_query = '''
+            SELECT t.id, t.name, t.type, t.target_value, t.current_value, 
+                   t.period, t.assigned_to, u.full_name as assigned_to_name
+            FROM targets t
+            LEFT JOIN users u ON t.assigned_to = u.id
+            WHERE t.is_active = 1
+            AND t.assigned_to = %s
+            ORDER BY t.created_at DESC
+            LIMIT 10
+            '''
+            cursor.execute(targets_query, [user['user_id']])
+        else:
+            targets_query = '''
+            SELECT t.id, t.name, t.type, t.target_value, t.current_value, 
+                   t.period, t.assigned_to, u.full_name as assigned_to_name
+            FROM targets t
+            LEFT JOIN users u ON t.assigned_to = u.id
+            WHERE t.is_active = 1
+            ORDER BY t.created_at DESC
+            LIMIT 10
+            '''
+            cursor.execute(targets_query)
+        targets_data = cursor.fetchall()
+        print(f"DEBUG: Found {len(targets_data) if targets_data else 0} targets for user {user['username']}")
+        
+        stats = {
+            "total_leads": total_leads,
+            "upcoming_followups": upcoming_followups,
+            "missed_followups": missed_followups,
+            "leads_by_status": [dict(s) for s in leads_by_status] if leads_by_status else [],
+            "recent_leads": [dict(l) for l in recent_leads] if recent_leads else [],
+            "value_metrics": {
+                "total_proposed": float(value_result['total_proposed']) if value_result else 0,
+                "total_negotiated": float(value_result['total_negotiated']) if value_result else 0,
+                "total_closing": float(value_result['total_closing']) if value_result else 0
+            },
+            "targets": [dict(t) for t in targets_data] if targets_data else []
+        }
+
+    return templates.TemplateResponse("dashboard.html", {
+        "request": request,
+        "user": user,
+        "today": date.today().isoformat(),
+        "stats": stats,
+        "follow_up_days": follow_up_days
+    })
+
+
+@router.get("/leads", response_class=HTMLResponse)
+async def leads_page(request: Request, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="You don't have permission to view leads")
+    prefs = get_preferences()
+    follow_up_days = int(prefs.get('followUpDays', 7))
+    aging_alert_days = int(prefs.get('agingAlertDays', 30))
+    return templates.TemplateResponse("leads.html", {
+        "request": request,
+        "user": user,
+        "today": date.today().isoformat(),
+        "follow_up_days": follow_up_days,
+        "aging_alert_days": aging_alert_days
+    })
+
+@router.get("/add-lead", response_class=HTMLResponse)
+async def add_lead_page(request: Request, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_create_leads'):
+        raise HTTPException(status_code=403, detail="You don't have permission to create leads")
+    return templates.TemplateResponse("add_lead.html", {"request": request, "user": user, "today": date.today().isoformat()})
+
+@router.get("/lead-detail/{lead_id}", response_class=HTMLResponse)
+async def lead_detail_page(request: Request, lead_id: str, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="You don't have permission to view leads")
+    return templates.TemplateResponse("lead_detail.html", {"request": request, "user": user, "lead_id": lead_id, "today": date.today().isoformat()})
+
+
+@router.get("/lead-reports/{lead_id}", response_class=HTMLResponse)
+async def lead_reports_page(request: Request, lead_id: str, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="You don't have permission to view lead reports")
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM lead_reports WHERE lead_id = %s ORDER BY uploaded_at DESC", (lead_id,))
+        rows = cursor.fetchall()
+    reports = [
+        {
+            "id": r["id"],
+            "name": r["name"],
+            "description": r["description"],
+            "filename": r["filename"],
+            "uploaded_at": r["uploaded_at"].strftime('%Y-%m-%d %H:%M') if r["uploaded_at"] else None,
+            "uploaded_by": r["uploaded_by"]
+        }
+        for r in rows
+    ]
+    return templates.TemplateResponse("lead_reports.html", {"request": request, "user": user, "lead_id": lead_id, "today": date.today().isoformat(), "reports": reports})
+
+@router.get("/edit-lead/{lead_id}", response_class=HTMLResponse)
+async def edit_lead_page(request: Request, lead_id: str, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_edit_leads'):
+        raise HTTPException(status_code=403, detail="You don't have permission to edit leads")
+    return templates.TemplateResponse("edit_lead.html", {"request": request, "user": user, "lead_id": lead_id, "today": date.today().isoformat()})
+
+@router.get("/users", response_class=HTMLResponse)
+async def users_page(request: Request, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_view_users'):
+        raise HTTPException(status_code=403, detail="You don't have permission to view users")
+    return templates.TemplateResponse("users.html", {"request": request, "user": user, "today": date.today().isoformat()})
+
+@router.get("/control-panel", response_class=HTMLResponse)
+async def control_panel_page(request: Request, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_view_users'):
+        raise HTTPException(status_code=403, detail="You don't have permission to access control panel")
+    return templates.TemplateResponse("control_panel.html", {"request": request, "user": user, "today": date.today().isoformat()})
+
+@router.get("/lead-settings", response_class=HTMLResponse)
+async def lead_settings_page(request: Request, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_manage_users'):
+        raise HTTPException(status_code=403, detail="You don't have permission to access lead settings")
+    return templates.TemplateResponse("lead_settings.html", {"request": request, "user": user, "today": date.today().isoformat()})
+
+@router.get("/target-management", response_class=HTMLResponse)
+async def target_management_page(request: Request, user: dict = Depends(get_current_user)):
+    # Admin users have full access, others also have access
+    # This is a page for all authenticated users to track targets
+    return templates.TemplateResponse("target_management.html", {"request": request, "user": user, "today": date.today().isoformat()})
+
+# Security & Audit page route (define after app and templates)
+@router.get("/security-audit", response_class=HTMLResponse)
+async def security_audit_page(request: Request, user: dict = Depends(lambda: {"role": "admin"})):
+    return templates.TemplateResponse("security_audit.html", {"request": request, "user": user})
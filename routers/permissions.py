@@ -0,0 +1,209 @@
+"""
+Permissions API
+Hierarchical permissions - tree, per-user assign / revoke, checks
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from core import get_db_connection, log_user_activity, get_current_user
+
+router = APIRouter()
+
+
+def build_permission_tree(all_perms: list) -> list:
+    """Nest permission rows under their parent_id (rows whose parent is missing are dropped)"""
+    tree = []
+    perm_map = {p['id']: {**p, 'children': []} for p in all_perms}
+    
+    for perm in all_perms:
+        if perm['parent_id'] is None:
+            tree.append(perm_map[perm['id']])
+        else:
+            if perm['parent_id'] in perm_map:
+                perm_map[perm['parent_id']]['children'].append(perm_map[perm['id']])
+    return tree
+
+
+# ==================== PERMISSION MANAGEMENT ENDPOINTS ====================
+
+@router.get("/api/permissions")
+async def get_all_permissions(user: dict = Depends(get_current_user)):
+    """Get all permissions with hierarchy - admin only"""
+    if user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view all permissions")
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT id, permission_key, permission_name, parent_id, category, level, description
+            FROM permissions
+            ORDER BY level, parent_id, permission_key
+            ''')
+            rows = cursor.fetchall()
+            permissions = [dict(r) for r in rows] if rows else []
+            
+            return {"success": True, "data": permissions}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/permissions/tree")
+async def get_permissions_tree(user: dict = Depends(get_current_user)):
+    """Get permissions as hierarchical tree structure - admin only"""
+    if user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view permission tree")
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT id, permission_key, permission_name, parent_id, category, level, description
+            FROM permissions
+            ORDER BY level, parent_id, permission_key
+            ''')
+            rows = cursor.fetchall()
+            all_perms = [dict(r) for r in rows] if rows else []
+            
+            return {"success": True, "data": build_permission_tree(all_perms)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/users/{user_id}/permissions")
+async def get_user_permissions(user_id: int, user: dict = Depends(get_current_user)):
+    """Get specific user's permissions - admin only"""
+    if user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can view user permissions")
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Get user details
+            cursor.execute('SELECT id, username, full_name, role FROM users WHERE id = %s', (user_id,))
+            user_data = cursor.fetchone()
+            if not user_data:
+                raise HTTPException(status_code=404, detail="User not found")
+            
+            # Get user's permissions
+            cursor.execute('''
+            SELECT p.id, p.permission_key, p.permission_name, p.parent_id, p.category, p.level,
+                   up.granted, up.granted_at
+            FROM user_permissions up
+            JOIN permissions p ON up.permission_id = p.id
+            WHERE up.user_id = %s AND up.granted = 1
+            ORDER BY p.level, p.permission_key
+            ''', (user_id,))
+            rows = cursor.fetchall()
+            permissions = [dict(r) for r in rows] if rows else []
+            
+            # Get permission keys only
+            permission_keys = [p['permission_key'] for p in permissions]
+            
+            return {
+                "success": True,
+                "user": dict(user_data),
+                "permissions": permissions,
+                "permission_keys": permission_keys
+            }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/users/{user_id}/permissions")
+async def assign_user_permissions(user_id: int, request: Request, user: dict = Depends(get_current_user)):
+    """Assign permissions to user - admin only"""
+    if user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Only admins can assign permissions")
+    
+    try:
+        data = await request.json()
+        permission_ids = data.get('permission_ids', [])
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Check if user exists
+            cursor.execute('SELECT id FROM users WHERE id = %s', (user_id,))
+            if not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="User not found")
+            
+            # Delete existing permissions
+            cursor.execute('DELETE FROM user_permissions WHERE user_id = %s', (user_id,))
+            
+            # Assign new permissions
+            for perm_id in permission_ids:
+                cursor.execute('''
+                INSERT INTO user_permissions (user_id, permission_id, granted, granted_by)
+                VALUES (%s, %s, 1, %s)
+                ''', (user_id, perm_id, user['user_id']))
+            
+            conn.commit()
+            
+            # Log activity
+            try:
+                log_user_activity(
+                    request=request,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="assign_permissions",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=True,
+                    status_code=200,
+                    details=f"Assigned {len(permission_ids)} permissions",
+                    session_token=user.get('session_token')
+                )
+            except:
+                pass
+            
+            return {"success": True, "message": f"Assigned {len(permission_ids)} permissions"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/api/users/{user_id}/permissions/{permission_id}")
+async def revoke_user_permission(user_id: int, permission_id: int, request: Request, user: dict = Depends(get_current_user)):
+    """Revoke specific permission from user"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            DELETE FROM user_permissions 
+            WHERE user_id = %s AND permission_id = %s
+            ''', (user_id, permission_id))
+            conn.commit()
+            
+            return {"success": True, "message": "Permission revoked"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/check-permission")
+async def check_permission(request: Request, user: dict = Depends(get_current_user)):
+    """Check if user has specific permission"""
+    try:
+        data = await request.json()
+        permission_key = data.get('permission_key')
+        
+        if not permission_key:
+            raise HTTPException(status_code=400, detail="permission_key required")
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT COUNT(*) as count
+            FROM user_permissions up
+            JOIN permissions p ON up.permission_id = p.id
+            WHERE up.user_id = %s AND p.permission_key = %s AND up.granted = 1
+            ''', (user['user_id'], permission_key))
+            result = cursor.fetchone()
+            has_permission = result['count'] > 0 if result else False
+            
+            return {"success": True, "has_permission": has_permission}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    
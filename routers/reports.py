@@ -0,0 +1,166 @@
+"""
+Reports API
+Dashboard stats aur lead report (PDF) upload / download / delete
+"""
+
+import uuid
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import FileResponse
+
+from database import get_connection
+from http_cache import ConditionalGet
+from core import get_db_connection, log_user_activity, get_current_user, check_user_permission
+
+router = APIRouter()
+
+@router.get("/api/dashboard/stats")
+async def get_dashboard_stats(user: dict = Depends(get_current_user), conditional: ConditionalGet = Depends()):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        where_clause = ""
+        params = []
+        
+        if user['role'] != 'admin':
+            where_clause = "WHERE (created_by = %s OR assigned_to = %s)"
+            params = [user['user_id'], user['user_id']]
+        
+        # Version probe: lead count (catches deletes) + latest updated_at for the visible leads
+        # (TIMESTAMP(6) since migration 0006 - edits within one second still change it)
+        cursor.execute(f'SELECT COUNT(*) as count, MAX(updated_at) as updated_at FROM leads {where_clause}', params)
+        result = cursor.fetchone()
+        total_leads = result['count'] if result else 0
+        not_modified = conditional.evaluate(
+            "dashboard_stats", user['user_id'], total_leads,
+            result['updated_at'] if result else None
+        )
+        if not_modified:
+            return not_modified
+        
+        status_query = f'''
+        SELECT lead_status, COUNT(*) as count 
+        FROM leads 
+        {where_clause}
+        GROUP BY lead_status
+        ORDER BY count DESC
+        '''
+        cursor.execute(status_query, params)
+        leads_by_status = cursor.fetchall()
+        
+        recent_query = f'''
+        SELECT lead_id, company_name, customer_name, lead_status, updated_at
+        FROM leads 
+        {where_clause}
+        ORDER BY updated_at DESC
+        LIMIT 10
+        '''
+        cursor.execute(recent_query, params)
+        recent_leads = cursor.fetchall()
+        recent = [dict(l) for l in recent_leads] if recent_leads else []
+        
+        result = {
+            "success": True,
+            "stats": {
+                "total_leads": total_leads,
+                "leads_by_status": [dict(s) for s in leads_by_status] if leads_by_status else [],
+                "recent_leads": recent
+            }
+        }
+        # Audit: view dashboard stats
+        try:
+            log_user_activity(
+                request=None,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="view",
+                resource_type="dashboard_stats",
+                resource_id=None,
+                success=True,
+                status_code=200,
+                details="Fetched dashboard stats",
+                session_token=user.get('session_token'),
+            )
+        except Exception:
+            pass
+        return result
+
+
+# --- Lead Report Upload/Download/Delete ---
+REPORTS_DIR = Path("uploads/reports")
+
+
+@router.post("/api/lead-report/upload/{lead_id}")
+async def upload_lead_report(lead_id: str, request: Request, file: UploadFile = File(...), name: str = Form(...), description: str = Form(...), user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_edit_leads'):
+        raise HTTPException(status_code=403, detail="No permission to upload report.")
+    if not file.filename.lower().endswith('.pdf') or file.content_type != 'application/pdf':
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed.")
+    report_id = str(uuid.uuid4())
+    ext = Path(file.filename).suffix
+    safe_name = f"{report_id}{ext}"
+    lead_folder = REPORTS_DIR / lead_id
+    lead_folder.mkdir(parents=True, exist_ok=True)
+    file_path = lead_folder / safe_name
+    with open(file_path, "wb") as f:
+        f.write(await file.read())
+    conn = get_connection()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO lead_reports (id, lead_id, name, description, filename, uploaded_at, uploaded_by) VALUES (%s, %s, %s, %s, %s, NOW(), %s)",
+            (report_id, lead_id, name, description, safe_name, user.get('username', 'Unknown'))
+        )
+    conn.commit()
+    conn.close()
+    return {"success": True}
+
+@router.get("/api/lead-report/list/{lead_id}")
+async def list_lead_reports(lead_id: str, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="No permission to view reports.")
+    conn = get_connection()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT * FROM lead_reports WHERE lead_id = %s ORDER BY uploaded_at DESC", (lead_id,))
+        rows = cursor.fetchall()
+    conn.close()
+    return [{"id": r["id"], "name": r["name"], "description": r["description"], "filename": r["filename"], "uploaded_at": r["uploaded_at"].strftime('%Y-%m-%d %H:%M'), "uploaded_by": r["uploaded_by"]} for r in rows]
+
+@router.get("/api/lead-report/download/{report_id}")
+async def download_lead_report(report_id: str, format: str = Query("original"), user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_view_leads'):
+        raise HTTPException(status_code=403, detail="No permission to download report.")
+    conn = get_connection()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT * FROM lead_reports WHERE id = %s", (report_id,))
+        row = cursor.fetchone()
+    conn.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="Report not found.")
+    file_path = REPORTS_DIR / row["lead_id"] / row["filename"]
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="File not found.")
+
+    ext = file_path.suffix.lower()
+    if ext != ".pdf":
+        raise HTTPException(status_code=400, detail="Only PDF files are available for download.")
+    return FileResponse(str(file_path), filename=row["name"], media_type="application/pdf")
+
+@router.delete("/api/lead-report/delete/{report_id}")
+async def delete_lead_report(report_id: str, user: dict = Depends(get_current_user)):
+    if not check_user_permission(user, 'can_edit_leads'):
+        raise HTTPException(status_code=403, detail="No permission to delete report.")
+    conn = get_connection()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT * FROM lead_reports WHERE id = %s", (report_id,))
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            raise HTTPException(status_code=404, detail="Report not found.")
+        file_path = REPORTS_DIR / row["lead_id"] / row["filename"]
+        if file_path.exists():
+            file_path.unlink()
+        cursor.execute("DELETE FROM lead_reports WHERE id = %s", (report_id,))
+    conn.commit()
+    conn.close()
+    return {"success": True}
@@ -0,0 +1,402 @@
+"""
+Targets API
+Targets CRUD aur progress calculation
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from core import get_db_connection, log_user_activity, get_current_user
+from lead_facts import facts_current
+from target_progress import compute_target_values, write_target_values
+from periods import PeriodError, parse_period
+
+router = APIRouter()
+
+# ============ TARGETS API ENDPOINTS ============
+
+@router.get("/api/targets")
+async def get_targets(user: dict = Depends(get_current_user)):
+    """Get all targets"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, name, type, target_value, current_value, 
+                     assigned_to, period, context_tab, description, is_active, 
+                   created_at, updated_at 
+            FROM targets 
+            WHERE is_active = 1
+            ORDER BY created_at DESC
+        ''')
+        targets = cursor.fetchall()
+        result = {
+            "success": True,
+            "targets": [dict(t) for t in targets] if targets else []
+        }
+        try:
+            log_user_activity(
+                request=None,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="view",
+                resource_type="target_list",
+                resource_id=None,
+                success=True,
+                status_code=200,
+                details="Fetched targets",
+                session_token=user.get('session_token'),
+            )
+        except Exception:
+            pass
+        return result
+
+def validate_target_period(period: Optional[str]):
+    """Reject periods the target engine cannot turn into a date range"""
+    try:
+        parse_period(period or '')
+    except PeriodError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/api/targets")
+async def create_target(request: Request, user: dict = Depends(get_current_user)):
+    """Create a new target"""
+    try:
+        data = await request.json()
+        validate_target_period(data.get('period'))
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO targets (name, type, target_value, current_value, assigned_to, period, context_tab, description, created_by)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ''', (
+                data.get('name'),
+                data.get('type'),
+                data.get('target_value', 0),
+                data.get('current_value', 0),
+                data.get('assigned_to', user['user_id']),
+                data.get('period'),
+                data.get('context_tab'),
+                data.get('description', ''),
+                user['user_id']
+            ))
+            conn.commit()
+            target_id = cursor.lastrowid
+            
+            try:
+                log_user_activity(
+                    request=request,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="create",
+                    resource_type="target",
+                    resource_id=str(target_id),
+                    success=True,
+                    status_code=200,
+                    details="Target created",
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {
+                "success": True,
+                "message": "Target created successfully",
+                "target_id": target_id
+            }
+    except HTTPException:
+        raise
+    except Exception as e:
+        try:
+            log_user_activity(
+                request=request,
+                user_id=user['user_id'] if isinstance(user, dict) else None,
+                username=user['username'] if isinstance(user, dict) else None,
+                action="create",
+                resource_type="target",
+                resource_id=None,
+                success=False,
+                status_code=500,
+                details=str(e),
+                session_token=user.get('session_token') if isinstance(user, dict) else None,
+            )
+        except Exception:
+            pass
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/api/targets/{target_id}")
+async def update_target(target_id: int, request: Request, user: dict = Depends(get_current_user)):
+    """Update an existing target"""
+    try:
+        data = await request.json()
+        
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Update the target
+            update_fields = []
+            params = []
+            
+            if 'name' in data:
+                update_fields.append('name = %s')
+                params.append(data['name'])
+            if 'type' in data:
+                update_fields.append('type = %s')
+                params.append(data['type'])
+            if 'target_value' in data:
+                update_fields.append('target_value = %s')
+                params.append(data['target_value'])
+            if 'current_value' in data:
+                update_fields.append('current_value = %s')
+                params.append(data['current_value'])
+            if 'period' in data:
+                validate_target_period(data['period'])
+                update_fields.append('period = %s')
+                params.append(data['period'])
+            if 'context_tab' in data:
+                update_fields.append('context_tab = %s')
+                params.append(data['context_tab'])
+            if 'description' in data:
+                update_fields.append('description = %s')
+                params.append(data['description'])
+            
+            update_fields.append('updated_at = CURRENT_TIMESTAMP')
+            params.append(target_id)
+            
+            query = f"UPDATE targets SET {', '.join(update_fields)} WHERE id = %s"
+            cursor.execute(query, params)
+            conn.commit()
+            
+            try:
+                log_user_activity(
+                    request=request,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="update",
+                    resource_type="target",
+                    resource_id=str(target_id),
+                    success=True,
+                    status_code=200,
+                    details="Target updated",
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {
+                "success": True,
+                "message": "Target updated successfully"
+            }
+    except HTTPException:
+        raise
+    except Exception as e:
+        try:
+            log_user_activity(
+                request=request,
+                user_id=user['user_id'] if isinstance(user, dict) else None,
+                username=user['username'] if isinstance(user, dict) else None,
+                action="update",
+                resource_type="target",
+                resource_id=str(target_id),
+                success=False,
+                status_code=500,
+                details=str(e),
+                session_token=user.get('session_token') if isinstance(user, dict) else None,
+            )
+        except Exception:
+            pass
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/api/targets/{target_id}")
+async def delete_target(target_id: int, user: dict = Depends(get_current_user)):
+    """Delete a target"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # Soft delete - set is_active to 0
+            cursor.execute('''
+                UPDATE targets 
+                SET is_active = 0, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+            ''', (target_id,))
+            conn.commit()
+            
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="delete",
+                    resource_type="target",
+                    resource_id=str(target_id),
+                    success=True,
+                    status_code=200,
+                    details="Target deleted",
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {
+                "success": True,
+                "message": "Target deleted successfully"
+            }
+    except Exception as e:
+        try:
+            log_user_activity(
+                request=None,
+                user_id=user['user_id'] if isinstance(user, dict) else None,
+                username=user['username'] if isinstance(user, dict) else None,
+                action="delete",
+                resource_type="target",
+                resource_id=str(target_id),
+                success=False,
+                status_code=500,
+                details=str(e),
+                session_token=user.get('session_token') if isinstance(user, dict) else None,
+            )
+        except Exception:
+            pass
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/targets/{target_id}/calculate-progress")
+async def calculate_target_progress(target_id: int, user: dict = Depends(get_current_user)):
+    """Calculate and update target progress based on actual lead history"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Debug log
+            print(f"🔍 Looking for target_id: {target_id} (type: {type(target_id)})")
+            
+            # Get target details
+            cursor.execute('SELECT * FROM targets WHERE id = %s', (target_id,))
+            target = cursor.fetchone()
+            
+            if not target:
+                # Check what targets exist
+                cursor.execute('SELECT id, name FROM targets ORDER BY id DESC LIMIT 5')
+                existing_targets = cursor.fetchall()
+                print(f"⚠️ Target {target_id} not found. Recent targets: {existing_targets}")
+                raise HTTPException(status_code=404, detail=f"Target not found (ID: {target_id})")
+            
+            period = target.get('period')
+            
+            # Same engine as calculate-all (a batch of one). Facts only when they match raw history -
+            # rebuilding them here would lock fact days against the refresh job and other requests
+            progress = compute_target_values(cursor, [target], use_facts=facts_current(cursor))[target_id]
+            if progress['current_value'] is None:
+                raise HTTPException(status_code=400, detail=progress['error'])
+            current_value = progress['current_value']
+            date_start, date_end = progress['date_start'], progress['date_end']
+            
+            write_target_values(cursor, {target_id: current_value})
+            conn.commit()
+            
+            # Calculate percentage
+            target_value = float(target.get('target_value', 0))
+            percentage = round((current_value / target_value * 100), 2) if target_value > 0 else 0
+            
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="calculate",
+                    resource_type="target",
+                    resource_id=str(target_id),
+                    success=True,
+                    status_code=200,
+                    details=f"Progress calculated: {current_value}/{target_value}",
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+                
+            return {
+                "success": True,
+                "target_id": target_id,
+                "current_value": current_value,
+                "target_value": target_value,
+                "percentage": percentage,
+                "period": period,
+                "date_range": {"start": date_start, "end": date_end},
+                "message": "Target progress calculated successfully"
+            }
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        try:
+            log_user_activity(
+                request=None,
+                user_id=user['user_id'] if isinstance(user, dict) else None,
+                username=user['username'] if isinstance(user, dict) else None,
+                action="calculate",
+                resource_type="target",
+                resource_id=str(target_id),
+                success=False,
+                status_code=500,
+                details=str(e),
+                session_token=user.get('session_token') if isinstance(user, dict) else None,
+            )
+        except Exception:
+            pass
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/targets/calculate-all")
+async def calculate_all_targets_progress(user: dict = Depends(get_current_user)):
+    """Calculate progress for all active targets (batched - few grouped queries, one UPDATE)"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, name, type, target_value, assigned_to, period, context_tab
+                FROM targets
+                WHERE is_active = 1
+            ''')
+            targets = cursor.fetchall() or []
+            
+            progress = compute_target_values(cursor, targets, use_facts=facts_current(cursor))
+            write_target_values(cursor, {tid: p['current_value'] for tid, p in progress.items()})
+            conn.commit()
+            
+            results = []
+            for target in targets:
+                target_progress = progress[target['id']]
+                current_value = target_progress['current_value']
+                if current_value is None:
+                    results.append({"target_id": target['id'], "success": False, "error": target_progress['error']})
+                    continue
+                target_value = float(target.get('target_value') or 0)
+                results.append({
+                    "success": True,
+                    "target_id": target['id'],
+                    "current_value": current_value,
+                    "target_value": target_value,
+                    "percentage": round((current_value / target_value * 100), 2) if target_value > 0 else 0,
+                    "period": target.get('period'),
+                    "date_range": {"start": target_progress['date_start'], "end": target_progress['date_end']},
+                })
+            
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=user['user_id'],
+                    username=user['username'],
+                    action="calculate",
+                    resource_type="target_list",
+                    resource_id=None,
+                    success=True,
+                    status_code=200,
+                    details=f"Progress calculated for {len(results)} targets",
+                    session_token=user.get('session_token'),
+                )
+            except Exception:
+                pass
+            
+            return {
+                "success": True,
+                "message": f"Calculated {len(results)} targets",
+                "results": results
+            }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
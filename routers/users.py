@@ -0,0 +1,728 @@
+"""
+Users API
+Users CRUD, photo upload, status / activation aur designations
+"""
+
+import json
+import os
+import shutil
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+
+from models import UserPermissions, UserCreate
+from core import (
+    get_db_connection, log_user_activity, hash_password, get_current_user, check_user_permission,
+)
+
+router = APIRouter()
+
+@router.get("/api/designations")
+async def get_designations(user: dict = Depends(get_current_user)):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, name FROM designations ORDER BY name')
+        designations = cursor.fetchall()
+        result = {
+            "success": True,
+            "designations": [dict(d) for d in designations]
+        }
+        try:
+            log_user_activity(
+                request=None,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="view",
+                resource_type="designations",
+                resource_id=None,
+                success=True,
+                status_code=200,
+                details="Fetched designations",
+                session_token=user.get('session_token'),
+            )
+        except Exception:
+            pass
+        return result
+
+@router.post("/api/designations")
+async def create_designation(designation_data: dict, current_user: dict = Depends(get_current_user)):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('INSERT INTO designations (name) VALUES (%s)', (designation_data.get('name'),))
+            conn.commit()
+            new_id = cursor.lastrowid
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="create",
+                    resource_type="designation",
+                    resource_id=str(new_id),
+                    success=True,
+                    status_code=200,
+                    details=f"Created designation {designation_data.get('name')}",
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {
+                "success": True,
+                "id": new_id,
+                "name": designation_data.get('name')
+            }
+        except Exception as e:
+            conn.rollback()
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="create",
+                    resource_type="designation",
+                    resource_id=None,
+                    success=False,
+                    status_code=400,
+                    details=str(e),
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            raise HTTPException(status_code=400, detail=str(e))
+
+# Sortable columns for /api/users (whitelist - never interpolate raw input)
+USER_SORT_COLUMNS = {
+    "username": "u.username",
+    "full_name": "u.full_name",
+    "email": "u.email",
+    "designation": "u.designation",
+    "role": "u.role",
+    "is_active": "u.is_active",
+    "created_at": "u.created_at",
+    "last_login": "u.last_login",
+    "permission_count": "permission_count",
+}
+
+
+@router.get("/api/users")
+async def get_all_users(
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    status: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    page: int = 1,
+    limit: Optional[int] = None,
+    user: dict = Depends(get_current_user)
+):
+    """Users directory - paginated when `limit` is given, full list otherwise (dropdowns)"""
+    if not check_user_permission(user, 'can_view_users'):
+        raise HTTPException(status_code=403, detail="No permission to view users")
+    
+    sort_column = USER_SORT_COLUMNS.get(sort)
+    if sort_column is None:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort}")
+    sort_order = "ASC" if order.lower() == "asc" else "DESC"
+    page = max(page, 1)
+    if limit is not None:
+        limit = max(1, min(limit, 200))
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Header stats cover the whole directory, not just the current filter
+        cursor.execute('''
+        SELECT COUNT(*) as total,
+               COALESCE(SUM(is_active = 1), 0) as active
+        FROM users
+        WHERE id != %s
+        ''', (user['user_id'],))
+        stats_row = cursor.fetchone() or {}
+        
+        where = "WHERE u.id != %s"
+        params = [user['user_id']]
+        if role:
+            where += " AND u.role = %s"
+            params.append(role)
+        if status == 'active':
+            where += " AND u.is_active = 1"
+        elif status == 'inactive':
+            where += " AND u.is_active = 0"
+        if search:
+            where += " AND (u.username LIKE %s OR u.full_name LIKE %s OR u.email LIKE %s OR u.designation LIKE %s OR u.mobile_no LIKE %s)"
+            search_term = f"%{search}%"
+            params.extend([search_term] * 5)
+        
+        # Permission counts folded in with one grouped join (uses idx_user_permissions_user_granted)
+        query = f'''
+        SELECT u.*, uc.full_name as created_by_name,
+               COALESCE(pc.permission_count, 0) as permission_count
+        FROM users u
+        LEFT JOIN users uc ON u.created_by = uc.id
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) as permission_count
+            FROM user_permissions
+            WHERE granted = 1
+            GROUP BY user_id
+        ) pc ON pc.user_id = u.id
+        {where}
+        ORDER BY {sort_column} {sort_order}, u.id {sort_order}
+        '''
+        query_params = list(params)
+        if limit is not None:
+            query += " LIMIT %s OFFSET %s"
+            query_params.extend([limit, (page - 1) * limit])
+        
+        cursor.execute(query, query_params)
+        users_data = cursor.fetchall()
+        users_list = [dict(u) for u in users_data] if users_data else []
+        
+        stats_total = int(stats_row.get('total') or 0)
+        stats_active = int(stats_row.get('active') or 0)
+        result = {
+            "success": True,
+            "users": users_list,
+            "stats": {
+                "total": stats_total,
+                "active": stats_active,
+                "inactive": stats_total - stats_active
+            }
+        }
+        if limit is not None:
+            cursor.execute(f"SELECT COUNT(*) as count FROM users u {where}", params)
+            total = cursor.fetchone()['count']
+            result["pagination"] = {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": (total + limit - 1) // limit if limit > 0 else 0
+            }
+        try:
+            log_user_activity(
+                request=None,
+                user_id=user['user_id'],
+                username=user['username'],
+                action="view",
+                resource_type="user_list",
+                resource_id=None,
+                success=True,
+                status_code=200,
+                details=f"Fetched users (page {page})" if limit is not None else "Fetched all users",
+                session_token=user.get('session_token'),
+            )
+        except Exception:
+            pass
+        return result
+
+@router.post("/api/users")
+async def create_user(user_data: UserCreate, current_user: dict = Depends(get_current_user)):
+    if not check_user_permission(current_user, 'can_manage_users'):
+        raise HTTPException(status_code=403, detail="No permission to manage users")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT id FROM users WHERE username = %s', (user_data.username,))
+        if cursor.fetchone():
+            raise HTTPException(status_code=400, detail="Username already exists")
+        
+        if not user_data.permissions:
+            default_perms = {
+                'admin': UserPermissions().dict(),
+                'sales': UserPermissions(can_view_users=False, can_manage_users=False, can_delete_leads=False, can_edit_leads=True).dict()
+            }
+            permissions = default_perms.get(user_data.role.value, UserPermissions().dict())
+        else:
+            permissions = user_data.permissions
+        
+        hashed_password = hash_password(user_data.password)
+        
+        try:
+            cursor.execute('''
+            INSERT INTO users (username, password, first_name, last_name, full_name, email, designation, mobile_no, date_of_birth, photo, role, permissions, created_by)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ''', (
+                user_data.username,
+                hashed_password,
+                user_data.first_name,
+                user_data.last_name,
+                user_data.full_name,
+                user_data.email,
+                user_data.designation,
+                user_data.mobile_no,
+                user_data.date_of_birth,
+                user_data.photo,
+                user_data.role.value,
+                json.dumps(permissions),
+                current_user['user_id']
+            ))
+            
+            # New admins get every hierarchical permission (used to happen on the next restart)
+            if user_data.role.value == 'admin':
+                cursor.execute('''
+                INSERT IGNORE INTO user_permissions (user_id, permission_id, granted, granted_by)
+                SELECT %s, p.id, 1, %s FROM permissions p
+                ''', (cursor.lastrowid, current_user['user_id']))
+            
+            conn.commit()
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="create",
+                    resource_type="user",
+                    resource_id=user_data.username,
+                    success=True,
+                    status_code=200,
+                    details="User created",
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {
+                "success": True,
+                "message": "User created successfully"
+            }
+        except Exception as e:
+            conn.rollback()
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="create",
+                    resource_type="user",
+                    resource_id=user_data.username,
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/users/active")
+async def get_active_users(user: dict = Depends(get_current_user)):
+    """Get list of active users for assignment dropdowns"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT id, username, full_name, role, designation, email, mobile_no
+        FROM users 
+        WHERE is_active = 1
+        ORDER BY full_name
+        ''')
+        
+        users = cursor.fetchall()
+        
+        return {
+            "success": True,
+            "users": [dict(u) for u in users] if users else []
+        }
+
+# Upload user photo and return relative path under static/
+@router.post("/api/upload/photo")
+async def upload_photo(file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
+    if not check_user_permission(current_user, 'can_manage_users'):
+        raise HTTPException(status_code=403, detail="No permission to manage users")
+
+    try:
+        upload_dir = os.path.join("static", "uploads", "users")
+        os.makedirs(upload_dir, exist_ok=True)
+
+        # Validate and build filename
+        _, ext = os.path.splitext(file.filename or '')
+        ext = ext.lower()
+        if ext not in {'.jpg', '.jpeg', '.png', '.gif', '.webp'}:
+            raise HTTPException(status_code=400, detail="Unsupported file type")
+
+        filename = f"{uuid.uuid4().hex}{ext}"
+        dest_path = os.path.join(upload_dir, filename)
+
+        with open(dest_path, 'wb') as out_file:
+            shutil.copyfileobj(file.file, out_file)
+
+        rel_path = f"uploads/users/{filename}"
+        return {"success": True, "path": rel_path}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/api/users/{user_id}")
+async def update_user(user_id: int, user_data: dict, current_user: dict = Depends(get_current_user)):
+    if not check_user_permission(current_user, 'can_manage_users'):
+        raise HTTPException(status_code=403, detail="No permission to manage users")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Check if user exists
+        cursor.execute('SELECT id FROM users WHERE id = %s', (user_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        try:
+            # Build update query dynamically based on provided fields
+            fields = []
+            values = []
+            
+            if 'first_name' in user_data:
+                fields.append('first_name = %s')
+                values.append(user_data['first_name'])
+            if 'last_name' in user_data:
+                fields.append('last_name = %s')
+                values.append(user_data['last_name'])
+            if 'full_name' in user_data:
+                fields.append('full_name = %s')
+                values.append(user_data['full_name'])
+            if 'email' in user_data:
+                fields.append('email = %s')
+                values.append(user_data['email'])
+            if 'designation' in user_data:
+                fields.append('designation = %s')
+                values.append(user_data['designation'])
+            if 'mobile_no' in user_data:
+                fields.append('mobile_no = %s')
+                values.append(user_data['mobile_no'])
+            if 'date_of_birth' in user_data:
+                fields.append('date_of_birth = %s')
+                values.append(user_data['date_of_birth'])
+            if 'photo' in user_data:
+                fields.append('photo = %s')
+                values.append(user_data['photo'])
+            if 'role' in user_data:
+                fields.append('role = %s')
+                values.append(user_data['role'])
+            if 'password' in user_data:
+                fields.append('password = %s')
+                values.append(hash_password(user_data['password']))
+            
+            if not fields:
+                raise HTTPException(status_code=400, detail="No fields to update")
+            
+            values.append(user_id)
+            query = f"UPDATE users SET {', '.join(fields)} WHERE id = %s"
+            
+            cursor.execute(query, values)
+            conn.commit()
+            
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="update",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=True,
+                    status_code=200,
+                    details="User updated",
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {
+                "success": True,
+                "message": "User updated successfully"
+            }
+        except Exception as e:
+            conn.rollback()
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="update",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/api/users/{user_id}/permissions")
+async def update_user_permissions(user_id: int, permissions_data: dict, current_user: dict = Depends(get_current_user)):
+    if not check_user_permission(current_user, 'can_manage_users'):
+        raise HTTPException(status_code=403, detail="No permission to manage users")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Check if user exists
+        cursor.execute('SELECT id FROM users WHERE id = %s', (user_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        try:
+            # Get permissions dict
+            permissions = permissions_data.get('permissions', {})
+            
+            cursor.execute(
+                'UPDATE users SET permissions = %s WHERE id = %s',
+                (json.dumps(permissions), user_id)
+            )
+            conn.commit()
+            
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="update_permissions",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=True,
+                    status_code=200,
+                    details="Permissions updated",
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {
+                "success": True,
+                "message": "Permissions updated successfully"
+            }
+        except Exception as e:
+            conn.rollback()
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="update_permissions",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/api/users/{user_id}/status")
+async def update_user_status(user_id: int, status_data: dict, current_user: dict = Depends(get_current_user)):
+    if not check_user_permission(current_user, 'can_manage_users'):
+        raise HTTPException(status_code=403, detail="No permission to manage users")
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Check if user exists
+        cursor.execute('SELECT id FROM users WHERE id = %s', (user_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        try:
+            is_active = status_data.get('is_active', True)
+            
+            cursor.execute(
+                'UPDATE users SET is_active = %s WHERE id = %s',
+                (is_active, user_id)
+            )
+            conn.commit()
+            
+            status_text = "activated" if is_active else "deactivated"
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="update_status",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=True,
+                    status_code=200,
+                    details=f"User {status_text}",
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            return {
+                "success": True,
+                "message": f"User {status_text} successfully"
+            }
+        except Exception as e:
+            conn.rollback()
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="update_status",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+            raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/api/users/{user_id}")
+async def delete_user(
+    user_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    if not check_user_permission(current_user, 'can_manage_users'):
+        raise HTTPException(status_code=403, detail="No permission to manage users")
+
+    # Prevent self-deactivation
+    if current_user['user_id'] == user_id:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot deactivate your own account"
+        )
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()  # DictCursor already configured in connection
+
+        # 1️⃣ Check if user exists
+        cursor.execute(
+            "SELECT id, is_active FROM users WHERE id = %s",
+            (user_id,)
+        )
+        user = cursor.fetchone()
+
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # 2️⃣ Check if already deactivated
+        if user['is_active'] == 0:
+            raise HTTPException(
+                status_code=400,
+                detail="User already deactivated"
+            )
+
+        try:
+            # 3️⃣ SOFT DELETE (Deactivate)
+            cursor.execute(
+                "UPDATE users SET is_active = 0 WHERE id = %s",
+                (user_id,)
+            )
+            conn.commit()
+
+            # 4️⃣ Audit log (non-blocking)
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="deactivate",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=True,
+                    status_code=200,
+                    details="User deactivated",
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+
+            return {
+                "success": True,
+                "message": "User deactivated successfully"
+            }
+
+        except Exception as e:
+            conn.rollback()
+
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="deactivate",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+
+            raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/api/users/{user_id}/activate")
+async def activate_user(
+    user_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    if not check_user_permission(current_user, 'can_manage_users'):
+        raise HTTPException(status_code=403, detail="No permission to manage users")
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()  # DictCursor
+
+        # 1️⃣ Check if user exists
+        cursor.execute("SELECT id, is_active FROM users WHERE id = %s", (user_id,))
+        user = cursor.fetchone()
+
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # 2️⃣ Check if already active
+        if user['is_active'] == 1:
+            raise HTTPException(status_code=400, detail="User already active")
+
+        try:
+            # 3️⃣ Activate user
+            cursor.execute("UPDATE users SET is_active = 1 WHERE id = %s", (user_id,))
+            conn.commit()
+
+            # 4️⃣ Audit log (non-blocking)
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="activate",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=True,
+                    status_code=200,
+                    details="User activated",
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+
+            return {
+                "success": True,
+                "message": "User activated successfully"
+            }
+
+        except Exception as e:
+            conn.rollback()
+            try:
+                log_user_activity(
+                    request=None,
+                    user_id=current_user['user_id'],
+                    username=current_user['username'],
+                    action="activate",
+                    resource_type="user",
+                    resource_id=str(user_id),
+                    success=False,
+                    status_code=500,
+                    details=str(e),
+                    session_token=current_user.get('session_token'),
+                )
+            except Exception:
+                pass
+
+            raise HTTPException(status_code=500, detail=str(e))
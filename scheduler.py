@@ -0,0 +1,140 @@
+"""
+In-process background scheduler
+Periodic jobs (target progress recompute etc.) run on the app's event loop
+
+Every run takes a MySQL named lock (GET_LOCK) first, so when several workers
+are running only one of them does the work; the others record a skip.
+The job body runs in a worker thread on the connection that holds the lock.
+"""
+
+import asyncio
+import random
+import time
+import traceback
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from database import get_db
+from metrics import Histogram
+
+# Seconds - jobs range from sub-second incremental refreshes to multi-minute recomputes
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+class PeriodicJob:
+    """One recurring job with cadence, jitter, single-runner lock and last-run metrics"""
+
+    def __init__(self, name: str, func: Callable, interval: int, jitter: int = 0,
+                 initial_delay: int = 0, lock_name: Optional[str] = None):
+        self.name = name
+        self.func = func                  # func(conn) -> optional result summary
+        self.interval = interval          # seconds between runs
+        self.jitter = jitter              # +/- random seconds, spreads workers apart
+        self.initial_delay = initial_delay
+        self.lock_name = lock_name or f"crm_job:{name}"
+        self.task: Optional[asyncio.Task] = None
+        self.durations = Histogram(JOB_DURATION_BUCKETS)  # runs that took the lock (ok or error)
+        self.metrics = {
+            "runs": 0,
+            "errors": 0,
+            "skipped": 0,
+            "last_status": None,          # ok / error / skipped_locked
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_duration_ms": None,
+            "last_error": None,
+            "last_result": None,
+            "next_run_at": None,
+        }
+
+    def next_delay(self) -> float:
+        return max(1.0, self.interval + random.uniform(-self.jitter, self.jitter))
+
+    def run_once(self) -> str:
+        """Run the job if this worker wins the lock. Blocking - call from a thread."""
+        started = time.perf_counter()
+        ran = True
+        self.metrics["last_started_at"] = datetime.now().isoformat(timespec="seconds")
+        try:
+            with get_db() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT GET_LOCK(%s, 0) as acquired", (self.lock_name,))
+                row = cursor.fetchone()
+                if not row or not row.get("acquired"):
+                    self.metrics["skipped"] += 1
+                    self.metrics["last_status"] = "skipped_locked"
+                    ran = False
+                    return "skipped_locked"
+                try:
+                    result = self.func(conn)
+                    conn.commit()
+                finally:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (self.lock_name,))
+            self.metrics["runs"] += 1
+            self.metrics["last_status"] = "ok"
+            self.metrics["last_error"] = None
+            self.metrics["last_result"] = result
+            return "ok"
+        except Exception as e:
+            self.metrics["errors"] += 1
+            self.metrics["last_status"] = "error"
+            self.metrics["last_error"] = f"{type(e).__name__}: {e}"
+            print(f"⚠️ Scheduled job '{self.name}' failed: {e}")
+            traceback.print_exc()
+            return "error"
+        finally:
+            self.metrics["last_finished_at"] = datetime.now().isoformat(timespec="seconds")
+            elapsed = time.perf_counter() - started
+            self.metrics["last_duration_ms"] = round(elapsed * 1000, 1)
+            if ran:
+                self.durations.observe(elapsed)
+
+    async def _loop(self):
+        delay = self.initial_delay + random.uniform(0, self.jitter)
+        while True:
+            self.metrics["next_run_at"] = datetime.fromtimestamp(time.time() + delay).isoformat(timespec="seconds")
+            await asyncio.sleep(delay)
+            await asyncio.to_thread(self.run_once)
+            delay = self.next_delay()
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "jitter": self.jitter,
+            "running": self.task is not None and not self.task.done(),
+            **self.metrics,
+        }
+
+
+class BackgroundScheduler:
+    """Holds the app's periodic jobs; start() from startup, stop() from shutdown"""
+
+    def __init__(self):
+        self.jobs: Dict[str, PeriodicJob] = {}
+
+    def add_job(self, name: str, func: Callable, interval: int, jitter: int = 0,
+                initial_delay: int = 0, lock_name: Optional[str] = None) -> PeriodicJob:
+        job = PeriodicJob(name, func, interval, jitter, initial_delay, lock_name)
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        for job in self.jobs.values():
+            if job.task is None or job.task.done():
+                job.task = asyncio.get_running_loop().create_task(job._loop())
+
+    async def stop(self):
+        tasks = [job.task for job in self.jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            job.task = None
+
+    async def run_now(self, name: str) -> str:
+        """Trigger a job immediately (still honours the single-runner lock)"""
+        return await asyncio.to_thread(self.jobs[name].run_once)
+
+    def snapshot(self) -> list:
+        return [job.snapshot() for job in self.jobs.values()]
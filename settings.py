@@ -0,0 +1,61 @@
+"""
+Application settings
+create_app(Settings(...)) - defaults match the production deployment
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class Settings:
+    title: str = "Smart CRM System"
+    static_dir: str = "static"
+    templates_dir: str = "templates"
+    cors_origins: List[str] = field(default_factory=lambda: ["*"])
+
+    # Response compression (gzip / brotli) - responses smaller than the threshold go out raw
+    compression_min_size: int = 1024  # bytes
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5
+
+    # Startup work. "background" runs migrations in a worker thread after the app starts
+    # serving (/api/health reports 503 until done); "blocking" waits for them; "off" skips them.
+    db_init: str = "background"
+    prepare_static_assets: bool = True  # pre-compress + fingerprint static files (background thread)
+
+    # Request timing (Server-Timing header + JSON log line). Requests at least this slow are
+    # logged; 0 logs every request, None turns logging off
+    request_log_threshold_ms: Optional[float] = 500
+    server_timing_header: bool = True
+    metrics_enabled: bool = True  # per-route request metrics + GET /metrics (Prometheus)
+
+    # SQL statement aggregates (GET /api/admin/queries) and slow-query log. explain_slow_queries
+    # runs EXPLAIN FORMAT=JSON for slow statements - an extra query, meant for debugging
+    query_log_enabled: bool = True
+    slow_query_ms: Optional[float] = 200
+    explain_slow_queries: bool = False
+
+    # On-demand cProfile of admin requests sent with `X-Profile: 1` or `?profile=1`.
+    # Off = middleware not installed at all
+    profiling_enabled: bool = False
+    profile_sample_rate: float = 1.0  # share of flagged requests actually profiled
+    profile_dir: str = "profiles"
+    profile_max_files: int = 50
+
+    # Background jobs - lead writes update targets incrementally (apply_lead_changes),
+    # one worker periodically recomputes everything from history to correct drift
+    scheduler_enabled: bool = True
+    target_recompute_interval: int = 900  # seconds
+    target_recompute_jitter: int = 30  # +/- seconds so workers don't all wake together
+    lead_facts_refresh_interval: int = 300  # seconds - lead_daily_facts incremental refresh
+    digest_check_interval: int = 900  # daily digest checks every 15 min, sends once a day
+
+    # audit_logs retention: monthly partitions that ended more than audit_retention_days ago are
+    # exported to <audit_archive_dir>/audit_logs_YYYY-MM.ndjson.gz and dropped (None: keep all)
+    audit_retention_days: Optional[int] = 365
+    audit_archive_dir: str = "archive/audit_logs"
+    audit_retention_interval: int = 86400  # seconds - also creates the upcoming month partitions
+
+    # Optional routers from tools/
+    include_tool_routers: bool = True
@@ -1,7 +1,11 @@
 // Global variables
 let currentUser = null;
-let allUsers = [];
+let allUsers = [];        // users on the current page (server-side paginated)
 let filteredUsers = [];
+let usersPage = 1;
+let usersTotalPages = 1;
+let usersTotal = 0;
+const USERS_PAGE_SIZE = 25;
 let allDesignations = [];
 let userRoles = ['admin', 'manager', 'sales', 'viewer'];
 
@@ -59,9 +63,22 @@ async function loadUsersData() {
         const statusFilter = document.getElementById('statusFilter')?.value || '';
         const searchQuery = document.getElementById('searchInput')?.value || '';
         
-        console.log('📋 Filters:', { roleFilter, statusFilter, searchQuery });
+        const [sortField, sortOrder] = (document.getElementById('sortSelect')?.value || 'created_at:desc').split(':');
         
-        const response = await fetch('/api/users', {
+        console.log('📋 Filters:', { roleFilter, statusFilter, searchQuery, usersPage });
+        
+        // Search, filters, sort and paging are all done server-side
+        const params = new URLSearchParams({
+            page: usersPage,
+            limit: USERS_PAGE_SIZE,
+            sort: sortField,
+            order: sortOrder
+        });
+        if (roleFilter) params.append('role', roleFilter);
+        if (statusFilter) params.append('status', statusFilter);
+        if (searchQuery) params.append('search', searchQuery);
+        
+        const response = await fetch(`/api/users?${params.toString()}`, {
             method: 'GET',
             headers: {
                 'Content-Type': 'application/json'
@@ -81,12 +98,21 @@ async function loadUsersData() {
         if (data.success) {
             // API returns users in `data` key; fallback to `users`
             allUsers = data.data || data.users || [];
-            console.log('✅ Users loaded:', allUsers.length);
-            filteredUsers = filterUsersData(allUsers, roleFilter, statusFilter, searchQuery);
+            filteredUsers = allUsers;
+            usersTotal = data.pagination?.total ?? allUsers.length;
+            usersTotalPages = data.pagination?.pages || 1;
+            console.log('✅ Users loaded:', allUsers.length, 'of', usersTotal);
+            
+            // Page fell off the end (e.g. after a delete) - step back
+            if (allUsers.length === 0 && usersPage > 1 && usersPage > usersTotalPages) {
+                usersPage = usersTotalPages;
+                return loadUsersData();
+            }
             
             // Update UI
             updateUsersTable();
-            updateUserStats();
+            updateUserStats(data.stats);
+            updateUsersPagination();
         } else {
             throw new Error(data.detail || 'Failed to load users');
         }
@@ -112,40 +138,6 @@ async function loadUsersData() {
     }
 }
 
-// Filter users data
-function filterUsersData(users, roleFilter, statusFilter, searchQuery) {
-    return users.filter(user => {
-        // Filter by role
-        if (roleFilter && user.role !== roleFilter) {
-            return false;
-        }
-        
-        // Filter by status
-        if (statusFilter) {
-            const isActive = user.is_active === 1 || user.is_active === true;
-            if (statusFilter === 'active' && !isActive) return false;
-            if (statusFilter === 'inactive' && isActive) return false;
-        }
-        
-        // Filter by search query
-        if (searchQuery) {
-            const searchTerm = searchQuery.toLowerCase();
-            const searchableText = `
-                ${user.username || ''}
-                ${user.full_name || ''}
-                ${user.email || ''}
-                ${user.role || ''}
-            `.toLowerCase();
-            
-            if (!searchableText.includes(searchTerm)) {
-                return false;
-            }
-        }
-        
-        return true;
-    });
-}
-
 // Update users table
 function updateUsersTable() {
     const tbody = document.getElementById('usersTableBody');
@@ -181,7 +173,7 @@ function updateUsersTable() {
 
         html += `
             <tr>
-                <td>${index + 1}</td>
+                <td>${(usersPage - 1) * USERS_PAGE_SIZE + index + 1}</td>
                 <td>${renderUserPhoto(user)}</td>
                 <td>${escapeHtml(user.username || '')}</td>
                 <td>${escapeHtml(user.full_name || '')}</td>
@@ -208,18 +200,41 @@ function updateUsersTable() {
     tbody.innerHTML = html;
 }
 
-// Update user stats
-function updateUserStats() {
+// Update user stats (directory-wide counts from the API)
+function updateUserStats(stats) {
     const totalEl = document.getElementById('users-count');
     const activeEl = document.getElementById('active-count');
     const inactiveEl = document.getElementById('inactive-count');
 
-    const activeCount = allUsers.filter(u => u.is_active === 1 || u.is_active === true).length;
-    const inactiveCount = allUsers.length - activeCount;
+    if (!stats) return;
+
+    if (totalEl) totalEl.textContent = String(stats.total ?? 0);
+    if (activeEl) activeEl.textContent = String(stats.active ?? 0);
+    if (inactiveEl) inactiveEl.textContent = String(stats.inactive ?? 0);
+}
+
+// Update pagination bar
+function updateUsersPagination() {
+    const infoEl = document.getElementById('usersPageInfo');
+    const labelEl = document.getElementById('usersPageLabel');
+    const prevBtn = document.getElementById('usersPrevPage');
+    const nextBtn = document.getElementById('usersNextPage');
+
+    const start = usersTotal === 0 ? 0 : (usersPage - 1) * USERS_PAGE_SIZE + 1;
+    const end = Math.min(usersPage * USERS_PAGE_SIZE, usersTotal);
+
+    if (infoEl) infoEl.textContent = `Showing ${start}-${end} of ${usersTotal}`;
+    if (labelEl) labelEl.textContent = `Page ${usersPage} of ${usersTotalPages}`;
+    if (prevBtn) prevBtn.disabled = usersPage <= 1;
+    if (nextBtn) nextBtn.disabled = usersPage >= usersTotalPages;
+}
 
-    if (totalEl) totalEl.textContent = allUsers.length.toString();
-    if (activeEl) activeEl.textContent = activeCount.toString();
-    if (inactiveEl) inactiveEl.textContent = inactiveCount.toString();
+// Previous / next page
+function changeUsersPage(delta) {
+    const nextPage = usersPage + delta;
+    if (nextPage < 1 || nextPage > usersTotalPages) return;
+    usersPage = nextPage;
+    loadUsersData();
 }
 
 // Initialize event listeners
@@ -227,8 +242,10 @@ function initializeEventListeners() {
     // Filter change listeners
     const roleFilter = document.getElementById('roleFilter');
     const statusFilter = document.getElementById('statusFilter');
+    const sortSelect = document.getElementById('sortSelect');
     if (roleFilter) roleFilter.addEventListener('change', filterUsers);
     if (statusFilter) statusFilter.addEventListener('change', filterUsers);
+    if (sortSelect) sortSelect.addEventListener('change', filterUsers);
     
     // Export button
     const exportBtn = document.querySelector('.btn-secondary');
@@ -267,6 +284,7 @@ function initializeEventListeners() {
 function initializeSearch() {
     const searchInput = document.getElementById('searchInput');
     let searchTimeout;
+    if (!searchInput) return;
     
     searchInput.addEventListener('input', function() {
         clearTimeout(searchTimeout);
@@ -276,14 +294,10 @@ function initializeSearch() {
     });
 }
 
-// Filter users
+// Filter users - any filter/sort change restarts from page 1
 function filterUsers() {
-    const roleFilter = document.getElementById('roleFilter').value;
-    const statusFilter = document.getElementById('statusFilter').value;
-    const searchQuery = document.getElementById('searchInput').value;
-    
-    filteredUsers = filterUsersData(allUsers, roleFilter, statusFilter, searchQuery);
-    updateUsersTable();
+    usersPage = 1;
+    loadUsersData();
 }
 
 // Search users
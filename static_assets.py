@@ -0,0 +1,115 @@
+"""
+Fingerprinted static assets
+Content-hashed URLs for files under static/ so browsers can cache them for a year
+
+Templates use the `static_url` Jinja helper:
+    <script src="{{ static_url('js/common.js') }}"></script>
+    -> /static/js/common.3f2a9c1be04d.js
+"""
+
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from starlette.types import Scope
+
+from compression import PrecompressedStaticFiles
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# User uploads and generated compression variants are never fingerprinted
+SKIP_DIRECTORIES = ("uploads",)
+SKIP_SUFFIXES = (".gz", ".br")
+
+_HASHED_NAME = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<ext>\.[^./]+)$")
+
+
+def fingerprint_name(rel_path: str, digest: str) -> str:
+    """js/common.js + digest -> js/common.<digest>.js"""
+    head, tail = os.path.split(rel_path)
+    stem, ext = os.path.splitext(tail)
+    return os.path.join(head, f"{stem}.{digest}{ext}").replace(os.sep, "/")
+
+
+class AssetManifest:
+    """Maps static paths to content-hashed paths (and back)"""
+
+    def __init__(self, directory: str, url_prefix: str = "/static"):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.hashed: Dict[str, str] = {}    # js/common.js -> js/common.<digest>.js
+        self.original: Dict[str, str] = {}  # js/common.<digest>.js -> js/common.js
+        self._lock = threading.Lock()
+
+    def build(self) -> int:
+        """Hash every asset under the static directory. Returns number of files hashed."""
+        hashed, original = {}, {}
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRECTORIES]
+            for name in files:
+                if name.endswith(SKIP_SUFFIXES):
+                    continue
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                hashed_path = fingerprint_name(rel_path, self._digest(full_path))
+                hashed[rel_path] = hashed_path
+                original[hashed_path] = rel_path
+        with self._lock:
+            self.hashed, self.original = hashed, original
+        return len(hashed)
+
+    def _digest(self, full_path: str) -> str:
+        h = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                h.update(chunk)
+        return h.hexdigest()[:12]
+
+    def url(self, rel_path: str) -> str:
+        """Jinja helper - hashed URL for a static file (plain URL if the file is unknown)"""
+        rel_path = rel_path.lstrip("/")
+        hashed_path = self.hashed.get(rel_path)
+        if hashed_path is None:
+            full_path = os.path.join(self.directory, rel_path)
+            if not os.path.isfile(full_path) or rel_path.split("/")[0] in SKIP_DIRECTORIES:
+                return f"{self.url_prefix}/{rel_path}"
+            # Asset added after startup - hash it on first use
+            hashed_path = fingerprint_name(rel_path, self._digest(full_path))
+            with self._lock:
+                self.hashed[rel_path] = hashed_path
+                self.original[hashed_path] = rel_path
+        return f"{self.url_prefix}/{hashed_path}"
+
+    def resolve(self, path: str) -> Optional[str]:
+        """Hashed request path -> real file path (None if not a hashed path)"""
+        path = path.replace(os.sep, "/")
+        if path in self.original:
+            return self.original[path]
+        match = _HASHED_NAME.match(path)
+        if match:
+            # Digest from an older deploy - still serve the current file
+            return match.group("stem") + match.group("ext")
+        return None
+
+
+class FingerprintedStaticFiles(PrecompressedStaticFiles):
+    """Serves hashed asset URLs with immutable one-year caching"""
+
+    def __init__(self, *args, manifest: AssetManifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope):
+        original = self.manifest.resolve(path)
+        if original is None:
+            return await super().get_response(path, scope)
+
+        response = await super().get_response(original, scope)
+        if self.manifest.original.get(path.replace(os.sep, "/")) == original:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            # Stale digest - content may differ from what the page expects
+            response.headers["Cache-Control"] = "no-cache"
+        return response
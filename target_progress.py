@@ -0,0 +1,463 @@
+"""
+Target progress engine
+Targets ka current_value lead_status_history / lead_history se calculate karta hai
+
+Targets are grouped by (type, context_tab, period). Every group is answered by
+one aggregate query grouped on (changed_by, matched value), so the cost is
+one query per group instead of one or two queries per target.
+
+Lead writes keep targets live in between: apply_lead_changes() turns a status
+change / tracked field change into increments on the matching targets, and the
+scheduled recompute_active_targets() run reconciles any drift.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lead_facts import (
+    FACT_DIMENSION_BY_TAB, NUMERIC_AMOUNT, NUMERIC_AMOUNT_PATTERN, facts_ready, refresh_lead_daily_facts,
+)
+from periods import PeriodError, parse_period
+
+# Context tab -> leads column the target name is matched against
+TARGET_FIELD_MAP = {
+    'sources': 'lead_source',
+    'statuses': 'lead_status',
+    'types': 'lead_type',
+    'systems': 'system',
+    'project_amc': 'project_amc',
+    'communication_method': 'method_of_communication',
+}
+
+# Statuses that count as a won deal
+CLOSED_STATUSES = ('Closed', 'Won', 'Converted')
+
+# 'units' targets on these tabs count lead_history entries of one field
+UNITS_HISTORY_FIELDS = {
+    'communication_method': 'method_of_communication',
+    'sources': 'lead_source',
+}
+
+# lead_history fields that move target progress (see apply_lead_changes)
+TRACKED_HISTORY_FIELDS = ('closing_amount', 'lead_source', 'method_of_communication')
+
+# Rows per multi-row UPDATE statement
+UPDATE_CHUNK_SIZE = 500
+
+
+def parse_target_period(period: str) -> tuple:
+    """Period string -> half-open ('start', 'end') query bounds. Raises PeriodError if unrecognised."""
+    start, end = parse_period(period or '')
+    return (start.strftime('%Y-%m-%d %H:%M:%S'), end.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def _match_key(value) -> str:
+    """MySQL compares names case-insensitively and ignores trailing spaces - mirror that"""
+    return str(value if value is not None else '').rstrip().casefold()
+
+
+def _placeholders(values) -> str:
+    return ', '.join(['%s'] * len(values))
+
+
+def _facts_group_query(target_type: str, context_tab: Optional[str], names: List[str],
+                       users: List[int], date_start: str, date_end: str) -> Tuple[Optional[str], list, bool]:
+    """Same as _group_query for the additive metrics, read from lead_daily_facts.
+    Returns (None, [], False) when the group needs raw history (distinct-lead counts)."""
+    user_in = _placeholders(users)
+    name_in = _placeholders(names)
+    day_range = [date_start[:10], date_end[:10]]
+
+    if target_type == 'revenue':
+        if not context_tab or context_tab not in TARGET_FIELD_MAP:
+            sql = f'''
+                SELECT user_id as changed_by, COALESCE(SUM(revenue), 0) as value
+                FROM lead_daily_facts
+                WHERE metric = 'closing_amount'
+                  AND user_id IN ({user_in})
+                  AND fact_date >= %s AND fact_date < %s
+                GROUP BY user_id
+            '''
+            return sql, [*users, *day_range], False
+        dimension = FACT_DIMENSION_BY_TAB.get(context_tab)
+        if dimension:
+            sql = f'''
+                SELECT user_id as changed_by, {dimension} as match_value, COALESCE(SUM(revenue), 0) as value
+                FROM lead_daily_facts
+                WHERE metric = 'closing_amount'
+                  AND {dimension} IN ({name_in})
+                  AND user_id IN ({user_in})
+                  AND fact_date >= %s AND fact_date < %s
+                GROUP BY user_id, {dimension}
+            '''
+            return sql, [*names, *users, *day_range], True
+
+    if target_type == 'units' and context_tab in UNITS_HISTORY_FIELDS:
+        sql = f'''
+            SELECT user_id as changed_by, metric_value as match_value, SUM(event_count) as value
+            FROM lead_daily_facts
+            WHERE metric = %s
+              AND metric_value IN ({name_in})
+              AND user_id IN ({user_in})
+              AND fact_date >= %s AND fact_date < %s
+            GROUP BY user_id, metric_value
+        '''
+        return sql, [UNITS_HISTORY_FIELDS[context_tab], *names, *users, *day_range], True
+
+    return None, [], False
+
+
+def _group_query(target_type: str, context_tab: Optional[str], names: List[str],
+                 users: List[int], date_start: str, date_end: str) -> Tuple[Optional[str], list, bool]:
+    """SQL for one (type, context_tab, period) group.
+
+    Returns (sql, params, keyed). Rows carry `changed_by`, `value` and - when
+    keyed - `match_value` (the name the target is matched on).
+    """
+    user_in = _placeholders(users)
+    name_in = _placeholders(names)
+    closed_in = _placeholders(CLOSED_STATUSES)
+
+    if target_type == 'deals':
+        if context_tab == 'statuses':
+            sql = f'''
+                SELECT changed_by, new_status as match_value, COUNT(DISTINCT lead_id) as value
+                FROM lead_status_history
+                WHERE new_status IN ({name_in})
+                  AND changed_by IN ({user_in})
+                  AND changed_at >= %s AND changed_at < %s
+                GROUP BY changed_by, new_status
+            '''
+            return sql, [*names, *users, date_start, date_end], True
+        filter_field = TARGET_FIELD_MAP.get(context_tab, 'lead_status')
+        sql = f'''
+            SELECT lsh.changed_by, l.{filter_field} as match_value, COUNT(DISTINCT lsh.lead_id) as value
+            FROM lead_status_history lsh
+            JOIN leads l ON lsh.lead_id = l.lead_id
+            WHERE lsh.new_status IN ({closed_in})
+              AND l.{filter_field} IN ({name_in})
+              AND lsh.changed_by IN ({user_in})
+              AND lsh.changed_at >= %s AND lsh.changed_at < %s
+            GROUP BY lsh.changed_by, l.{filter_field}
+        '''
+        return sql, [*CLOSED_STATUSES, *names, *users, date_start, date_end], True
+
+    if target_type == 'revenue':
+        if context_tab and context_tab in TARGET_FIELD_MAP:
+            filter_field = TARGET_FIELD_MAP[context_tab]
+            sql = f'''
+                SELECT lh.changed_by, l.{filter_field} as match_value,
+                       COALESCE(SUM(CAST(lh.new_value AS DECIMAL(15,2))), 0) as value
+                FROM lead_history lh
+                JOIN leads l ON lh.lead_id = l.lead_id
+                WHERE lh.field_name = 'closing_amount'
+                  AND lh.new_value REGEXP %s
+                  AND lh.new_value != '0'
+                  AND l.{filter_field} IN ({name_in})
+                  AND lh.changed_by IN ({user_in})
+                  AND lh.changed_at >= %s AND lh.changed_at < %s
+                GROUP BY lh.changed_by, l.{filter_field}
+            '''
+            return sql, [NUMERIC_AMOUNT_PATTERN, *names, *users, date_start, date_end], True
+        sql = f'''
+            SELECT changed_by, COALESCE(SUM(CAST(new_value AS DECIMAL(15,2))), 0) as value
+            FROM lead_history
+            WHERE field_name = 'closing_amount'
+              AND new_value REGEXP %s
+              AND new_value != '0'
+              AND changed_by IN ({user_in})
+              AND changed_at >= %s AND changed_at < %s
+            GROUP BY changed_by
+        '''
+        return sql, [NUMERIC_AMOUNT_PATTERN, *users, date_start, date_end], False
+
+    if target_type == 'units':
+        history_field = UNITS_HISTORY_FIELDS.get(context_tab)
+        if history_field:
+            # Every history entry counts (same lead updated 5 times = 5 counts)
+            sql = f'''
+                SELECT changed_by, new_value as match_value, COUNT(*) as value
+                FROM lead_history
+                WHERE field_name = %s
+                  AND new_value IN ({name_in})
+                  AND changed_by IN ({user_in})
+                  AND changed_at >= %s AND changed_at < %s
+                GROUP BY changed_by, new_value
+            '''
+            return sql, [history_field, *names, *users, date_start, date_end], True
+        sql = f'''
+            SELECT changed_by, COUNT(DISTINCT lead_id) as value
+            FROM lead_status_history
+            WHERE changed_by IN ({user_in})
+              AND changed_at >= %s AND changed_at < %s
+            GROUP BY changed_by
+        '''
+        return sql, [*users, date_start, date_end], False
+
+    if target_type == 'conversion':
+        # Touched and converted leads in one pass; rate is worked out by the caller
+        sql = f'''
+            SELECT changed_by,
+                   COUNT(DISTINCT lead_id) as total,
+                   COUNT(DISTINCT CASE WHEN new_status IN ({closed_in}) THEN lead_id END) as converted
+            FROM lead_status_history
+            WHERE changed_by IN ({user_in})
+              AND changed_at >= %s AND changed_at < %s
+            GROUP BY changed_by
+        '''
+        return sql, [*CLOSED_STATUSES, *users, date_start, date_end], False
+
+    # Unknown target type - nothing to measure
+    return None, [], False
+
+
+def _row_value(target_type: str, row: dict):
+    if target_type == 'conversion':
+        total = row.get('total') or 0
+        converted = row.get('converted') or 0
+        return round((converted / total * 100), 2) if total > 0 else 0.0
+    if target_type == 'revenue':
+        return float(row.get('value') or 0)
+    return int(row.get('value') or 0)
+
+
+def _zero(target_type: str):
+    return 0.0 if target_type in ('revenue', 'conversion') else 0
+
+
+def compute_target_values(cursor, targets: Iterable[dict], use_facts: bool = False) -> Dict[int, dict]:
+    """Current value for every target, one grouped aggregate query per (type, context_tab, period)
+
+    use_facts - read additive metrics from lead_daily_facts (caller refreshes facts first)
+    Returns {target_id: {"current_value", "date_start", "date_end"}}. Targets whose
+    period cannot be parsed get current_value None and an "error" instead.
+    """
+    groups = defaultdict(list)
+    for target in targets:
+        groups[(target.get('type'), target.get('context_tab'), target.get('period'))].append(target)
+
+    results = {}
+    for (target_type, context_tab, period), members in groups.items():
+        try:
+            date_start, date_end = parse_target_period(period)
+        except PeriodError as e:
+            for member in members:
+                results[member['id']] = {"current_value": None, "date_start": None, "date_end": None,
+                                         "error": str(e)}
+            continue
+        names = sorted({m.get('name') for m in members if m.get('name') is not None})
+        users = sorted({m.get('assigned_to') for m in members if m.get('assigned_to') is not None})
+
+        values = {}
+        sql, params, keyed = None, [], False
+        if users and names and use_facts:
+            sql, params, keyed = _facts_group_query(target_type, context_tab, names, users, date_start, date_end)
+        if users and names and not sql:
+            sql, params, keyed = _group_query(target_type, context_tab, names, users, date_start, date_end)
+        if sql:
+            cursor.execute(sql, params)
+            for row in cursor.fetchall() or []:
+                key = (row['changed_by'], _match_key(row.get('match_value')) if keyed else None)
+                if keyed and key in values:
+                    # Collation folded two spellings together in GROUP BY order - add them up
+                    values[key] = values[key] + _row_value(target_type, row)
+                else:
+                    values[key] = _row_value(target_type, row)
+
+        for member in members:
+            key = (member.get('assigned_to'), _match_key(member.get('name')) if keyed else None)
+            results[member['id']] = {
+                "current_value": values.get(key, _zero(target_type)),
+                "date_start": date_start,
+                "date_end": date_end,
+            }
+    return results
+
+
+def write_target_values(cursor, values: Dict[int, object]) -> int:
+    """Store current_value for many targets with multi-row CASE updates. Returns rows written."""
+    items = [(target_id, value) for target_id, value in values.items() if value is not None]
+    for i in range(0, len(items), UPDATE_CHUNK_SIZE):
+        chunk = items[i:i + UPDATE_CHUNK_SIZE]
+        case_sql = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+        params = [p for target_id, value in chunk for p in (target_id, value)]
+        params.extend(target_id for target_id, _ in chunk)
+        cursor.execute(f'''
+            UPDATE targets
+            SET current_value = CASE id {case_sql} END,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id IN ({_placeholders(chunk)})
+        ''', params)
+    return len(items)
+
+
+def prepare_facts(cursor) -> bool:
+    """Bring lead_daily_facts up to date; False if facts are not backfilled yet (use raw history).
+    Writes facts - scheduled jobs only; request handlers check facts_current() instead."""
+    if not facts_ready(cursor):
+        return False
+    refresh_lead_daily_facts(cursor)
+    return True
+
+
+def recompute_active_targets(conn) -> dict:
+    """Background reconciliation job - recompute every active target from history"""
+    started = datetime.now()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, name, type, target_value, current_value, assigned_to, period, context_tab
+        FROM targets
+        WHERE is_active = 1
+    ''')
+    targets = cursor.fetchall() or []
+    use_facts = prepare_facts(cursor)
+    progress = compute_target_values(cursor, targets, use_facts=use_facts)
+    # Only rows that drifted from the incremental updates are written
+    stored = {t['id']: float(t.get('current_value') or 0) for t in targets}
+    drifted = {tid: p['current_value'] for tid, p in progress.items()
+               if p['current_value'] is not None and abs(float(p['current_value']) - stored[tid]) > 0.005}
+    written = write_target_values(cursor, drifted)
+    return {
+        "targets": len(targets),
+        "drifted": written,
+        "from_facts": use_facts,
+        "groups": len({(t.get('type'), t.get('context_tab'), t.get('period')) for t in targets}),
+        "seconds": round((datetime.now() - started).total_seconds(), 3),
+    }
+
+
+def increment_target_values(cursor, deltas: Dict[int, object]) -> int:
+    """Add deltas to current_value for many targets in one statement. Returns rows touched."""
+    items = [(tid, delta) for tid, delta in deltas.items() if delta]
+    if not items:
+        return 0
+    case_sql = ' '.join(['WHEN %s THEN %s'] * len(items))
+    params = [p for target_id, delta in items for p in (target_id, delta)]
+    params.extend(target_id for target_id, _ in items)
+    cursor.execute(f'''
+        UPDATE targets
+        SET current_value = current_value + CASE id {case_sql} ELSE 0 END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id IN ({_placeholders(items)})
+    ''', params)
+    return len(items)
+
+
+def _is_first_status_row(cursor, cache: dict, lead_id: str, changed_by: int,
+                         statuses: Optional[Tuple[str, ...]], date_start: str, date_end: str) -> bool:
+    """True if the status row just written is the only one counted for this lead in the period.
+    Keeps the COUNT(DISTINCT lead_id) targets from counting a lead twice."""
+    key = (statuses, date_start, date_end)
+    if key not in cache:
+        sql = '''
+            SELECT COUNT(*) as count
+            FROM lead_status_history
+            WHERE lead_id = %s
+              AND changed_by = %s
+              AND changed_at >= %s AND changed_at < %s
+        '''
+        params = [lead_id, changed_by, date_start, date_end]
+        if statuses:
+            sql += f" AND new_status IN ({_placeholders(statuses)})"
+            params.extend(statuses)
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        cache[key] = bool(row) and row['count'] == 1
+    return cache[key]
+
+
+def _target_delta(cursor, cache: dict, target: dict, lead: dict, changed_by: int,
+                  new_status: Optional[str], field_values: dict, date_start: str, date_end: str):
+    """Increment one lead change adds to one target (mirrors the _group_query definitions)"""
+    target_type = target.get('type')
+    context_tab = target.get('context_tab')
+    name_key = _match_key(target.get('name'))
+    lead_id = lead.get('lead_id')
+
+    if target_type == 'deals':
+        if new_status is None:
+            return 0
+        if context_tab == 'statuses':
+            if _match_key(new_status) != name_key:
+                return 0
+            first = _is_first_status_row(cursor, cache, lead_id, changed_by, (new_status,), date_start, date_end)
+            return 1 if first else 0
+        if _match_key(new_status) not in {_match_key(s) for s in CLOSED_STATUSES}:
+            return 0
+        if _match_key(lead.get(TARGET_FIELD_MAP.get(context_tab, 'lead_status'))) != name_key:
+            return 0
+        first = _is_first_status_row(cursor, cache, lead_id, changed_by, CLOSED_STATUSES, date_start, date_end)
+        return 1 if first else 0
+
+    if target_type == 'revenue':
+        amount = field_values.get('closing_amount')
+        if amount is None or str(amount) in ('', '0'):
+            return 0
+        if context_tab and context_tab in TARGET_FIELD_MAP:
+            if _match_key(lead.get(TARGET_FIELD_MAP[context_tab])) != name_key:
+                return 0
+        if not NUMERIC_AMOUNT.fullmatch(str(amount)):
+            return 0  # same rule as the history queries / facts
+        return round(float(amount), 2)
+
+    if target_type == 'units':
+        history_field = UNITS_HISTORY_FIELDS.get(context_tab)
+        if history_field:
+            value = field_values.get(history_field)
+            return 1 if value is not None and _match_key(value) == name_key else 0
+        if new_status is None:
+            return 0
+        return 1 if _is_first_status_row(cursor, cache, lead_id, changed_by, None, date_start, date_end) else 0
+
+    return 0
+
+
+def apply_lead_changes(cursor, lead: dict, changed_by: int, new_status: Optional[str] = None,
+                       field_values: Optional[dict] = None) -> int:
+    """Apply one lead write to the matching active targets. Call after the history rows are inserted.
+
+    lead         - lead row as it is after the write (used for context tab matching)
+    new_status   - status written to lead_status_history, if any
+    field_values - tracked fields written to lead_history {field: new_value}
+
+    Counts and sums are incremented; conversion rates and targets whose period
+    rolled over since their last update are recomputed from history instead.
+    Returns number of targets touched.
+    """
+    field_values = {f: v for f, v in (field_values or {}).items() if f in TRACKED_HISTORY_FIELDS}
+    if new_status is None and not field_values:
+        return 0
+
+    cursor.execute('''
+        SELECT id, name, type, assigned_to, period, context_tab, updated_at
+        FROM targets
+        WHERE is_active = 1 AND assigned_to = %s
+    ''', (changed_by,))
+    targets = cursor.fetchall() or []
+
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    deltas, recompute, cache = {}, [], {}
+    for target in targets:
+        try:
+            date_start, date_end = parse_target_period(target.get('period'))
+        except PeriodError:
+            continue  # reported by calculate-all / reconciliation
+        if not (date_start <= now < date_end):
+            continue
+        updated_at = target.get('updated_at')
+        stale = updated_at is None or str(updated_at) < date_start
+        if stale or target.get('type') == 'conversion':
+            if stale or new_status is not None:
+                recompute.append(target)
+            continue
+        delta = _target_delta(cursor, cache, target, lead, changed_by, new_status, field_values,
+                              date_start, date_end)
+        if delta:
+            deltas[target['id']] = delta
+
+    touched = increment_target_values(cursor, deltas)
+    if recompute:
+        progress = compute_target_values(cursor, recompute)
+        touched += write_target_values(cursor, {tid: p['current_value'] for tid, p in progress.items()})
+    return touched
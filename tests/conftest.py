@@ -0,0 +1,43 @@
+"""
+Shared test fixtures
+MySQL wale tests database.py ki settings use karte hain - server na ho to skip
+
+`db` is a connection to the database configured in database.py, running with
+strict sql_mode (the production default). Every test's writes are rolled back,
+so the tests don't need a dedicated database - but they do need the schema
+(python migrate.py).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def db():
+    import database
+    try:
+        conn = database.get_connection()
+    except Exception as e:
+        pytest.skip(f"MySQL not available: {e}")
+    cursor = conn.cursor()
+    cursor.execute("SET SESSION sql_mode = 'STRICT_TRANS_TABLES,NO_ZERO_DATE,NO_ZERO_IN_DATE,ERROR_FOR_DIVISION_BY_ZERO'")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.fixture
+def db_user(db):
+    """A throwaway user row (rolled back with the test)"""
+    cursor = db.cursor()
+    cursor.execute('''
+        INSERT INTO users (username, password, full_name, email, role)
+        VALUES ('pytest_user', 'x', 'Pytest User', 'pytest@example.com', 'sales')
+    ''')
+    return cursor.lastrowid
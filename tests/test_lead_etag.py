@@ -0,0 +1,53 @@
+"""
+Tests for the /api/leads/{lead_id} ETag version
+Ek hi second mein do updates ke baad bhi ETag badalna chahiye
+
+Needs MySQL with migrations applied (0006 makes leads.updated_at TIMESTAMP(6)).
+"""
+
+from http_cache import make_etag
+from routers.leads import lead_detail_version
+
+
+def _insert_lead(cursor, user_id):
+    cursor.execute('''
+        INSERT INTO leads (lead_id, lead_date, company_name, customer_name, contact_no, email_id,
+                           created_by, assigned_to)
+        VALUES ('PYTEST-ETAG-1', CURDATE(), 'Pytest Co', 'Pytest Customer', '9999999999',
+                'customer@example.com', %s, %s)
+    ''', (user_id, user_id))
+    return 'PYTEST-ETAG-1'
+
+
+def _etag(cursor, lead_id, user):
+    return make_etag("lead", lead_id, user['user_id'], *lead_detail_version(cursor, lead_id, user))
+
+
+def test_two_updates_in_the_same_second_change_the_etag(db, db_user):
+    cursor = db.cursor()
+    user = {"user_id": db_user, "role": "admin"}
+    lead_id = _insert_lead(cursor, db_user)
+
+    etags = [_etag(cursor, lead_id, user)]
+    for remarks in ("first edit", "second edit"):
+        # Same statement update_lead runs - back to back, well inside one second
+        cursor.execute('UPDATE leads SET remarks = %s, updated_at = CURRENT_TIMESTAMP(6) WHERE lead_id = %s',
+                       (remarks, lead_id))
+        etags.append(_etag(cursor, lead_id, user))
+    assert len(set(etags)) == 3
+
+
+def test_assigned_user_rename_changes_the_etag(db, db_user):
+    cursor = db.cursor()
+    user = {"user_id": db_user, "role": "admin"}
+    lead_id = _insert_lead(cursor, db_user)
+
+    before = _etag(cursor, lead_id, user)
+    cursor.execute("UPDATE users SET full_name = 'Renamed Pytest User' WHERE id = %s", (db_user,))
+    assert _etag(cursor, lead_id, user) != before
+
+
+def test_lead_of_another_user_has_no_version(db, db_user):
+    cursor = db.cursor()
+    lead_id = _insert_lead(cursor, db_user)
+    assert lead_detail_version(cursor, lead_id, {"user_id": db_user + 1000, "role": "sales"}) is None
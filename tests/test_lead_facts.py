@@ -0,0 +1,57 @@
+"""
+Tests for lead_daily_facts revenue aggregation
+Free-text closing_amount ("1,50,000", "TBD") se refresh fail nahi hona chahiye
+
+Non-numeric closing amounts count as 0 in all three places that sum them: the
+facts rebuild (INSERT ... SELECT, strict mode), the raw-history target query
+and the incremental update on lead writes.
+"""
+
+from datetime import date, datetime
+
+import pytest
+
+from lead_facts import NUMERIC_AMOUNT, rebuild_fact_range
+from target_progress import _target_delta
+
+# Far from real history (TIMESTAMP ends in 2038) - the range rebuild deletes that day's facts
+FACT_DAY = date(2037, 12, 15)
+
+
+@pytest.mark.parametrize("value, numeric", [
+    ("150000", True), ("150000.50", True), ("-25.5", True), ("0", True),
+    ("1,50,000", False), ("TBD", False), ("", False), (" 5000", False), ("5000\n", False), ("1e5", False),
+    ("12345678901234", False),  # past DECIMAL(15,2)
+])
+def test_numeric_amount_pattern(value, numeric):
+    assert bool(NUMERIC_AMOUNT.fullmatch(value)) is numeric
+
+
+@pytest.mark.parametrize("amount, delta", [("150000", 150000.0), ("1,50,000", 0), ("TBD", 0), ("0", 0)])
+def test_revenue_increment_ignores_non_numeric_amounts(amount, delta):
+    target = {"type": "revenue", "name": "Revenue", "context_tab": None}
+    lead = {"lead_id": "CS0000000001"}
+    result = _target_delta(None, {}, target, lead, 7, None, {"closing_amount": amount},
+                           "2026-01-01 00:00:00", "2027-01-01 00:00:00")
+    assert result == delta
+
+
+def test_rebuild_with_non_numeric_closing_amount(db, db_user):
+    cursor = db.cursor()
+    changed_at = datetime(FACT_DAY.year, FACT_DAY.month, FACT_DAY.day, 11, 0)
+    for lead_id, value in (("PYTEST001", "150000"), ("PYTEST002", "1,50,000"), ("PYTEST003", "TBD")):
+        cursor.execute('''
+            INSERT INTO lead_history (lead_id, field_name, old_value, new_value, changed_by, changed_at)
+            VALUES (%s, 'closing_amount', NULL, %s, %s, %s)
+        ''', (lead_id, value, db_user, changed_at))
+
+    rebuild_fact_range(cursor, FACT_DAY, date(2037, 12, 16))
+
+    cursor.execute('''
+        SELECT event_count, distinct_leads, revenue FROM lead_daily_facts
+        WHERE fact_date = %s AND user_id = %s AND metric = 'closing_amount'
+    ''', (FACT_DAY, db_user))
+    row = cursor.fetchone()
+    assert row["event_count"] == 3
+    assert row["distinct_leads"] == 3
+    assert float(row["revenue"]) == 150000.0
@@ -0,0 +1,165 @@
+"""
+Property tests for periods.parse_period
+Random periods (fixed seed) - har range half-open, lagataar periods ek doosre se jude hue
+
+Checks the invariants targets and reports rely on: start < end, consecutive
+months / quarters / weeks / fiscal years meet exactly (end of one == start of
+the next), sub-periods tile their parent, custom ranges round-trip, and no
+input string raises anything but PeriodError.
+
+Run:
+    python -m pytest -q tests
+"""
+
+import random
+import string
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from periods import PeriodError, parse_period
+
+SEED = 20261019
+CASES = 500
+MIN_YEAR, MAX_YEAR = 2, 9997  # room for the neighbouring period on both sides
+
+
+@pytest.fixture
+def rng():
+    return random.Random(SEED)
+
+
+def random_day(rng, first_year=MIN_YEAR, last_year=MAX_YEAR) -> date:
+    first, last = date(first_year, 1, 1), date(last_year, 12, 31)
+    return first + timedelta(days=rng.randint(0, (last - first).days))
+
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def assert_half_open(period, today=None, fiscal_start_month=4):
+    start, end = parse_period(period, today, fiscal_start_month)
+    assert start < end, period
+    assert start.time() == end.time() == datetime.min.time(), period
+    return start, end
+
+
+def test_months_are_adjacent(rng):
+    for _ in range(CASES):
+        year, month = rng.randint(MIN_YEAR, MAX_YEAR), rng.randint(1, 12)
+        start, end = assert_half_open(f"{year:04d}-{month:02d}")
+        assert start == datetime(year, month, 1)
+        following, _ = parse_period("%04d-%02d" % next_month(year, month))
+        assert end == following
+
+
+def test_quarters_are_adjacent_and_tile_the_year(rng):
+    for _ in range(CASES):
+        year = rng.randint(MIN_YEAR, MAX_YEAR)
+        quarters = [assert_half_open(f"{year:04d}-Q{q}") for q in range(1, 5)]
+        for (_, end), (start, _) in zip(quarters, quarters[1:]):
+            assert end == start
+        assert (quarters[0][0], quarters[-1][1]) == parse_period(f"{year:04d}")
+        assert quarters[-1][1] == parse_period(f"{year + 1:04d}Q1")[0]
+
+
+def test_years_are_adjacent(rng):
+    for _ in range(CASES):
+        year = rng.randint(MIN_YEAR, MAX_YEAR)
+        _, end = assert_half_open(f"{year:04d}")
+        assert end == parse_period(f"{year + 1:04d}")[0]
+
+
+def test_iso_weeks_are_adjacent(rng):
+    for _ in range(CASES):
+        day = random_day(rng)
+        year, week, _ = day.isocalendar()
+        start, end = assert_half_open(f"{year:04d}-W{week:02d}")
+        assert start.weekday() == 0 and end - start == timedelta(days=7)
+        assert start.date() <= day < end.date()
+        following_year, following_week, _ = (day + timedelta(days=7)).isocalendar()
+        assert end == parse_period(f"{following_year:04d}-W{following_week:02d}")[0]
+
+
+def test_days_are_adjacent(rng):
+    for _ in range(CASES):
+        day = random_day(rng)
+        start, end = assert_half_open(day.isoformat())
+        assert end == parse_period((day + timedelta(days=1)).isoformat())[0]
+
+
+def test_fiscal_years_are_adjacent_and_tiled_by_quarters(rng):
+    for _ in range(CASES):
+        year, start_month = rng.randint(MIN_YEAR, MAX_YEAR), rng.randint(1, 12)
+        start, end = assert_half_open(f"FY{year:04d}", fiscal_start_month=start_month)
+        assert start.month == start_month and (end.year - start.year) * 12 + end.month - start.month == 12
+        assert end == parse_period(f"FY{year + 1:04d}", None, start_month)[0]
+        assert parse_period(f"FY{year - 1:04d}-{year % 100:02d}", None, start_month) == (start, end)
+        quarters = [assert_half_open(f"FY{year:04d}-Q{q}", fiscal_start_month=start_month) for q in range(1, 5)]
+        assert quarters[0][0] == start and quarters[-1][1] == end
+        for (_, quarter_end), (quarter_start, _) in zip(quarters, quarters[1:]):
+            assert quarter_end == quarter_start
+
+
+def test_relative_periods_contain_today(rng):
+    for _ in range(CASES):
+        today = random_day(rng)
+        start_month = rng.randint(1, 12)
+        midnight = datetime(today.year, today.month, today.day)
+        for period in ("daily", "weekly", "monthly", "quarterly", "yearly", "fiscal_yearly", "fiscal_quarterly"):
+            start, end = assert_half_open(period, today, start_month)
+            assert start <= midnight < end, (period, today)
+
+
+def test_custom_ranges_round_trip(rng):
+    for _ in range(CASES):
+        first = random_day(rng)
+        last = first + timedelta(days=rng.randint(0, 400))
+        separator = rng.choice(("..", "/", " .. ", " / "))
+        period = f"{first.isoformat()}{separator}{last.isoformat()}"
+        start, end = assert_half_open(period)
+        last_day = (end - timedelta(days=1)).date()
+        assert (start.date(), last_day) == (first, last)
+        # Formatting the result back gives the same range
+        assert parse_period(f"{start.date().isoformat()}..{last_day.isoformat()}") == (start, end)
+
+
+def test_reversed_custom_range_is_rejected(rng):
+    for _ in range(CASES // 10):
+        first = random_day(rng)
+        with pytest.raises(PeriodError):
+            parse_period(f"{first.isoformat()}..{(first - timedelta(days=1)).isoformat()}")
+
+
+@pytest.mark.parametrize("period", [
+    "0000", "9999", "9999-Q4", "9999-12", "9999-W52", "0000-W01", "FY0001", "FY0000-01", "FY9999-Q4x",
+    "9999-12-31", "9999-12-31..9999-12-31", "0001-01-01/0000-12-31", "2026-13", "2026-W54", "2026-02-30",
+    "FY2026-28", "", "   ", "Q3", "2026-Q5", "fy", "..",
+])
+def test_edge_cases_raise_only_period_error(period):
+    try:
+        start, end = parse_period(period)
+    except PeriodError:
+        return
+    assert start < end
+
+
+def test_random_strings_raise_only_period_error(rng):
+    tokens = ["FY", "Q", "W", "-", "..", "/", " ", "0", "1", "9", "00", "12", "53", "99", "0000", "9999",
+              "2026", "monthly", "fiscal_", "yearly"]
+    alphabet = string.ascii_letters + string.digits + string.punctuation + " \t\n"
+    for _ in range(CASES * 4):
+        if rng.random() < 0.5:
+            period = "".join(rng.choice(tokens) for _ in range(rng.randint(1, 6)))
+        else:
+            period = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 24)))
+        try:
+            start, end = parse_period(period, random_day(rng, 1, 9998), rng.randint(1, 12))
+        except PeriodError:
+            continue
+        assert start < end, period